@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, create_model
 from typing import Annotated
 from enum import Enum
 
@@ -241,3 +241,48 @@ class ClaimRiskSignals(BaseModel):
 
     class Config:
         populate_by_name = True
+
+
+class ClaimRiskSignalsBatch(BaseModel):
+    """Packed response holding the signals of several claims sent in one prompt."""
+
+    claims: Annotated[
+        list[ClaimRiskSignals],
+        Field(
+            description=(
+                "One entry per claim in the prompt, in any order. "
+                "Each entry's case_id must match the caseid of its claim."
+            )
+        )
+    ]
+
+
+# 🔹 Semantic-only schema (operational flags are filled by keyword rules)
+
+OPERATIONAL_FLAGS = (
+    "has_regulator_involvement",
+    "has_cross_border_elements",
+    "has_time_sensitivity",
+    "has_missing_documentation",
+    "mentions_fraud_or_arson",
+)
+
+ClaimSemanticSignals = create_model(
+    "ClaimSemanticSignals",
+    __config__=ConfigDict(populate_by_name=True),
+    __doc__="ClaimRiskSignals without the keyword-driven operational flags.",
+    **{
+        name: (field.annotation, field)
+        for name, field in ClaimRiskSignals.model_fields.items()
+        if name not in OPERATIONAL_FLAGS
+    },
+)
+
+ClaimSemanticSignalsBatch = create_model(
+    "ClaimSemanticSignalsBatch",
+    __doc__="Packed response holding the semantic signals of several claims.",
+    claims=(
+        list[ClaimSemanticSignals],
+        ClaimRiskSignalsBatch.model_fields["claims"],
+    ),
+)
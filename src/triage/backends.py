@@ -0,0 +1,429 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from schema.modeloutput import ClaimRiskSignals, OPERATIONAL_FLAGS, YesNoUnknown
+from triage.keywords import claim_text, compile_phrases, extract_operational_flags
+
+logger = logging.getLogger(__name__)
+
+# Chat model behind GetFromLlm:
+#   openai - ChatOpenAI(gpt-4o-mini), needs OPENAI_API_KEY and network
+#   fake   - deterministic keyword-rule signals, no network
+#   replay - recorded responses from data/llmdata/archive, fake for the rest
+LLM_BACKENDS = ("openai", "fake", "replay")
+DEFAULT_LLM_BACKEND = "openai"
+
+# Environment overrides, so tests and benchmarks can switch backend without
+# touching the command line
+LLM_BACKEND_ENV = "TRIAGE_LLM_BACKEND"
+FAKE_LATENCY_ENV = "TRIAGE_FAKE_LATENCY"
+FAKE_FAILURE_RATE_ENV = "TRIAGE_FAKE_FAILURE_RATE"
+REPLAY_DIR_ENV = "TRIAGE_REPLAY_DIR"
+
+OPENAI_MODEL = "gpt-4o-mini"
+
+# Model name each backend reports (GetFromLlm.model_name)
+BACKEND_MODELS = {
+    "openai": OPENAI_MODEL,
+    "fake": "fake-keyword-rules",
+    "replay": "replay",
+}
+REPLAY_ARCHIVE_DIR = "data/llmdata/archive"
+
+# Prompts whose attempt count the offline backends remember (least
+# recently seen dropped first), so long runs and services stay bounded
+ATTEMPT_MEMORY_ENTRIES = 100_000
+
+# Claim information block as rendered by triage.ingest.format_claim
+CLAIM_PATTERN = re.compile(
+    r"caseid:(?P<case_id>[^;]*); Summary: (?P<summary>.*?); handler_notes: (?P<notes>.*?); "
+    r"historical outcome: (?P<outcome>.*?); has attachment: (?P<attachment>[^\n]*)",
+    re.DOTALL,
+)
+
+# Trigger phrases per semantic signal, taken from the field descriptions in
+# schema/modeloutput.py; the fake backend answers "Yes" when one is present
+SIGNAL_PHRASES = {
+    "severe_legal_or_regulatory_risk": [
+        "regulatory investigation",
+        "enforcement action",
+        "statutory breach",
+        "compliance failure",
+        "compliance breach",
+        "data protection authority",
+        "injunction",
+        "(?-i:FCA)",
+        "(?-i:SEC)",
+    ],
+    "business_critical_impact": [
+        "business interruption",
+        "ransomware",
+        "outage",
+        "major financial loss",
+        "core operations",
+        "production halted",
+    ],
+    "potential_fraud": [
+        "suspected fraud",
+        "insurance fraud",
+        "fraud",
+        "suspicious",
+        "staged",
+        "deliberate damage",
+        "police investigation",
+        "police reference",
+        "arson",
+    ],
+    "conflicting_information": [
+        "conflicting",
+        "inconsistent",
+        "contradict",
+        "contradictory",
+        "discrepancy",
+    ],
+    "complex_incident_details": [
+        "multi-party",
+        "multiple parties",
+        "layered",
+        "technically complex",
+        "expert",
+    ],
+    "policy_interpretation_issues": [
+        "governing law unclear",
+        "policy wording",
+        "ambiguous",
+        "interpretation",
+    ],
+    "legal_disputes": [
+        "legal threat",
+        "litigation",
+        "breach of contract",
+        "employment dispute",
+        "infringement",
+        "class action",
+        "formal letter",
+        "lawsuit",
+    ],
+    "jurisdictional_complexity": [
+        "cross-border",
+        "cross border",
+        "overseas",
+        "multi-jurisdiction",
+        "multiple jurisdictions",
+        "foreign court",
+        "foreign jurisdiction",
+        "jurisdiction disputed",
+        "governing law",
+    ],
+    "coverage_terms_unclear": [
+        "coverage unclear",
+        "coverage dispute",
+        "unclear coverage",
+        "limits unclear",
+        "scope of cover",
+    ],
+    "exclusions_may_apply": [
+        "exclusion",
+        "flood zone",
+        "wear and tear",
+        "prior loss",
+        "deliberate act",
+        "not covered",
+    ],
+    "new_or_unusual_claim_type": [
+        "unusual",
+        "novel",
+        "first of its kind",
+        "rare",
+        "unprecedented",
+    ],
+    "unclear_incident_description": [
+        "unclear",
+        "vague",
+        "incomplete",
+        "details unknown",
+        "limited details",
+    ],
+    "claim_invalid_or_fraudulent": [
+        "misrepresentation",
+        "implausible",
+        "invalid",
+        "fabricated",
+    ],
+    "required_conditions_not_met": [
+        "late notification",
+        "not notified",
+        "no supporting documentation",
+        "no policy documents",
+        "evidence not supplied",
+        "documents awaited",
+        "attachments missing",
+        "non-compliance",
+    ],
+}
+
+SIGNAL_PATTERN = compile_phrases(SIGNAL_PHRASES)
+
+BLANK_TEXT = {"", "nan", "None"}
+
+
+class BackendError(Exception):
+    """Error raised by the offline backends, shaped like an HTTP API error."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ReplayMissError(LookupError):
+    """Raised by the replay backend for a claim with no recorded response."""
+    pass
+
+
+def resolve_backend(backend: str | None = None) -> str:
+    """``backend`` if given, else $TRIAGE_LLM_BACKEND, else openai."""
+    backend = backend or os.environ.get(LLM_BACKEND_ENV) or DEFAULT_LLM_BACKEND
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend {backend!r}; expected one of {LLM_BACKENDS}")
+    return backend
+
+
+def parse_claims(prompt: str) -> list[dict]:
+    """Claim information blocks found in a single or packed prompt."""
+    return [m.groupdict() for m in CLAIM_PATTERN.finditer(prompt)]
+
+
+def rule_signals(claim: dict) -> dict:
+    """
+    Plausible ClaimRiskSignals for a parsed claim: semantic signals from
+    SIGNAL_PHRASES, operational flags from triage.keywords. A claim with no
+    text at all gets "No data available" for every semantic signal.
+    """
+    # format_claim renders missing text as "nan"
+    summary, notes = (
+        None if claim[key].strip() in BLANK_TEXT else claim[key] for key in ("summary", "notes")
+    )
+    text = claim_text(summary, notes)
+    if summary is None and notes is None:
+        found, default = set(), YesNoUnknown.NO_DATA.value
+    else:
+        found, default = {m.lastgroup for m in SIGNAL_PATTERN.finditer(text)}, YesNoUnknown.NO.value
+
+    signals = {
+        name: YesNoUnknown.YES.value if name in found else default
+        for name in SIGNAL_PHRASES
+    }
+    flags = extract_operational_flags(text)
+    raised = sorted(found) + [flag for flag in OPERATIONAL_FLAGS if flags[flag] == YesNoUnknown.YES.value]
+    risk_summary = (
+        "Rule-based signals: " + ", ".join(raised) + "."
+        if raised
+        else "No risk indicators found by rule-based extraction."
+    )
+    return {"case_id": claim["case_id"], **signals, **flags, "risk_summary": risk_summary}
+
+
+def _fraction(*parts) -> float:
+    """Deterministic number in [0, 1) derived from ``parts``."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+class OfflineChatModel(BaseChatModel):
+    """
+    Base for the offline backends: answers each prompt with JSON built by
+    ``_signals`` per claim (a ``claims`` list for packed prompts) after
+    ``latency`` (+ up to ``jitter``) seconds. ``failure_rate`` of the calls,
+    and every call mentioning one of ``fail_case_ids``, raise a BackendError
+    with ``failure_status``. Failures are decided from a hash of the seed,
+    prompt and attempt number, so reruns fail the same calls and a retried
+    prompt eventually succeeds.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    failure_status: int = 503
+    fail_case_ids: frozenset[str] = frozenset()
+    seed: int = 0
+
+    _attempts: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _attempts_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    # -----------------------------------------------------
+
+    def _signals(self, claim: dict) -> dict | None:
+        raise NotImplementedError
+
+    def _prepare(self, messages) -> tuple[str, float]:
+        """Decide the outcome of one call; returns (prompt, latency)."""
+        prompt = messages[-1].content
+        attempt = self._next_attempt(prompt)
+        delay = self.latency + self.jitter * _fraction(self.seed, "latency", prompt, attempt)
+
+        claims = parse_claims(prompt)
+        failed = [c["case_id"] for c in claims if c["case_id"] in self.fail_case_ids]
+        if failed:
+            raise BackendError(f"Injected failure for {failed}", self.failure_status)
+        if self.failure_rate and _fraction(self.seed, "failure", prompt, attempt) < self.failure_rate:
+            raise BackendError("Injected transient failure", self.failure_status)
+        return prompt, delay
+
+    def _next_attempt(self, prompt: str) -> int:
+        """Number of earlier calls with ``prompt``, counted under a short digest."""
+        key = hashlib.blake2b(f"{self.seed}\x1f{prompt}".encode(), digest_size=16).digest()
+        with self._attempts_lock:
+            attempt = self._attempts.pop(key, 0)
+            self._attempts[key] = attempt + 1
+            if len(self._attempts) > ATTEMPT_MEMORY_ENTRIES:
+                self._attempts.popitem(last=False)
+            self._calls += 1
+        return attempt
+
+    def _respond(self, prompt: str) -> ChatResult:
+        claims = parse_claims(prompt)
+        if "\nClaims:\n" in prompt:
+            found = [s for s in map(self._signals, claims) if s is not None]
+            payload = {"claims": found}
+        elif claims:
+            payload = self._signals(claims[0])
+            if payload is None:
+                raise ReplayMissError(f"No recorded response for case {claims[0]['case_id']}")
+        else:
+            raise BackendError("Prompt holds no claim information", 400)
+        content = json.dumps(payload)
+        # Report usage like a real API (~4 characters per token) so token
+        # accounting and budgets can be exercised offline
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt, delay = self._prepare(messages)
+        if delay:
+            time.sleep(delay)
+        return self._respond(prompt)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt, delay = self._prepare(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(prompt)
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+
+class KeywordFakeChatModel(OfflineChatModel):
+    """Deterministic offline backend deriving every signal from keyword rules."""
+
+    model_name: str = BACKEND_MODELS["fake"]
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-keyword-rules"
+
+    def _signals(self, claim: dict) -> dict:
+        return rule_signals(claim)
+
+
+class ReplayChatModel(OfflineChatModel):
+    """
+    Serves the responses recorded in the archive CSVs (llm_out*.csv written
+    by earlier runs), keyed by case_id. Columns that are no longer in the
+    schema are dropped; signals the recording lacks (the operational flags
+    were added later) come from the keyword rules. Claims with no recording
+    use the rule-based fake when ``fallback`` is set and raise
+    ReplayMissError otherwise (or are left out of packed responses).
+    """
+
+    model_name: str = BACKEND_MODELS["replay"]
+    archive_dir: str = REPLAY_ARCHIVE_DIR
+    fallback: bool = True
+
+    _recorded: dict = PrivateAttr(default_factory=dict)
+    _misses: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        self._recorded = load_recordings(self.archive_dir)
+        logger.info(
+            "Replay backend loaded | dir=%s | cases=%d",
+            self.archive_dir,
+            len(self._recorded),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _signals(self, claim: dict) -> dict | None:
+        recorded = self._recorded.get(claim["case_id"])
+        if recorded is None:
+            self._misses += 1
+            logger.debug("No recorded response | case_id=%s", claim["case_id"])
+            return rule_signals(claim) if self.fallback else None
+        return {**rule_signals(claim), **recorded}
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+
+def load_recordings(archive_dir: str | Path) -> dict[str, dict]:
+    """case_id -> recorded signal fields from every CSV in ``archive_dir``; later files win."""
+    fields = set(ClaimRiskSignals.model_fields)
+    recorded = {}
+    for path in sorted(Path(archive_dir).glob("*.csv")):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        df = df[[col for col in df.columns if col in fields]]
+        for row in df.to_dict("records"):
+            recorded[row["case_id"]] = {k: v for k, v in row.items() if v != ""}
+    return recorded
+
+
+def make_chat_model(backend: str | None = None, max_retries: int | None = None) -> BaseChatModel:
+    """
+    Chat model for ``backend`` (see resolve_backend). The offline backends
+    read latency and failure injection from $TRIAGE_FAKE_LATENCY and
+    $TRIAGE_FAKE_FAILURE_RATE, and replay its archive from $TRIAGE_REPLAY_DIR.
+    """
+    backend = resolve_backend(backend)
+    if backend == "openai":
+        from langchain_openai import ChatOpenAI
+
+        retries = {"max_retries": max_retries} if max_retries is not None else {}
+        return ChatOpenAI(model=OPENAI_MODEL, **retries)
+
+    options = {
+        "latency": float(os.environ.get(FAKE_LATENCY_ENV, 0.0)),
+        "failure_rate": float(os.environ.get(FAKE_FAILURE_RATE_ENV, 0.0)),
+    }
+    if backend == "fake":
+        return KeywordFakeChatModel(**options)
+    return ReplayChatModel(
+        archive_dir=os.environ.get(REPLAY_DIR_ENV, REPLAY_ARCHIVE_DIR),
+        **options,
+    )
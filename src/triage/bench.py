@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+import pandas as pd
+
+from src.schema.modeloutput import ClaimRiskSignals
+from src.triage.features import process_features
+from src.triage.ingest import extract_signals_deduplicated, iter_validated_chunks, new_data_report
+from src.triage.model import GetFromLlm
+from src.triage.predict import predict_frame
+from src.triage.ratelimit import RateLimitScheduler
+from src.triage.synth import generate_gold, write_records
+from src.triage.validate import evaluation
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the results file changes
+BENCH_SCHEMA_VERSION = 2
+
+# Gold labels sampled per run: 1% of the rows, at least the 200 of gold_cases.csv
+GOLD_FRACTION = 0.01
+MIN_GOLD_ROWS = 200
+
+# Runs of `triage --help` timed for the CLI startup figure
+STARTUP_REPEATS = 5
+
+
+def _process_peak_rss_mb() -> float | None:
+    """
+    High-water mark of this process's resident set size so far (Linux
+    reports KiB). It never goes down, so it is the running maximum over
+    every stage measured before, not the stage's own peak.
+    """
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _package_version() -> str:
+    try:
+        return version("interview-task")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def measure(stage: str, rows: int, func, trace_memory: bool = True):
+    """
+    Run ``func()`` and return (result, timing record). With ``trace_memory``
+    the record includes the peak Python heap allocated during this stage
+    alone (tracemalloc is started and stopped around it; it slows the stage
+    down and excludes worker processes).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    record = {
+        "stage": stage,
+        "rows": rows,
+        "seconds": round(elapsed, 4),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else None,
+        "peak_traced_mb": round(peak / 2 ** 20, 1) if peak is not None else None,
+        "process_peak_rss_mb": _process_peak_rss_mb(),
+    }
+    logger.info("Benchmark stage done | %s", record)
+    return result, record
+
+
+def measure_startup(repeats: int = STARTUP_REPEATS) -> dict:
+    """
+    Median wall time of ``python -m triage --help`` next to a bare
+    interpreter start, so the CLI's own import cost is the difference.
+    """
+    def median_run(args):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *args], check=True, capture_output=True)
+            times.append(time.perf_counter() - start)
+        return round(statistics.median(times), 4)
+
+    interpreter = median_run(["-c", "pass"])
+    cli_help = median_run(["-m", "triage", "--help"])
+    record = {
+        "interpreter_seconds": interpreter,
+        "help_seconds": cli_help,
+        "cli_overhead_seconds": round(cli_help - interpreter, 4),
+    }
+    logger.info("CLI startup measured | %s", record)
+    return record
+
+
+def _signals_frame(results: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        [r.model_dump() for r in results if r is not None],
+        columns=list(ClaimRiskSignals.model_fields),
+    )
+
+
+def bench_size(
+    rows: int,
+    workdir: Path,
+    seed: int = 0,
+    workers: int = 1,
+    signal_mode: str = "keywords",
+    llm_backend: str = "fake",
+    llm_concurrency: int = 1,
+    claims_per_call: int = 1,
+    trace_memory: bool = True,
+) -> dict:
+    """Generate ``rows`` synthetic records in ``workdir`` and time every pipeline stage on them."""
+    input_path = workdir / "records.csv"
+    gold_path = workdir / "gold_cases.csv"
+    stages = []
+
+    def run(stage, func, n=rows):
+        result, record = measure(stage, n, func, trace_memory)
+        stages.append(record)
+        return result
+
+    run("generate", lambda: write_records(input_path, rows, seed))
+
+    report = new_data_report(input_path)
+    records = run(
+        "validate",
+        lambda: pd.concat(
+            iter_validated_chunks(input_path, report, report_dir=workdir, workers=workers),
+            ignore_index=True,
+        ),
+    )
+
+    llm = None
+    if signal_mode != "keywords":
+        llm = GetFromLlm(
+            backend=llm_backend,
+            semantic_only=signal_mode == "hybrid",
+            scheduler=RateLimitScheduler(max_concurrency=llm_concurrency),
+        )
+    results, dedup = run(
+        "extract",
+        lambda: extract_signals_deduplicated(
+            llm,
+            records,
+            concurrency=llm_concurrency,
+            claims_per_call=claims_per_call,
+            signal_mode=signal_mode,
+        ),
+        len(records),
+    )
+    signals = _signals_frame(results)
+
+    processed = run(
+        "features",
+        lambda: process_features(records=records, signals=signals, persist=False, workers=workers),
+        len(records),
+    )
+    predictions = run("score", lambda: predict_frame(processed), len(processed))
+
+    gold = generate_gold(
+        records["case_id"],
+        max(MIN_GOLD_ROWS, int(rows * GOLD_FRACTION)),
+        seed,
+    )
+    gold.to_csv(gold_path, index=False)
+    run("evaluate", lambda: evaluation(gold_path, workdir, pred_df=predictions), len(predictions))
+
+    return {
+        "rows": rows,
+        "valid_rows": len(records),
+        "unique_prompts": dedup["unique_prompts"],
+        "total_seconds": round(sum(s["seconds"] for s in stages), 4),
+        "stages": stages,
+    }
+
+
+def run_benchmark(
+    sizes: list[int],
+    output: str | Path,
+    seed: int = 0,
+    workers: int = 1,
+    signal_mode: str = "keywords",
+    llm_backend: str = "fake",
+    llm_concurrency: int = 1,
+    claims_per_call: int = 1,
+    trace_memory: bool = True,
+    workdir: str | Path | None = None,
+) -> dict:
+    """
+    Benchmark the pipeline stages at each of ``sizes`` rows and save the
+    results as JSON at ``output``. Inputs are generated under ``workdir``
+    (a temporary directory by default, removed afterwards).
+    """
+    config = {
+        "seed": seed,
+        "workers": workers,
+        "signal_mode": signal_mode,
+        "llm_backend": llm_backend if signal_mode != "keywords" else None,
+        "llm_concurrency": llm_concurrency,
+        "claims_per_call": claims_per_call,
+        "trace_memory": trace_memory,
+    }
+    logger.info("Benchmark started | sizes=%s | %s", sizes, config)
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="triage-bench-") as tmp:
+        base = Path(workdir) if workdir else Path(tmp)
+        for rows in sizes:
+            size_dir = base / f"rows_{rows}"
+            size_dir.mkdir(parents=True, exist_ok=True)
+            runs.append(
+                bench_size(
+                    rows,
+                    size_dir,
+                    seed=seed,
+                    workers=workers,
+                    signal_mode=signal_mode,
+                    llm_backend=llm_backend,
+                    llm_concurrency=llm_concurrency,
+                    claims_per_call=claims_per_call,
+                    trace_memory=trace_memory,
+                )
+            )
+
+    results = {
+        "schema_version": BENCH_SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "package_version": _package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "cli_startup": measure_startup(),
+        "runs": runs,
+    }
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    logger.info("Benchmark results written | path=%s", output)
+    return results
+
+
+def summary_table(results: dict, baseline: dict | None = None) -> str:
+    """
+    Markdown table of stage timings; with ``baseline`` (an earlier results
+    file) each stage also shows its time relative to the baseline run of
+    the same size.
+    """
+    previous = {}
+    if baseline is not None:
+        previous = {
+            (run["rows"], stage["stage"]): stage["seconds"]
+            for run in baseline["runs"]
+            for stage in run["stages"]
+        }
+
+    rows = []
+    for run in results["runs"]:
+        for stage in run["stages"]:
+            row = {
+                "rows": run["rows"],
+                "stage": stage["stage"],
+                "seconds": stage["seconds"],
+                "rows_per_s": stage["rows_per_s"],
+            }
+            if results["config"]["trace_memory"]:
+                row["peak_traced_mb"] = stage["peak_traced_mb"]
+            row["process_peak_rss_mb"] = stage["process_peak_rss_mb"]
+            if baseline is not None:
+                before = previous.get((run["rows"], stage["stage"]))
+                row["vs_baseline"] = round(stage["seconds"] / before, 2) if before else None
+            rows.append(row)
+    table = pd.DataFrame(rows).to_markdown(index=False)
+
+    startup = results.get("cli_startup")
+    if startup:
+        table += (
+            f"\n\nCLI startup (`triage --help`): {startup['help_seconds']:.3f}s, "
+            f"{startup['cli_overhead_seconds']:.3f}s over a bare interpreter"
+        )
+        before = (baseline or {}).get("cli_startup")
+        if before and before["cli_overhead_seconds"] > 0:
+            ratio = startup["cli_overhead_seconds"] / before["cli_overhead_seconds"]
+            table += f" ({ratio:.2f}x baseline)"
+    return table
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Writes (new entries and hits' access times) committed together
+CACHE_FLUSH_ROWS = 500
+
+
+def schema_version(model_cls) -> str:
+    """Short fingerprint of a pydantic model's JSON schema."""
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMResponseCache:
+    """
+    Persistent, content-addressed cache of parsed LLM responses.
+
+    Entries are keyed by a hash of the rendered prompt (with the case id
+    left out, so identical claim content under another case_id hits), the
+    model name and the output schema version, so a prompt or schema change
+    never serves a stale answer. Values are the parsed signals serialised
+    as JSON.
+
+    Writes are batched: new entries are inserted as they arrive, hits'
+    access times are kept in memory, and both are committed together
+    every ``flush_rows`` writes, before eviction and on close().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int | None = None,
+        max_age_days: float | None = None,
+        flush_rows: int = CACHE_FLUSH_ROWS,
+    ):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.flush_rows = flush_rows
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+        self._unflushed = 0
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                schema_version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        logger.info("LLM cache opened | path=%s | entries=%d", self.path, len(self))
+
+        self.evict()
+
+    # -----------------------------------------------------
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, schema_version: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model_name, schema_version, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    # -----------------------------------------------------
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._touched[key] = time.time()
+            self._written()
+            return row[0]
+
+    # -----------------------------------------------------
+
+    def put(self, key: str, payload: str, model_name: str, schema_version: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, schema_version, payload, now, now),
+            )
+            self._touched.pop(key, None)
+            self._written()
+
+    def flush(self) -> None:
+        """Write the buffered access times and commit."""
+        with self._lock:
+            self._flush()
+
+    def _written(self) -> None:
+        self._unflushed += 1
+        if self._unflushed >= self.flush_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched = {}
+        self._conn.commit()
+        self._unflushed = 0
+
+    # -----------------------------------------------------
+
+    def evict(self) -> int:
+        """Drop entries older than max_age_days, then the least recently used beyond max_entries."""
+        removed = 0
+        with self._lock:
+            self._flush()
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (cutoff,)
+                ).rowcount
+
+            if self.max_entries is not None:
+                removed += self._conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache
+                        ORDER BY accessed_at DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                ).rowcount
+
+            self._conn.commit()
+
+        if removed:
+            logger.info("LLM cache eviction | removed=%d", removed)
+        return removed
+
+    # -----------------------------------------------------
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._conn.close()
@@ -0,0 +1,96 @@
+import logging
+import os
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from schema.modeloutput import ClaimRiskSignals
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionJournal:
+    """
+    Append-only JSON-lines journal of per-row LLM extraction results.
+
+    Every successfully extracted row is written and flushed as soon as it
+    completes, so a crashed run loses at most the rows that were in flight.
+    On resume the journal is replayed to skip case_ids already extracted.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if not resume and self.path.exists():
+            logger.info("Starting fresh extraction journal | path=%s", self.path)
+            self.path.unlink()
+        elif resume and self.path.exists():
+            self._drop_partial_line()
+
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self.written = 0
+
+    def _drop_partial_line(self, block: int = 65536) -> None:
+        """
+        Truncate the journal after its last newline, so records appended
+        on resume do not run on from a line cut short by a crash.
+        """
+        with open(self.path, "rb+") as f:
+            size = end = f.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(0, end - block)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                logger.warning(
+                    "Dropping truncated journal line | path=%s | bytes=%d",
+                    self.path,
+                    size - end,
+                )
+                f.truncate(end)
+
+    # -----------------------------------------------------
+
+    def load(self) -> dict[str, ClaimRiskSignals]:
+        """Replay the journal into a case_id -> signals mapping."""
+        done = {}
+        if not self.path.exists():
+            return done
+
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    signals = ClaimRiskSignals.model_validate_json(line)
+                except ValidationError:
+                    # A crash mid-write leaves a truncated final line
+                    logger.warning(
+                        "Skipping unreadable journal line | path=%s | line=%d",
+                        self.path,
+                        line_no,
+                    )
+                    continue
+                done[signals.case_id] = signals
+
+        logger.info("Extraction journal loaded | path=%s | rows=%d", self.path, len(done))
+        return done
+
+    # -----------------------------------------------------
+
+    def append(self, signals: ClaimRiskSignals) -> None:
+        self._fh.write(signals.model_dump_json() + "\n")
+        self._fh.flush()
+        self.written += 1
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
@@ -1,10 +1,15 @@
 import argparse
+import json
+import os
 import sys
 import logging
+from datetime import datetime, timezone
 
-from triage.predict import run_pipeline
 from triage.logging_config import setup_logging
 
+# The subcommands import the pipeline (pandas, LangChain, sklearn) only
+# once arguments are parsed, so --help and argument errors return fast
+
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +50,159 @@ def main():
         help="Directory to write outputs"
     )
 
+    run_parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=1,
+        help="Maximum number of concurrent LLM requests during extraction (default:1)"
+    )
+
+    run_parser.add_argument(
+        "--llm-backend",
+        default=None,
+        choices=["openai", "fake", "replay"],
+        help=(
+            "Chat model behind extraction: openai; fake: offline keyword-rule responses; "
+            "replay: recorded responses from data/llmdata/archive "
+            "(default: $TRIAGE_LLM_BACKEND, else openai)"
+        )
+    )
+
+    run_parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Requests-per-minute ceiling of the LLM account (default: unlimited)"
+    )
+
+    run_parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Estimated tokens-per-minute ceiling of the LLM account (default: unlimited)"
+    )
+
+    run_parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries with exponential backoff on 429/5xx LLM responses (default: 5)"
+    )
+
+    run_parser.add_argument(
+        "--max-tokens-budget",
+        type=int,
+        default=None,
+        help="Stop LLM extraction once this many tokens are spent; remaining rows use keyword signals"
+    )
+
+    run_parser.add_argument(
+        "--claims-per-call",
+        type=int,
+        default=1,
+        help="Number of claims packed into each LLM request (default:1)"
+    )
+
+    run_parser.add_argument(
+        "--signal-mode",
+        default="llm",
+        choices=["llm", "hybrid", "keywords"],
+        help=(
+            "llm: LLM extracts all signals; hybrid: keyword rules fill the operational "
+            "flags and the LLM only the semantic signals; keywords: flags only, no LLM calls"
+        )
+    )
+
+    run_parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=None,
+        help="Stream the input in chunks of this many rows to bound memory (default: whole file)"
+    )
+
+    run_parser.add_argument(
+        "--storage-format",
+        default="parquet",
+        choices=["parquet", "csv"],
+        help="Format of the intermediate tables handed between stages (default: parquet)"
+    )
+
+    run_parser.add_argument(
+        "--persist-intermediates",
+        action="store_true",
+        help="Write the preprocessed, signal and processed tables to --data-dir (default: chain stages in memory)"
+    )
+
+    run_parser.add_argument(
+        "--data-dir",
+        default="data",
+        help="Directory for intermediate tables and the extraction journal (default: data)"
+    )
+
+    run_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes sharing validation, signal merge and scoring (default: 1)"
+    )
+
+    run_parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=1,
+        help="Threads reading persisted LLM batch files in the feature step (default: 1)"
+    )
+
+    run_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only extract and score case_ids that are new or changed since the last incremental run"
+    )
+
+    run_parser.add_argument(
+        "--state-path",
+        default=None,
+        help="SQLite state store for --incremental (default: <data-dir>/triage_state.sqlite)"
+    )
+
+    run_parser.add_argument(
+        "--prometheus",
+        action="store_true",
+        help="Also write the run metrics in Prometheus text format to <outdir>/run_metrics.prom"
+    )
+
+    run_parser.add_argument(
+        "--cache-path",
+        default=None,
+        help="SQLite file caching parsed LLM responses (default: <data-dir>/llmdata/llm_cache.sqlite)"
+    )
+
+    run_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the LLM response cache"
+    )
+
+    run_parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=None,
+        help="Evict least recently used cache entries beyond this count"
+    )
+
+    run_parser.add_argument(
+        "--cache-max-age-days",
+        type=float,
+        default=None,
+        help="Evict cache entries older than this many days"
+    )
+
+    run_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run, skipping case_ids already in the extraction journal"
+    )
+
     run_parser.add_argument(
         "--log-level",
         default="INFO",
@@ -58,6 +216,266 @@ def main():
         help="Directory to store logs (default:logs)"
     )
 
+    # ---------------- bench command ----------------
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Time each pipeline stage on synthetic data of one or more sizes"
+    )
+
+    bench_parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000],
+        help="Number of synthetic records per benchmark run, e.g. --rows 10000 1000000 (default: 10000)"
+    )
+
+    bench_parser.add_argument(
+        "--output",
+        default=None,
+        help="JSON results file (default: outputs/benchmarks/bench-<UTC timestamp>.json)"
+    )
+
+    bench_parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Earlier results file to compare stage timings against"
+    )
+
+    bench_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the synthetic data generator (default: 0)"
+    )
+
+    bench_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes sharing validation, signal merge and scoring (default: 1)"
+    )
+
+    bench_parser.add_argument(
+        "--signal-mode",
+        default="keywords",
+        choices=["llm", "hybrid", "keywords"],
+        help="Signal extraction mode; llm and hybrid call --llm-backend (default: keywords)"
+    )
+
+    bench_parser.add_argument(
+        "--llm-backend",
+        default="fake",
+        choices=["openai", "fake", "replay"],
+        help="Chat model for the llm and hybrid modes (default: fake, offline)"
+    )
+
+    bench_parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=1,
+        help="Maximum concurrent LLM requests during extraction (default: 1)"
+    )
+
+    bench_parser.add_argument(
+        "--claims-per-call",
+        type=int,
+        default=1,
+        help="Number of claims packed into each LLM request (default: 1)"
+    )
+
+    bench_parser.add_argument(
+        "--no-trace-memory",
+        dest="trace_memory",
+        action="store_false",
+        help="Do not record each stage's peak Python heap with tracemalloc (which slows the stages down)"
+    )
+
+    bench_parser.add_argument(
+        "--workdir",
+        default=None,
+        help="Keep the generated inputs and reports here (default: a temporary directory)"
+    )
+
+    bench_parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Logging level"
+    )
+
+    bench_parser.add_argument(
+        "--logdir",
+        default="logs",
+        help="Directory to store logs (default:logs)"
+    )
+
+    # ---------------- serve command ----------------
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Score claims posted as JSON lines over HTTP, keeping clients and caches warm"
+    )
+
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Interface to listen on (default: 127.0.0.1)"
+    )
+
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="TCP port to listen on (default: 8080)"
+    )
+
+    serve_parser.add_argument(
+        "--unix-socket",
+        default=None,
+        help="Listen on this Unix domain socket instead of --host/--port"
+    )
+
+    serve_parser.add_argument(
+        "--signal-mode",
+        default="llm",
+        choices=["llm", "hybrid", "keywords"],
+        help="Signal extraction mode, as for run (default: llm)"
+    )
+
+    serve_parser.add_argument(
+        "--llm-backend",
+        default=None,
+        choices=["openai", "fake", "replay"],
+        help="Chat model backend (default: $TRIAGE_LLM_BACKEND, then openai)"
+    )
+
+    serve_parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=1,
+        help="Maximum concurrent LLM requests fanned out by one scoring request (default: 1)"
+    )
+
+    serve_parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=16,
+        help="Maximum LLM requests in flight across all scoring requests (default: 16)"
+    )
+
+    serve_parser.add_argument(
+        "--claims-per-call",
+        type=int,
+        default=1,
+        help="Number of claims packed into each LLM request (default: 1)"
+    )
+
+    serve_parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Requests-per-minute ceiling shared by all scoring requests"
+    )
+
+    serve_parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Estimated tokens-per-minute ceiling shared by all scoring requests"
+    )
+
+    serve_parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries with exponential backoff on 429/5xx LLM responses (default: 5)"
+    )
+
+    serve_parser.add_argument(
+        "--cache-path",
+        default="data/llmdata/llm_cache.sqlite",
+        help="SQLite file caching parsed LLM responses (default:data/llmdata/llm_cache.sqlite)"
+    )
+
+    serve_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the LLM response cache"
+    )
+
+    serve_parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Logging level"
+    )
+
+    serve_parser.add_argument(
+        "--logdir",
+        default="logs",
+        help="Directory to store logs (default:logs)"
+    )
+
+    # ---------------- sweep command ----------------
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="Score a grid of signal weights and priority thresholds against gold labels, without LLM calls"
+    )
+
+    sweep_parser.add_argument(
+        "--gold",
+        required=True,
+        help="Path to gold cases CSV"
+    )
+
+    sweep_parser.add_argument(
+        "--grid",
+        default=None,
+        help=(
+            "JSON file mapping parameters (signal weight names, P0, P1, P2) to lists of values "
+            "(default: core weights at 0.5x/1x/1.5x, thresholds within +/-0.075)"
+        )
+    )
+
+    sweep_parser.add_argument(
+        "--data-dir",
+        default="data",
+        help="Directory holding the processed table of a `run --persist-intermediates` (default: data)"
+    )
+
+    sweep_parser.add_argument(
+        "--storage-format",
+        default="parquet",
+        choices=["parquet", "csv"],
+        help="Format the processed table was written in (default: parquet)"
+    )
+
+    sweep_parser.add_argument(
+        "--outdir",
+        default="outputs",
+        help="Directory to write sweep_results.csv and sweep_report.md (default: outputs)"
+    )
+
+    sweep_parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of best configurations to print (default: 10)"
+    )
+
+    sweep_parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Logging level"
+    )
+
+    sweep_parser.add_argument(
+        "--logdir",
+        default="logs",
+        help="Directory to store logs (default:logs)"
+    )
+
     # ---------------- test command ----------------
     test_parser = subparsers.add_parser(
         "test",
@@ -79,6 +497,8 @@ def main():
 
     # ---------------- command handling ----------------
     if args.command == "run":
+        from triage.predict import run_pipeline
+
         logger.info("Running triage pipeline")
 
         print(args.input)
@@ -86,11 +506,112 @@ def main():
         run_pipeline(
             input_path=args.input,
             gold_path=args.gold,
-            outdir1=args.outdir
+            outdir1=args.outdir,
+            llm_concurrency=args.llm_concurrency,
+            claims_per_call=args.claims_per_call,
+            signal_mode=args.signal_mode,
+            chunk_rows=args.chunk_rows,
+            storage_format=args.storage_format,
+            persist_intermediates=args.persist_intermediates,
+            data_dir=args.data_dir,
+            load_workers=args.load_workers,
+            workers=args.workers,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            max_retries=args.max_retries,
+            max_tokens_budget=args.max_tokens_budget,
+            llm_backend=args.llm_backend,
+            metrics_prometheus=args.prometheus,
+            incremental=args.incremental,
+            state_path=args.state_path,
+            cache_path=None if args.no_cache else (
+                args.cache_path or os.path.join(args.data_dir, "llmdata", "llm_cache.sqlite")
+            ),
+            cache_max_entries=args.cache_max_entries,
+            cache_max_age_days=args.cache_max_age_days,
+            resume=args.resume,
         )
 
         logger.info("Triage pipeline completed successfully")
 
+    elif args.command == "bench":
+        from triage.bench import run_benchmark, summary_table
+
+        logger.info("Running benchmark | rows=%s", args.rows)
+
+        output = args.output or (
+            f"outputs/benchmarks/bench-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+        )
+        results = run_benchmark(
+            args.rows,
+            output,
+            seed=args.seed,
+            workers=args.workers,
+            signal_mode=args.signal_mode,
+            llm_backend=args.llm_backend,
+            llm_concurrency=args.llm_concurrency,
+            claims_per_call=args.claims_per_call,
+            trace_memory=args.trace_memory,
+            workdir=args.workdir,
+        )
+
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        print(summary_table(results, baseline))
+        print(f"\nResults written to {output}")
+
+    elif args.command == "serve":
+        from triage.cache import LLMResponseCache
+        from triage.ratelimit import RateLimitScheduler
+        from triage.serve import TriageService, serve
+
+        cache = None if args.no_cache else LLMResponseCache(args.cache_path)
+        service = TriageService(
+            signal_mode=args.signal_mode,
+            llm_backend=args.llm_backend,
+            llm_concurrency=args.llm_concurrency,
+            claims_per_call=args.claims_per_call,
+            cache=cache,
+            scheduler=RateLimitScheduler(
+                rpm=args.rpm,
+                tpm=args.tpm,
+                max_retries=args.max_retries,
+                max_concurrency=args.max_in_flight,
+            ),
+        )
+        service.warm_up()
+        try:
+            serve(service, args.host, args.port, args.unix_socket)
+        finally:
+            service.close()
+            if cache is not None:
+                cache.close()
+
+    elif args.command == "sweep":
+        from triage.sweep import SWEEP_RESULTS_FILE, run_sweep, summary_table
+
+        grid = None
+        if args.grid:
+            with open(args.grid) as f:
+                grid = json.load(f)
+
+        results, baseline = run_sweep(
+            args.gold,
+            data_dir=args.data_dir,
+            storage_format=args.storage_format,
+            grid=grid,
+            outdir=args.outdir,
+            top=args.top,
+        )
+        print(
+            "Current priors | priority_accuracy=%.3f | priority_macro_f1=%.3f | action_accuracy=%.3f\n"
+            % (baseline["priority_accuracy"], baseline["priority_macro_f1"], baseline["action_accuracy"])
+        )
+        print(summary_table(results, args.top))
+        print(f"\n{len(results)} configurations written to {args.outdir}/{SWEEP_RESULTS_FILE}")
+
     elif args.command == "test":
         logger.info("Running test suite")
         import pytest
@@ -0,0 +1,144 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.schema.modeloutput import ClaimRiskSignals
+from src.schema.riskcalculatorinput import (
+    ClaimValueBand,
+    ClientSegment,
+    HistoricalOutcome,
+    Jurisdiction,
+    ServiceLine,
+    YesNo,
+)
+from src.triage.storage import enum_fields
+
+logger = logging.getLogger(__name__)
+
+# Compact in-memory representation of the claim table:
+#   * enum columns are pandas Categoricals with the schema's category order,
+#   * the YesNoUnknown signal columns are int8 codes indexing SIGNAL_LABELS
+#     (SIGNAL_MISSING where no signal was extracted for the claim)
+CLAIM_CATEGORIES = {
+    "client_segment": tuple(e.value for e in ClientSegment),
+    "jurisdiction": tuple(e.value for e in Jurisdiction),
+    "service_line": tuple(e.value for e in ServiceLine),
+    "claim_value_band": tuple(e.value for e in ClaimValueBand),
+    "attachments_present": tuple(e.value for e in YesNo),
+    "historical_outcome": tuple(e.value for e in HistoricalOutcome),
+}
+
+SIGNAL_COLUMNS = tuple(enum_fields(ClaimRiskSignals))
+SIGNAL_LABELS = ("No", "Yes", "No data available")
+SIGNAL_MISSING = -1
+
+PRIORITY_LEVELS = ("P0", "P1", "P2", "P3")
+
+
+def to_categorical(series: pd.Series, categories) -> pd.Series:
+    """Categorical with a fixed category order; values outside ``categories`` raise ValueError."""
+    result = series.astype(pd.CategoricalDtype(list(categories)))
+    unknown = result.isna() & series.notna()
+    if unknown.any():
+        raise ValueError(
+            f"Unexpected value {series[unknown].iloc[0]!r} in column {series.name!r}"
+        )
+    return result
+
+
+def to_signal_codes(series: pd.Series) -> pd.Series:
+    """Encode a Yes/No/No data available column as int8 codes."""
+    if is_signal_codes(series):
+        return series.astype(np.int8)
+    codes = pd.Series(
+        pd.Categorical(series, categories=SIGNAL_LABELS).codes,
+        index=series.index,
+        name=series.name,
+    )
+    unknown = (codes == SIGNAL_MISSING) & series.notna()
+    if unknown.any():
+        raise ValueError(
+            f"Unexpected value {series[unknown].iloc[0]!r} in column {series.name!r}"
+        )
+    return codes
+
+
+def from_signal_codes(series: pd.Series) -> pd.Series:
+    """Decode int8 signal codes back to their labels (NaN where missing)."""
+    labels = np.array(SIGNAL_LABELS + (np.nan,), dtype=object)
+    return pd.Series(labels[series.to_numpy()], index=series.index, name=series.name)
+
+
+def category_codes(series: pd.Series, categories) -> np.ndarray:
+    """Codes of ``series`` against a fixed category order; -1 for values outside it."""
+    return pd.Categorical(series, categories=list(categories)).codes
+
+
+def is_signal_codes(series: pd.Series) -> bool:
+    return pd.api.types.is_integer_dtype(series.dtype)
+
+
+def encode_claims(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with its enum columns as Categoricals and its signal columns as int8 codes."""
+    df = df.copy()
+    for col, categories in CLAIM_CATEGORIES.items():
+        if col in df.columns:
+            df[col] = to_categorical(df[col], categories)
+    for col in SIGNAL_COLUMNS:
+        if col in df.columns:
+            df[col] = to_signal_codes(df[col])
+    return df
+
+
+def decode_signals(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with int8 signal codes turned back into labels."""
+    df = df.copy()
+    for col in SIGNAL_COLUMNS:
+        if col in df.columns and is_signal_codes(df[col]):
+            df[col] = from_signal_codes(df[col])
+    return df
+
+
+# -----------------------------------------------------
+# Vectorised access working on any representation
+# -----------------------------------------------------
+
+def _labels_and_codes(series: pd.Series) -> tuple[tuple, np.ndarray] | None:
+    """(labels, codes) for encoded columns, None for plain object columns."""
+    if is_signal_codes(series):
+        return SIGNAL_LABELS, series.to_numpy()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return tuple(series.cat.categories), series.cat.codes.to_numpy()
+    return None
+
+
+def lookup(series: pd.Series, table: dict, default: float | None = None) -> np.ndarray:
+    """Map a column through a prior table into a float array."""
+    encoded = _labels_and_codes(series)
+    if encoded is None:
+        values = series.map(table).astype(np.float64).to_numpy()
+    else:
+        labels, codes = encoded
+        # One table entry per label plus NaN for missing (code -1)
+        per_label = np.array([table.get(label, np.nan) for label in labels] + [np.nan])
+        values = per_label[codes]
+
+    missing = np.isnan(values)
+    if missing.any():
+        if default is None:
+            # Mirror the KeyError raised by the per-row dict lookups
+            raise KeyError(series[missing].iloc[0])
+        values = np.where(missing, default, values)
+    return values
+
+
+def is_value(series: pd.Series, value: str) -> np.ndarray:
+    """Boolean mask of the rows equal to ``value``."""
+    encoded = _labels_and_codes(series)
+    if encoded is None:
+        return series.eq(value).to_numpy(dtype=bool)
+    labels, codes = encoded
+    if value not in labels:
+        return np.zeros(len(series), dtype=bool)
+    return codes == labels.index(value)
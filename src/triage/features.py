@@ -1,80 +1,87 @@
 import logging
 import pandas as pd
+from pathlib import Path
+
+from src.triage import metrics
+from src.triage.encoding import CLAIM_CATEGORIES, encode_claims
+from src.triage.parallel import concat_shards, map_shards
+from src.triage.storage import (
+    DEFAULT_STORAGE_FORMAT,
+    PREPROCESSED_TABLE,
+    PROCESSED_TABLE,
+    SIGNALS_DIR,
+    load_batches,
+    read_table,
+    write_table,
+)
 
 logger = logging.getLogger(__name__)
 
+# Columns of the llm_out batches
+SIGNAL_TABLE_COLUMNS = [
+    "case_id",
+    "severe_legal_or_regulatory_risk",
+    "business_critical_impact",
+    "potential_fraud",
+    "conflicting_information",
+    "complex_incident_details",
+    "policy_interpretation_issues",
+    "legal_disputes",
+    "jurisdictional_complexity",
+    "coverage_terms_unclear",
+    "exclusions_may_apply",
+    "new_or_unusual_claim_type",
+    "unclear_incident_description",
+    "claim_invalid_or_fraudulent",
+    "required_conditions_not_met",
+    "has_regulator_involvement",
+    "has_cross_border_elements",
+    "has_time_sensitivity",
+    "has_missing_documentation",
+    "mentions_fraud_or_arson",
+    "risk_summary",
+]
+
+
+def process_features(
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    records: pd.DataFrame | None = None,
+    signals: pd.DataFrame | None = None,
+    data_dir: str = "data",
+    persist: bool = True,
+    load_workers: int = 1,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Merge the preprocessed records with their extracted signals into the
+    compact scoring table (categorical enums, int8 signal codes).
 
-def process_features():
+    ``records`` and ``signals`` are loaded from the artefacts under
+    ``data_dir`` when not passed in memory (signal batches with
+    ``load_workers`` threads); the merged table is written back only with
+    ``persist``. ``workers`` > 1 merges and encodes record shards in a
+    process pool.
+    """
     logger.info("Starting feature processing step")
+    data_dir = Path(data_dir)
 
     # Load the pre-processed data
-    records_copy = pd.read_csv("data/pre-processeddata/preprocessed_data.csv")
+    if records is None:
+        with metrics.span("load_records") as load:
+            records = read_table(data_dir / PREPROCESSED_TABLE, storage_format)
+            load.rows = len(records)
     logger.info(
         "Pre-processed records loaded | rows=%d",
-        len(records_copy),
+        len(records),
     )
 
-    # Initialise an empty dataframe for all LLM signals
-    COLUMNS = [
-        "case_id",
-        "severe_legal_or_regulatory_risk",
-        "business_critical_impact",
-        "potential_fraud",
-        "conflicting_information",
-        "complex_incident_details",
-        "policy_interpretation_issues",
-        "legal_disputes",
-        "jurisdictional_complexity",
-        "coverage_terms_unclear",
-        "exclusions_may_apply",
-        "new_or_unusual_claim_type",
-        "unclear_incident_description",
-        "claim_invalid_or_fraudulent",
-        "required_conditions_not_met",
-        "has_regulator_involvement",
-        "has_cross_border_elements",
-        "has_time_sensitivity",
-        "has_missing_documentation",
-        "mentions_fraud_or_arson",
-        "risk_summary",
-    ]
-
-    df_all_signals = pd.DataFrame(columns=COLUMNS)
-    logger.debug("Initialized empty LLM signal dataframe")
-
-    # Load all LLM output CSVs and merge
-    num_batches = (len(records_copy) // 500) + 2
-    logger.info("Expecting %d LLM output batches", num_batches - 1)
-
-    for i in range(1, num_batches):
-        llm_path = f"data/llmdata/llm_out{i}.csv"
-        logger.debug("Loading LLM output file: %s", llm_path)
-
-        df = pd.read_csv(llm_path)
-        df_all_signals = pd.concat(
-            [df_all_signals, df],
-            ignore_index=True,
-        )
-
-        logger.debug(
-            "LLM batch %d loaded | rows added=%d | total_rows=%d",
-            i,
-            len(df),
-            len(df_all_signals),
-        )
-
-    logger.info(
-        "All LLM outputs merged into single dataframe | total_rows=%d",
-        len(df_all_signals),
-    )
+    if signals is None:
+        signals = load_signal_batches(storage_format, data_dir, load_workers)
 
-    # Merge base dataset with LLM signals
-    processed_df = pd.merge(
-        records_copy,
-        df_all_signals,
-        on="case_id",
-        how="left",
-    )
+    # Merge base dataset with LLM signals (left join on the case_id index)
+    with metrics.span("features", rows=len(records)):
+        shards = map_shards(merge_signals, records, workers, signals.set_index("case_id"))
+        processed_df = concat_shards(shards, ignore_index=True).reset_index(drop=True)
 
     logger.info(
         "Base data merged with LLM signals | final_rows=%d | final_cols=%d",
@@ -83,7 +90,41 @@ def process_features():
     )
 
     # Save the processed data
-    output_path = "data/processeddata/processeddf.csv"
-    processed_df.to_csv(output_path, index=False)
+    if persist:
+        with metrics.span("store_intermediates", rows=len(processed_df)):
+            output_path = write_table(
+                processed_df,
+                data_dir / PROCESSED_TABLE,
+                storage_format,
+                categorical=CLAIM_CATEGORIES,
+            )
+        logger.info("Processed dataset saved successfully at %s", output_path)
+
+    return processed_df
+
+
+def merge_signals(records: pd.DataFrame, signals_by_case: pd.DataFrame) -> pd.DataFrame:
+    """Join the signals (indexed by case_id) onto ``records`` and encode the result."""
+    return encode_claims(records.join(signals_by_case, on="case_id"))
+
+
+def load_signal_batches(
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    data_dir: str = "data",
+    workers: int = 1,
+) -> pd.DataFrame:
+    """Concatenate the llm_out{n} batches listed in the extraction manifest."""
+    with metrics.span("load_signals") as load:
+        df_all_signals = load_batches(Path(data_dir) / SIGNALS_DIR, storage_format, workers)
+        load.rows = 0 if df_all_signals is None else len(df_all_signals)
+
+    if df_all_signals is None:
+        # Keep the signal columns even when no batch was written
+        df_all_signals = pd.DataFrame(columns=SIGNAL_TABLE_COLUMNS)
+
+    logger.info(
+        "All LLM outputs merged into single dataframe | total_rows=%d",
+        len(df_all_signals),
+    )
 
-    logger.info("Processed dataset saved successfully at %s", output_path)
+    return df_all_signals
@@ -1,11 +1,43 @@
 import pandas as pd
+import asyncio
+import hashlib
 import logging
+import time
 import warnings
 from src.triage.model import GetFromLlm
-from pydantic import ValidationError,BaseModel, Field
+from src.triage.cache import LLMResponseCache
+from src.triage.ratelimit import RateLimitScheduler
+from src.triage.checkpoint import ExtractionJournal
+from src.triage.usage import TokenBudgetExceeded, TokenLedger
+from src.triage.logging_config import ProgressLogger
+from src.triage.state import IncrementalState
+from src.triage import metrics
+from src.triage.encoding import encode_claims
+from src.triage.parallel import concat_shards, map_shards
+from src.triage.storage import (
+    DEFAULT_STORAGE_FORMAT,
+    PREPROCESSED_TABLE,
+    SIGNALS_DIR,
+    TableWriter,
+    batch_entry,
+    enum_fields,
+    write_manifest,
+    write_table,
+)
+from src.triage.keywords import (
+    claim_text,
+    combine_signals,
+    extract_operational_flags,
+    keyword_only_signals,
+)
+from pydantic import ValidationError,BaseModel, Field, TypeAdapter
+from schema.modeloutput import ClaimRiskSignals
 from src.schema.riskcalculatorinput import YesNo,ClientSegment,Jurisdiction,ServiceLine,HistoricalOutcome,ClaimValueBand
 from pathlib import Path
 import json
+from enum import Enum
+from collections import OrderedDict
+from functools import lru_cache
 
 
 warnings.filterwarnings(
@@ -16,6 +48,27 @@ warnings.filterwarnings(
 
 logger = logging.getLogger(__name__)
 
+# How signals are produced: "llm" asks the LLM for everything, "hybrid"
+# fills the operational flags with keyword rules and asks the LLM only for
+# the semantic signals, "keywords" skips the LLM entirely
+SIGNAL_MODES = ("llm", "hybrid", "keywords")
+
+# Columns that make up the claim information block sent to the LLM
+PROMPT_COLUMNS = [
+    "free_text_summary",
+    "handler_notes",
+    "historical_outcome",
+    "attachments_present",
+]
+
+# Distinct claims whose signals are remembered across chunks, so a claim
+# repeated in a later chunk is not extracted again (~1 KB of signals each)
+DEDUP_MEMO_ENTRIES = 100_000
+
+# Invalid rows logged individually per chunk; the rest are summarised (all
+# of them are listed in the data report)
+ROW_ERROR_LOG_LIMIT = 20
+
 class EmptyDatasetError(ValueError):
     """Raised when input dataset is empty or fully invalid."""
     pass
@@ -59,10 +112,89 @@ class ClaimInput(BaseModel):
     
 
 
+@lru_cache(maxsize=None)
+def _field_adapter(field: str) -> TypeAdapter:
+    return TypeAdapter(ClaimInput.model_fields[field].annotation)
+
+
+@lru_cache(maxsize=None)
+def _missing_field_error(field: str) -> dict:
+    try:
+        ClaimInput.model_validate({})
+    except ValidationError as e:
+        return next(err for err in e.errors() if err["loc"] == (field,))
+
+
+def _cell_errors(field: str, value) -> list[dict]:
+    """The pydantic errors ClaimInput would report for ``value`` in ``field``."""
+    try:
+        _field_adapter(field).validate_python(value)
+    except ValidationError as e:
+        return [{**err, "loc": (field, *err["loc"])} for err in e.errors()]
+    return []
+
+
+def validate_columns(df: pd.DataFrame) -> tuple[pd.Series, dict]:
+    """
+    Columnar equivalent of building a ClaimInput per row.
+
+    Enum fields are checked with vectorised membership tests and string
+    fields with a vectorised type test. Pydantic is only consulted for the
+    failing cells, to produce the exact error dicts ClaimInput would raise.
+
+    Returns:
+        A boolean mask of valid rows, and row index -> list of errors for
+        the invalid rows (in frame order, errors in field order).
+    """
+    bad_cells = {}
+
+    for field, info in ClaimInput.model_fields.items():
+        if field not in df.columns:
+            bad_cells[field] = pd.Series(True, index=df.index)
+            continue
+
+        column = df[field]
+        if isinstance(info.annotation, type) and issubclass(info.annotation, Enum):
+            ok = column.isin([member.value for member in info.annotation])
+        elif column.dtype == object:
+            # .str yields NaN for anything that is not a string
+            ok = column.str.len().notna()
+        else:
+            ok = pd.Series(False, index=df.index)
+        bad_cells[field] = ~ok
+
+    bad = pd.DataFrame(bad_cells, index=df.index)
+    valid = ~bad.any(axis=1)
+
+    row_errors = {}
+    for idx in df.index[~valid.to_numpy()]:
+        errors = []
+        for field in ClaimInput.model_fields:
+            if not bad.at[idx, field]:
+                continue
+            if field not in df.columns:
+                errors.append(_missing_field_error(field))
+            else:
+                errors.extend(_cell_errors(field, df.at[idx, field]))
+        row_errors[idx] = errors
+
+    return valid, row_errors
+
+
 def validate_and_clean_csv(input_path: str) -> pd.DataFrame:
-    logger.info("Starting CSV validation | path=%s", input_path)
+    clean_df, _ = validate_and_report(input_path)
+    return clean_df
+
 
-    report = {
+def validate_and_report(input_path: str) -> tuple[pd.DataFrame, dict]:
+    """Validate the input CSV and return the clean frame with its data report."""
+    report = new_data_report(input_path)
+    chunks = list(iter_validated_chunks(input_path, report))
+    return pd.concat(chunks, ignore_index=True), report
+
+
+def new_data_report(input_path: str) -> dict:
+    return {
         "input_path": str(input_path),
         "rows_loaded": 0,
         "rows_after_caseid_filter": 0,
@@ -71,27 +203,115 @@ def validate_and_clean_csv(input_path: str) -> pd.DataFrame:
         "anomalies": [],
     }
 
+
+def iter_validated_chunks(
+    input_path: str,
+    report: dict,
+    chunk_rows: int | None = None,
+    report_dir: str = "outputs",
+    workers: int = 1,
+):
+    """
+    Read, normalise and validate the input CSV, yielding clean frames.
+
+    With ``chunk_rows`` the file is streamed in fixed-size chunks so memory
+    stays bounded by the chunk size; otherwise the whole file is one chunk.
+    With ``workers`` > 1 each chunk is validated in shards across processes.
+    ``report`` accumulates missingness and anomaly statistics across chunks
+    and is finalised and written once the input is exhausted.
+    """
+    logger.info("Starting CSV validation | path=%s | chunk_rows=%s", input_path, chunk_rows)
+
     # ---------------- Load ----------------
     try:
-        df = pd.read_csv(input_path)
-        logger.info("CSV loaded | rows=%d | cols=%d", *df.shape)
+        start = time.perf_counter()
+        if chunk_rows:
+            reader = pd.read_csv(input_path, chunksize=chunk_rows)
+        else:
+            reader = [pd.read_csv(input_path)]
+        # The whole read when not chunked; chunked readers parse lazily below
+        opened = time.perf_counter() - start
     except pd.errors.EmptyDataError:
         logger.error("CSV validation failed: file is empty | path=%s", input_path)
         raise EmptyDatasetError("CSV file is empty")
 
-    if df.empty:
+    missing_counts = {}
+    dropped_caseid = 0
+    schema_anomalies = []
+    valid_rows = 0
+
+    chunks = iter(reader)
+    while True:
+        start = time.perf_counter()
+        df = next(chunks, None)
+        if df is None:
+            break
+        metrics.record_span("load_csv", time.perf_counter() - start + opened, len(df))
+        opened = 0.0
+
+        logger.info("CSV chunk loaded | rows=%d | cols=%d", *df.shape)
+        loaded = len(df)
+        report["rows_loaded"] += loaded
+
+        with metrics.span("validate", rows=loaded):
+            # ---------------- Missingness (pre-clean) ----------------
+            for col in df.columns:
+                missing_counts[col] = missing_counts.get(col, 0) + int(df[col].isna().sum())
+
+            shards = map_shards(_clean_chunk, df, workers)
+            clean_df = concat_shards([shard[0] for shard in shards], ignore_index=True)
+        dropped = sum(shard[1] for shard in shards)
+        anomalies = [a for shard in shards for a in shard[2]]
+        dropped_caseid += dropped
+        schema_anomalies.extend(anomalies)
+        report["rows_after_caseid_filter"] += loaded - dropped
+        report["invalid_rows"] += len(anomalies)
+        valid_rows += len(clean_df)
+
+        if not clean_df.empty:
+            yield clean_df
+
+    if report["rows_loaded"] == 0:
         logger.error("Input CSV has header but no rows | path=%s", input_path)
         raise EmptyDatasetError("Input dataset is empty")
 
-    report["rows_loaded"] = len(df)
-
-    # ---------------- Missingness (pre-clean) ----------------
-    for col in df.columns:
-        missing_count = int(df[col].isna().sum())
-        report["missingness"][col] = {
-            "missing_count": missing_count,
-            "missing_pct": round(missing_count / len(df), 3),
+    report["missingness"] = {
+        col: {
+            "missing_count": count,
+            "missing_pct": round(count / report["rows_loaded"], 3),
         }
+        for col, count in missing_counts.items()
+    }
+
+    if dropped_caseid > 0:
+        report["anomalies"].append(
+            {
+                "type": "missing_case_id",
+                "rows_dropped": dropped_caseid,
+            }
+        )
+    report["anomalies"].extend(schema_anomalies)
+
+    if valid_rows == 0:
+        logger.critical(
+            "All rows invalid | total_rows=%d | invalid_rows=%d",
+            report["rows_after_caseid_filter"],
+            report["invalid_rows"],
+        )
+        raise EmptyDatasetError("All rows failed validation")
+
+    logger.info(
+        "Validation complete | valid_rows=%d | invalid_rows=%d",
+        valid_rows,
+        report["invalid_rows"],
+    )
+
+    # ---------------- Write reports ----------------
+    write_data_report(report, report_dir)
+
+
+def _clean_chunk(df: pd.DataFrame) -> tuple[pd.DataFrame, int, list]:
+    """Normalise and validate one chunk; returns (clean rows, rows dropped for case_id, anomalies)."""
 
     # ---------------- Normalisation ----------------
     if "received_at" in df.columns:
@@ -110,66 +330,44 @@ def validate_and_clean_csv(input_path: str) -> pd.DataFrame:
     df.dropna(subset=["case_id"], inplace=True)
     dropped_caseid = before - len(df)
 
-    if dropped_caseid > 0:
-        report["anomalies"].append(
-            {
-                "type": "missing_case_id",
-                "rows_dropped": dropped_caseid,
-            }
-        )
-
-    report["rows_after_caseid_filter"] = len(df)
-
     # ---------------- Boolean normalisation ----------------
     df["attachments_present"] = df["attachments_present"].apply(
         lambda x: "Yes" if bool(x) else "No"
     )
 
-    validated_rows = []
-    invalid_rows = 0
+    # ---------------- Columnar validation ----------------
+    valid, row_errors = validate_columns(df)
 
-    # ---------------- Row validation ----------------
-    for idx, row in df.iterrows():
-        try:
-            validated = ClaimInput(**row.to_dict())
-            validated_rows.append(validated.model_dump())
-        except ValidationError as e:
-            invalid_rows += 1
-            report["anomalies"].append(
-                {
-                    "type": "schema_validation_error",
-                    "row_index": int(idx),
-                    "case_id": row.get("case_id"),
-                    "errors": e.errors(),
-                }
-            )
+    anomalies = []
+    case_ids = df["case_id"]
+    for idx, errors in row_errors.items():
+        anomalies.append(
+            {
+                "type": "schema_validation_error",
+                "row_index": int(idx),
+                "case_id": case_ids.get(idx),
+                "errors": errors,
+            }
+        )
+        if len(anomalies) <= ROW_ERROR_LOG_LIMIT:
             logger.error(
                 "Row validation failed | row=%d | case_id=%s",
                 idx,
-                row.get("case_id"),
+                case_ids.get(idx),
             )
-
-    report["invalid_rows"] = invalid_rows
-
-    if not validated_rows:
-        logger.critical(
-            "All rows invalid | total_rows=%d | invalid_rows=%d",
-            len(df),
-            invalid_rows,
+    if len(anomalies) > ROW_ERROR_LOG_LIMIT:
+        logger.error(
+            "Row validation failed for %d more rows; see the data report",
+            len(anomalies) - ROW_ERROR_LOG_LIMIT,
         )
-        raise EmptyDatasetError("All rows failed validation")
 
-    clean_df = pd.DataFrame(validated_rows)
+    clean_df = df.loc[valid, list(ClaimInput.model_fields)].reset_index(drop=True)
+    return encode_claims(clean_df), dropped_caseid, anomalies
 
-    logger.info(
-        "Validation complete | valid_rows=%d | invalid_rows=%d",
-        len(clean_df),
-        invalid_rows,
-    )
 
-    # ---------------- Write reports ----------------
-    output_dir = Path("outputs")
-    output_dir.mkdir(exist_ok=True)
+def write_data_report(report: dict, output_dir: str = "outputs") -> None:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     json_path = output_dir / "data_report.json"
     md_path = output_dir / "data_report.md"
@@ -179,7 +377,7 @@ def validate_and_clean_csv(input_path: str) -> pd.DataFrame:
 
     with open(md_path, "w") as f:
         f.write("# Data Quality Report\n\n")
-        f.write(f"**Input file:** `{input_path}`\n\n")
+        f.write(f"**Input file:** `{report['input_path']}`\n\n")
         f.write("## Summary\n")
         f.write(f"- Rows loaded: {report['rows_loaded']}\n")
         f.write(f"- Rows after case_id filter: {report['rows_after_caseid_filter']}\n")
@@ -199,115 +397,711 @@ def validate_and_clean_csv(input_path: str) -> pd.DataFrame:
         else:
             f.write("\n## Anomalies\n- None detected\n")
 
-    logger.info("Data quality report written | path=%s", md_path)
+        if "llm_dedup" in report:
+            dedup = report["llm_dedup"]
+            f.write("\n## LLM Prompt Deduplication\n")
+            f.write(f"- Rows: {dedup['rows']}\n")
+            f.write(f"- Unique prompts: {dedup['unique_prompts']}\n")
+            f.write(f"- Dedup ratio (rows per unique prompt): {dedup['dedup_ratio']:.2f}\n")
+            f.write(f"- LLM calls saved: {dedup['calls_saved_pct'] * 100:.1f}%\n")
+            if dedup.get("memo_groups"):
+                f.write(f"- Claim groups reused from earlier chunks: {dedup['memo_groups']}\n")
+            if dedup.get("rows_resumed"):
+                f.write(f"- Rows resumed from checkpoint: {dedup['rows_resumed']}\n")
+            if dedup.get("budget_fallback_rows"):
+                f.write(
+                    f"- Rows scored from keyword signals (token budget spent): "
+                    f"{dedup['budget_fallback_rows']}\n"
+                )
 
-    return clean_df
+        if "incremental" in report:
+            inc = report["incremental"]
+            f.write("\n## Incremental Run\n")
+            f.write(f"- Valid rows in input: {inc['rows']}\n")
+            f.write(f"- New or changed rows processed: {inc['changed_rows']}\n")
+            f.write(f"- Unchanged rows reused from state: {inc['unchanged_rows']}\n")
 
+        if "token_usage" in report:
+            usage = report["token_usage"]
+            f.write("\n## LLM Token Usage\n")
+            f.write(f"- Calls: {usage['calls']}\n")
+            f.write(f"- Prompt tokens: {usage['prompt_tokens']}\n")
+            f.write(f"- Completion tokens: {usage['completion_tokens']}\n")
+            if usage["estimated_tokens"] is not None:
+                f.write(f"- Pre-flight estimate: {usage['estimated_tokens']}\n")
+            if usage["max_tokens_budget"] is not None:
+                f.write(
+                    f"- Budget: {usage['max_tokens_budget']} "
+                    f"({'exhausted' if usage['budget_exhausted'] else 'not reached'})\n"
+                )
+            if usage["cost_usd"] is not None:
+                f.write(f"- Estimated cost: ${usage['cost_usd']:.4f}\n")
 
+    logger.info("Data quality report written | path=%s", md_path)
 
 
-def preprocess_getstructrureddata(path: str) -> None:    
-    
-    logger.info("========== Preprocessing & LLM extraction started ==========")
+def format_claim(records: pd.DataFrame, i: int) -> str:
+    """Render the claim information block sent to the LLM for row ``i``."""
+    return (
+        f"caseid:{records['case_id'].loc[i]}; "
+        f"Summary: {records['free_text_summary'].loc[i]}; "
+        f"handler_notes: {records['handler_notes'].loc[i]}; "
+        f"historical outcome: {records['historical_outcome'].loc[i]}; "
+        f"has attachment: {records['attachments_present'].loc[i]}"
+    )
 
-    # -------------------------------------------------
-    # Send the  input records for cleaning
-    # -------------------------------------------------
 
-    records=validate_and_clean_csv(path)
-    
-    # -------------------------------------------------
-    # Initialize LLM
-    # -------------------------------------------------
-    llm = GetFromLlm()
-    logger.info("LLM client initialized")
+def _packs(n: int, size: int) -> list[list[int]]:
+    size = max(size, 1)
+    return [list(range(start, min(start + size, n))) for start in range(0, n, size)]
 
-    col_data = []
-    batch_index = 0
 
-    # -------------------------------------------------
-    # LLM extraction loop
-    # -------------------------------------------------
-    #Create the path if not aviaable -for pytest
-    Path("data/llmdata").mkdir(parents=True, exist_ok=True)
-    for i in range(len(records)):
-        logger.info(f"Executing row {i}")
-        input_data = (
-            f"caseid:{records['case_id'].loc[i]}; "
-            f"Summary: {records['free_text_summary'].loc[i]}; "
-            f"handler_notes: {records['handler_notes'].loc[i]}; "
-            f"historical outcome: {records['historical_outcome'].loc[i]}; "
-            f"has attachment: {records['attachments_present'].loc[i]}"
-        )
+async def aextract_signals(
+    llm: GetFromLlm,
+    inputs: list[str],
+    concurrency: int,
+    on_result=None,
+    claims_per_call: int = 1,
+    case_ids: list[str] | None = None,
+    progress: ProgressLogger | None = None,
+) -> list:
+    """
+    Run LLM extraction for every input with at most ``concurrency`` requests
+    in flight. Results are returned in input order; a failed row yields None
+    without affecting the others. ``on_result(i, data)`` is called as soon as
+    each row succeeds. With ``claims_per_call`` > 1 each request packs that
+    many claims, matched back to rows through ``case_ids``.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    results = [None] * len(inputs)
 
+    async def extract_pack(pack: list[int]):
         try:
-            data = llm.generate_details(input_data)
-            col_data.append(data)
+            await run_pack(pack)
+        finally:
+            if progress is not None:
+                progress.update(len(pack))
+
+    async def run_pack(pack: list[int]):
+        async with semaphore:
+            logger.debug("Executing rows %d-%d", pack[0], pack[-1])
+            try:
+                if claims_per_call > 1:
+                    found = await llm.agenerate_details_batch(
+                        [(case_ids[i], inputs[i]) for i in pack]
+                    )
+                    pack_results = [found.get(case_ids[i]) for i in pack]
+                else:
+                    pack_results = [await llm.agenerate_details(inputs[pack[0]])]
+            except TokenBudgetExceeded:
+                logger.debug("Token budget spent; skipping rows %d-%d", pack[0], pack[-1])
+                return
+            except Exception:
+                logger.error(
+                    "LLM extraction failed | rows=%d-%d",
+                    pack[0],
+                    pack[-1],
+                    exc_info=True,
+                )
+                return
+        _collect(pack, pack_results, results, on_result)
+
+    await asyncio.gather(*(extract_pack(pack) for pack in _packs(len(inputs), claims_per_call)))
+    return results
+
+
+def _collect(pack: list[int], pack_results: list, results: list, on_result) -> None:
+    for i, data in zip(pack, pack_results):
+        results[i] = data
+        if data is not None and on_result is not None:
+            on_result(i, data)
+    logger.debug("rows %d-%d execution completed", pack[0], pack[-1])
+
+
+class DedupMemo:
+    """
+    Bounded LRU map from the normalised prompt content of a claim to the
+    signals extracted for it. Shared by the chunks of a run, so chunked and
+    unchunked runs extract each distinct claim once.
+    """
+
+    def __init__(self, max_entries: int = DEDUP_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def keys(normalised: pd.DataFrame, rows) -> list[bytes]:
+        """16-byte digest of the normalised prompt columns of each of ``rows``."""
+        values = normalised.iloc[list(rows)][PROMPT_COLUMNS].itertuples(index=False, name=None)
+        return [hashlib.blake2b("\x1f".join(v).encode(), digest_size=16).digest() for v in values]
+
+    def get(self, key: bytes):
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: bytes, data) -> None:
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalise_prompt_columns(records: pd.DataFrame) -> pd.DataFrame:
+    """The prompt columns with whitespace collapsed and case folded."""
+    return pd.DataFrame(
+        {
+            col: records[col]
+            .astype(str)
+            .str.strip()
+            .str.replace(r"\s+", " ", regex=True)
+            .str.casefold()
+            for col in PROMPT_COLUMNS
+        },
+        index=records.index,
+    )
+
+
+def group_duplicate_claims(records: pd.DataFrame, normalised: pd.DataFrame | None = None) -> pd.Series:
+    """
+    Assign a group id to every row so that rows whose prompt content
+    (summary, handler notes, historical outcome, attachments) is identical
+    after whitespace/case normalisation share an id. Ids follow first
+    appearance order.
+    """
+    if normalised is None:
+        normalised = normalise_prompt_columns(records)
+    return normalised.groupby(PROMPT_COLUMNS, sort=False).ngroup()
+
+
+def extract_signals_deduplicated(
+    llm: GetFromLlm,
+    records: pd.DataFrame,
+    concurrency: int = 1,
+    on_result=None,
+    claims_per_call: int = 1,
+    signal_mode: str = "llm",
+    usage: TokenLedger | None = None,
+    loop: asyncio.AbstractEventLoop | None = None,
+    memo: DedupMemo | None = None,
+) -> tuple[list, dict]:
+    """
+    Call the LLM once per group of identical claims and fan each result out
+    to every case_id in the group. Returns the per-row results (None where
+    extraction failed) and dedup statistics for the data report.
+    ``on_result(signals)`` is called for every row as its group completes.
+    In "hybrid" and "keywords" modes the operational flags come from
+    triage.keywords; ``llm`` may be None in "keywords" mode.
+
+    ``loop`` is passed on to extract_signals. Groups found in ``memo``
+    (filled by earlier chunks) reuse its signals instead of being extracted.
+
+    Once the token budget of ``usage`` is spent, claims left without signals get
+    keyword-only signals instead. Those are not passed to ``on_result``, so
+    they are not checkpointed and a resumed run extracts them properly.
+    """
+    normalised = normalise_prompt_columns(records)
+    group_ids = group_duplicate_claims(records, normalised).to_numpy()
+    representatives = pd.Series(range(len(records))).groupby(group_ids, sort=True).first()
+
+    keys, remembered = None, {}
+    if memo is not None:
+        keys = memo.keys(normalised, representatives)
+        for group, key in enumerate(keys):
+            data = memo.get(key)
+            if data is not None:
+                remembered[group] = data
+    todo = [group for group in range(len(representatives)) if group not in remembered]
+
+    logger.info(
+        "Claim deduplication | rows=%d | unique_prompts=%d | from_earlier_chunks=%d",
+        len(records),
+        len(todo),
+        len(remembered),
+    )
+
+    members: dict[int, list[int]] = {}
+    for i, group in enumerate(group_ids):
+        members.setdefault(int(group), []).append(i)
+
+    case_ids = records["case_id"].tolist()
+    results = [None] * len(records)
 
-            logger.debug(
-                "Row %d sent to LLM | case_id=%s",
-                i,
-                records['case_id'].loc[i],
+    flags = {}
+    if signal_mode != "llm":
+        with metrics.span("keyword_flags", rows=len(representatives)):
+            summaries = records["free_text_summary"].tolist()
+            notes = records["handler_notes"].tolist()
+            flags = {
+                group: extract_operational_flags(claim_text(summaries[i], notes[i]))
+                for group, i in enumerate(representatives)
+            }
+
+    def fan_out(group: int, data, fallback: bool = False) -> None:
+        if memo is not None and not fallback:
+            memo.put(keys[group], data)
+        if signal_mode == "hybrid" and not fallback:
+            data = combine_signals(data, flags[group])
+        for i in members[group]:
+            row = data
+            if row.case_id != case_ids[i]:
+                row = row.model_copy(update={"case_id": case_ids[i]})
+            results[i] = row
+            if on_result is not None and not fallback:
+                on_result(row)
+
+    with metrics.span("extract", rows=len(records)):
+        for group, data in remembered.items():
+            fan_out(group, data)
+        if signal_mode == "keywords":
+            for group in todo:
+                i = representatives[group]
+                fan_out(group, keyword_only_signals(case_ids[i], flags[group]))
+        else:
+            inputs = [format_claim(records, representatives[group]) for group in todo]
+            extract_signals(
+                llm,
+                inputs,
+                concurrency=concurrency,
+                on_result=lambda k, data: fan_out(todo[k], data),
+                claims_per_call=claims_per_call,
+                case_ids=[case_ids[representatives[group]] for group in todo],
+                loop=loop,
+            )
+
+    budget_fallback = 0
+    if usage is not None and usage.exhausted:
+        summaries = records["free_text_summary"].tolist()
+        notes = records["handler_notes"].tolist()
+        for group, i in enumerate(representatives):
+            if results[i] is None:
+                if group not in flags:
+                    flags[group] = extract_operational_flags(claim_text(summaries[i], notes[i]))
+                fan_out(group, keyword_only_signals(case_ids[i], flags[group]), fallback=True)
+                budget_fallback += len(members[group])
+        logger.info("Token budget spent; keyword signals used | rows=%d", budget_fallback)
+        metrics.increment("budget_fallback_rows", budget_fallback)
+
+    rows, unique = len(records), len(todo)
+    metrics.increment("unique_prompts", unique)
+    metrics.increment("extraction_failures", sum(r is None for r in results))
+    stats = {
+        "rows": rows,
+        "unique_prompts": unique,
+        "dedup_ratio": round(rows / unique, 3) if unique else 0.0,
+        "calls_saved_pct": round(1 - unique / rows, 3) if rows else 0.0,
+        "budget_fallback_rows": budget_fallback,
+        "memo_groups": len(remembered),
+    }
+    return results, stats
+
+
+def extract_signals(
+    llm: GetFromLlm,
+    inputs: list[str],
+    concurrency: int = 1,
+    on_result=None,
+    claims_per_call: int = 1,
+    case_ids: list[str] | None = None,
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> list:
+    """
+    Extract risk signals for every input, sequentially or through the async
+    driver when ``concurrency`` > 1. Failed rows are returned as None.
+
+    The async driver runs on ``loop`` (running in another thread) when
+    given, else on a fresh event loop.
+    """
+    if claims_per_call > 1 and case_ids is None:
+        raise ValueError("case_ids are required when packing several claims per call")
+
+    # One progress summary every few seconds instead of a line per row
+    progress = ProgressLogger(logger, "LLM extraction", total=len(inputs))
+    try:
+        if concurrency > 1:
+            logger.info("Running concurrent LLM extraction | concurrency=%d", concurrency)
+            driver = aextract_signals(
+                llm, inputs, concurrency, on_result, claims_per_call, case_ids, progress
             )
+            if loop is not None:
+                return asyncio.run_coroutine_threadsafe(driver, loop).result()
+            return asyncio.run(driver)
+        return _extract_sequential(llm, inputs, on_result, claims_per_call, case_ids, progress)
+    finally:
+        progress.close()
 
+
+def _extract_sequential(llm, inputs, on_result, claims_per_call, case_ids, progress) -> list:
+    results = [None] * len(inputs)
+    for pack in _packs(len(inputs), claims_per_call):
+        logger.debug("Executing rows %d-%d", pack[0], pack[-1])
+        try:
+            if claims_per_call > 1:
+                found = llm.generate_details_batch([(case_ids[i], inputs[i]) for i in pack])
+                pack_results = [found.get(case_ids[i]) for i in pack]
+            else:
+                pack_results = [llm.generate_details(inputs[pack[0]])]
+        except TokenBudgetExceeded:
+            logger.info("Token budget spent; skipping rows %d-%d", pack[0], len(inputs) - 1)
+            break
         except Exception:
             logger.error(
-                "LLM extraction failed | row=%d | case_id=%s",
-                i,
-                records['case_id'].loc[i],
+                "LLM extraction failed | rows=%d-%d",
+                pack[0],
+                pack[-1],
                 exc_info=True,
             )
             continue
+        finally:
+            progress.update(len(pack))
+        _collect(pack, pack_results, results, on_result)
+    return results
 
-        # -------------------------------------------------
-        # Batch save (every 500 rows or last row)
-        # -------------------------------------------------
-        if (i % 500 == 0 and i != 0) or (i + 1 == len(records)):
-            batch_index += 1
 
-            try:
-                df = pd.DataFrame([r.model_dump() for r in col_data])
-                output_path = f"data/llmdata/llm_out{batch_index}.csv"
-                df.to_csv(output_path, index=False)
-
-                logger.info(
-                    "LLM batch saved | batch=%d | rows=%d | path=%s",
-                    batch_index,
-                    len(df),
-                    output_path,
-                )
+class LlmBatchWriter:
+    """
+    Writes extracted signals to data/llmdata/llm_out{n}.<format> as rows
+    arrive, flushing every 500 input rows so memory stays bounded. The
+    manifest is emptied on start and lists this run's batches on close(),
+    so batch files left over from earlier runs are never picked up.
+    """
 
-            except Exception:
-                logger.error(
-                    "Failed to write LLM batch %d to disk",
-                    batch_index,
-                    exc_info=True,
-                )
-                raise
+    def __init__(
+        self,
+        output_dir: str = "data/llmdata",
+        batch_size: int = 500,
+        storage_format: str = DEFAULT_STORAGE_FORMAT,
+    ):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.storage_format = storage_format
+        self.batch_index = 0
+        self.batches = []
+        self._rows = []
+        write_manifest(self.output_dir, self.batches, self.storage_format)
 
-            col_data = []
-        logger.info(f"row {i} execution completed")
+    def add(self, position: int, data) -> None:
+        """Buffer the signals of the row at global ``position`` (None if extraction failed)."""
+        if data is not None:
+            self._rows.append(data)
+        if position % self.batch_size == 0 and position != 0:
+            self.flush()
 
-    logger.info("LLM extraction completed successfully")
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        self.batch_index += 1
+
+        try:
+            df = pd.DataFrame([r.model_dump() for r in self._rows])
+            output_path = write_table(
+                df,
+                self.output_dir / f"llm_out{self.batch_index}",
+                self.storage_format,
+                categorical=enum_fields(ClaimRiskSignals),
+            )
+            self.batches.append(batch_entry(output_path, df))
+
+            logger.info(
+                "LLM batch saved | batch=%d | rows=%d | path=%s",
+                self.batch_index,
+                len(df),
+                output_path,
+            )
+
+        except Exception:
+            logger.error(
+                "Failed to write LLM batch %d to disk",
+                self.batch_index,
+                exc_info=True,
+            )
+            raise
+
+        self._rows = []
+
+    def close(self) -> None:
+        """Flush the last batch and write the manifest."""
+        self.flush()
+        path = write_manifest(self.output_dir, self.batches, self.storage_format)
+        logger.info("LLM batch manifest written | batches=%d | path=%s", len(self.batches), path)
+
+
+def estimate_extraction_tokens(
+    llm: GetFromLlm,
+    input_path: str,
+    chunk_rows: int | None = None,
+    claims_per_call: int = 1,
+    skip_case_ids=(),
+) -> dict:
+    """
+    Pre-flight estimate of the tokens LLM extraction of ``input_path`` will
+    take, before any request is sent. The file is streamed with the same
+    chunking and deduplication (within and across chunks) as the run itself, with only the
+    normalisation the prompt needs; rows in ``skip_case_ids`` (already
+    extracted) are left out. Cache hits are not predicted, so this is an
+    upper bound for warm caches.
+    """
+    columns = {"case_id", *PROMPT_COLUMNS}
+    if chunk_rows:
+        reader = pd.read_csv(input_path, usecols=lambda c: c in columns, chunksize=chunk_rows)
+    else:
+        reader = [pd.read_csv(input_path, usecols=lambda c: c in columns)]
+
+    skip = set(skip_case_ids)
+    size = max(claims_per_call, 1)
+    seen = DedupMemo()
+    rows = unique = calls = tokens = 0
+    for df in reader:
+        df = df.dropna(subset=["case_id"])
+        df = df[~df["case_id"].isin(skip)].reset_index(drop=True)
+        df["handler_notes"] = df["handler_notes"].fillna("No data Available")
+        df["historical_outcome"] = df["historical_outcome"].fillna("Unknown")
+        df["attachments_present"] = (
+            df["attachments_present"].fillna(False).apply(lambda x: "Yes" if bool(x) else "No")
+        )
+
+        normalised = normalise_prompt_columns(df)
+        representatives = pd.Series(range(len(df))).groupby(
+            group_duplicate_claims(df, normalised).to_numpy(), sort=True
+        ).first()
+        inputs = []
+        for i, key in zip(representatives, seen.keys(normalised, representatives)):
+            if seen.get(key) is None:
+                seen.put(key, True)
+                inputs.append(format_claim(df, i))
+        rows += len(df)
+        unique += len(inputs)
+        calls += -(-len(inputs) // size)
+        tokens += llm.estimate_request_tokens(inputs, size)
+
+    return {"rows": rows, "unique_prompts": unique, "calls": calls, "estimated_tokens": tokens}
 
- 
-    # Drop unused columns
-    df.drop(
-        ["free_text_summary", "handler_notes"],
-        axis=1,
-        inplace=True,
-        errors="ignore",
+
+def preprocess_getstructrureddata(
+    path: str,
+    llm_concurrency: int = 1,
+    cache: LLMResponseCache | None = None,
+    resume: bool = False,
+    claims_per_call: int = 1,
+    signal_mode: str = "llm",
+    chunk_rows: int | None = None,
+    journal_path: str | None = None,
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    persist: bool = True,
+    data_dir: str = "data",
+    report_dir: str = "outputs",
+    workers: int = 1,
+    scheduler: RateLimitScheduler | None = None,
+    llm_backend: str | None = None,
+    max_tokens_budget: int | None = None,
+    state: IncrementalState | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    """
+    Validate the input and extract signals for every claim.
+
+    With ``persist`` the preprocessed records and signal batches are written
+    under ``data_dir`` chunk by chunk and nothing is returned, so memory stays
+    bounded. Without it nothing is written and the (records, signals) frames
+    are returned for the next stage to use in memory.
+
+    LLM token usage is written to ``report_dir``/token_usage.json (the
+    pre-flight estimate only when there is a budget). Once
+    ``max_tokens_budget`` tokens are spent extraction stops, and the rows
+    still without signals are scored from keyword signals.
+
+    With an incremental ``state`` only records that are new or changed since
+    the last run go through extraction and on to the later stages.
+    """
+
+    logger.info("========== Preprocessing & LLM extraction started ==========")
+
+    # -------------------------------------------------
+    # Initialize LLM (not needed for keyword-only signals)
+    # -------------------------------------------------
+    if signal_mode not in SIGNAL_MODES:
+        raise ValueError(f"Unknown signal_mode {signal_mode!r}; expected one of {SIGNAL_MODES}")
+
+    llm = usage = None
+    if signal_mode != "keywords":
+        usage = TokenLedger(max_tokens_budget, output_dir=report_dir)
+        llm = GetFromLlm(
+            cache=cache,
+            semantic_only=signal_mode == "hybrid",
+            scheduler=scheduler,
+            backend=llm_backend,
+            usage=usage,
+        )
+        logger.info("LLM client initialized | cache=%s", cache.path if cache else None)
+
+    # -------------------------------------------------
+    # Checkpoint journal (skip rows already extracted on resume)
+    # -------------------------------------------------
+    data_dir = Path(data_dir)
+    journal = ExtractionJournal(
+        journal_path or data_dir / SIGNALS_DIR / "extraction_journal.jsonl",
+        resume=resume,
     )
+    done = journal.load() if resume else {}
 
     # -------------------------------------------------
-    # Save preprocessed dataset
+    # Pre-flight token estimate (before any request is sent; it reads the
+    # input once more, so only when there is a budget to check it against)
     # -------------------------------------------------
-    Path("data/pre-processeddata").mkdir(parents=True, exist_ok=True)
-    output_path = "data/pre-processeddata/preprocessed_data.csv"
-    records.to_csv(output_path, index=False)
+    if llm is not None and max_tokens_budget is not None:
+        estimate = estimate_extraction_tokens(llm, path, chunk_rows, claims_per_call, done)
+        usage.estimated_tokens = estimate["estimated_tokens"]
+        logger.info("Token estimate | %s | budget=%s", estimate, max_tokens_budget)
+        if estimate["estimated_tokens"] > max_tokens_budget:
+            logger.warning(
+                "Estimated tokens exceed the budget; extraction will stop early | "
+                "estimated=%d | budget=%d",
+                estimate["estimated_tokens"],
+                max_tokens_budget,
+            )
+
+    if persist:
+        writer = LlmBatchWriter(data_dir / SIGNALS_DIR, storage_format=storage_format)
+        records_writer = TableWriter(
+            data_dir / PREPROCESSED_TABLE,
+            storage_format,
+            categorical=enum_fields(ClaimInput),
+        )
+        output_path = records_writer.path
+    else:
+        record_chunks, signal_rows = [], []
+        output_path = "memory"
+
+    report = new_data_report(path)
+    dedup_stats = {
+        "rows": 0,
+        "unique_prompts": 0,
+        "rows_resumed": 0,
+        "budget_fallback_rows": 0,
+        "memo_groups": 0,
+    }
+    memo = DedupMemo()
+    position = 0
+
+    # -------------------------------------------------
+    # Send the input records for cleaning, then extract chunk by chunk
+    # -------------------------------------------------
+    try:
+        chunks = iter_validated_chunks(path, report, chunk_rows, report_dir, workers)
+        for chunk_index, records in enumerate(chunks):
+            if state is not None:
+                records = state.changed(records)
+            pending = records[~records["case_id"].isin(list(done))].reset_index(drop=True)
+            logger.info(
+                "Extraction plan | chunk=%d | rows=%d | already_extracted=%d | pending=%d",
+                chunk_index,
+                len(records),
+                len(records) - len(pending),
+                len(pending),
+            )
+
+            # -------------------------------------------------
+            # LLM extraction
+            # -------------------------------------------------
+            # Rows with real signals (not failed or budget fallback); only
+            # these are final for the incremental state
+            confirmed = set(done).intersection(records["case_id"]) if state is not None else set()
+
+            def on_extracted(row, confirmed=confirmed):
+                if state is not None:
+                    confirmed.add(row.case_id)
+                journal.append(row)
+
+            pending_results, chunk_stats = extract_signals_deduplicated(
+                llm,
+                pending,
+                concurrency=llm_concurrency,
+                on_result=on_extracted,
+                claims_per_call=claims_per_call,
+                signal_mode=signal_mode,
+                usage=usage,
+                memo=memo,
+            )
+            dedup_stats["memo_groups"] += chunk_stats["memo_groups"]
+            dedup_stats["rows"] += chunk_stats["rows"]
+            dedup_stats["unique_prompts"] += chunk_stats["unique_prompts"]
+            dedup_stats["rows_resumed"] += len(records) - len(pending)
+            dedup_stats["budget_fallback_rows"] += chunk_stats["budget_fallback_rows"]
+
+            extracted = {r.case_id: r for r in pending_results if r is not None}
+
+            with metrics.span("store_intermediates", rows=len(records)):
+                # -------------------------------------------------
+                # Batch save (every 500 rows and at the end)
+                # -------------------------------------------------
+                for case_id in records["case_id"]:
+                    data = extracted.get(case_id) or done.get(case_id)
+                    if state is not None and case_id in confirmed:
+                        state.stage_signals(case_id, data)
+                    if usage is not None:
+                        usage.assign_row(position, case_id)
+                    if persist:
+                        writer.add(position, data)
+                    elif data is not None:
+                        signal_rows.append(data.model_dump())
+                    position += 1
+
+                # -------------------------------------------------
+                # Save preprocessed dataset
+                # -------------------------------------------------
+                if persist:
+                    records_writer.write(records)
+                else:
+                    record_chunks.append(records)
+        if persist:
+            with metrics.span("store_intermediates"):
+                writer.close()
+    finally:
+        if persist:
+            records_writer.close()
+        if usage is not None:
+            usage.close()
+        journal.close()
+
+    logger.info("LLM extraction completed successfully")
+
+    rows, unique = dedup_stats["rows"], dedup_stats["unique_prompts"]
+    dedup_stats["dedup_ratio"] = round(rows / unique, 3) if unique else 0.0
+    dedup_stats["calls_saved_pct"] = round(1 - unique / rows, 3) if rows else 0.0
+    report["llm_dedup"] = dedup_stats
+    if state is not None:
+        report["incremental"] = state.stats()
+    if usage is not None:
+        report["token_usage"] = usage.summary()
+        logger.info("LLM token usage | %s", report["token_usage"])
+        usage.write(report_dir)
+    write_data_report(report, report_dir)
+
+    metrics.increment("rows_resumed", dedup_stats["rows_resumed"])
+    if scheduler is not None:
+        stats = scheduler.stats()
+        logger.info("LLM scheduler stats | %s", stats)
+        for name in ("requests", "retries", "throttled", "failed"):
+            metrics.increment(f"llm_{name}", stats[name])
+        metrics.increment("llm_rate_limit_wait_seconds", stats["waited_s"])
+
+    if cache is not None:
+        logger.info("LLM cache stats | %s", cache.stats())
+        cache.evict()
 
     logger.info(
         "Preprocessed dataset saved successfully | rows=%d | path=%s",
-        len(records),
+        position,
         output_path,
     )
+
+    if persist:
+        return None
+    return (
+        pd.concat(record_chunks, ignore_index=True),
+        pd.DataFrame(signal_rows, columns=list(ClaimRiskSignals.model_fields)),
+    )
@@ -0,0 +1,134 @@
+import logging
+import re
+
+from schema.modeloutput import (
+    ClaimRiskSignals,
+    OPERATIONAL_FLAGS,
+    YesNoUnknown,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Trigger phrases per operational flag, taken from the field descriptions in
+# schema/modeloutput.py plus spelling variants seen in records.csv.
+# Acronyms are matched case-sensitively so "sec" in ordinary text is ignored.
+FLAG_PHRASES = {
+    "has_regulator_involvement": [
+        "regulator visit",
+        "regulator engagement",
+        "regulatory review",
+        "compliance breach",
+        "enforcement action",
+        "statutory breach",
+        "data protection authority",
+        "GDPR authority",
+        "(?-i:FCA)",
+        "(?-i:SEC)",
+    ],
+    "has_cross_border_elements": [
+        "cross-border",
+        "cross border",
+        "overseas elements",
+        "international",
+        "foreign jurisdiction",
+        "multi-jurisdiction",
+        "governing law unclear",
+        "govening law unclear",
+        "govering law unclear",
+        "jurisdiction disputed",
+    ],
+    "has_time_sensitivity": [
+        "urgent",
+        "time-sensitive",
+        "time sensitive",
+        "immediate action required",
+        "injunction",
+        "limitation period",
+        "limitation periods",
+        "court deadline",
+        "statutory deadline",
+        "(?-i:ASAP)",
+    ],
+    "has_missing_documentation": [
+        "no policy documents",
+        "no supporting documentation",
+        "no supporting documentaion",
+        "no supporting documenation",
+        "evidence not supplied",
+        "evidence not yet supplied",
+        "evidence pending",
+        "documents awaited",
+        "attachments missing",
+        "missing attachments",
+        "policy schedule missing",
+        "insufficient evidence",
+    ],
+    "mentions_fraud_or_arson": [
+        "arson",
+        "suspected fraud",
+        "insurance fraud",
+        "fraud",
+        "class action",
+        "criminal investigation",
+        "police reference",
+        "theft",
+        "burglary",
+        "malicious damage",
+        "misrepresentation",
+    ],
+}
+
+
+def compile_phrases(phrases: dict[str, list[str]]) -> re.Pattern:
+    """One alternation with a named group per flag, so a single scan finds every flag."""
+    groups = []
+    for flag, flag_phrases in phrases.items():
+        # Longest first so e.g. "suspected fraud" wins over "fraud"
+        ordered = sorted(flag_phrases, key=len, reverse=True)
+        alternatives = "|".join(
+            p if p.startswith("(?") else re.escape(p) for p in ordered
+        )
+        groups.append(f"(?P<{flag}>{alternatives})")
+    return re.compile(r"\b(?:" + "|".join(groups) + r")\b", re.IGNORECASE)
+
+
+FLAG_PATTERN = compile_phrases(FLAG_PHRASES)
+
+
+def extract_operational_flags(text: str) -> dict[str, str]:
+    """Return 'Yes'/'No' for each operational flag from a single pass over ``text``."""
+    found = {m.lastgroup for m in FLAG_PATTERN.finditer(text or "")}
+    return {
+        flag: YesNoUnknown.YES.value if flag in found else YesNoUnknown.NO.value
+        for flag in OPERATIONAL_FLAGS
+    }
+
+
+def claim_text(summary, handler_notes) -> str:
+    """Text scanned for trigger phrases (summary and handler notes)."""
+    return f"{summary if isinstance(summary, str) else ''}. {handler_notes if isinstance(handler_notes, str) else ''}"
+
+
+def combine_signals(semantic, flags: dict[str, str]) -> ClaimRiskSignals:
+    """Merge LLM semantic signals with locally extracted operational flags."""
+    return ClaimRiskSignals(**semantic.model_dump(), **flags)
+
+
+def keyword_only_signals(case_id: str, flags: dict[str, str]) -> ClaimRiskSignals:
+    """
+    Signals for the flags-only fast mode: operational flags from keyword
+    rules, every semantic signal marked as unknown.
+    """
+    semantic = {
+        name: YesNoUnknown.NO_DATA.value
+        for name in ClaimRiskSignals.model_fields
+        if name not in OPERATIONAL_FLAGS and name not in {"case_id", "risk_summary"}
+    }
+    raised = [flag for flag in OPERATIONAL_FLAGS if flags[flag] == YesNoUnknown.YES.value]
+    summary = (
+        "Keyword rules flagged: " + ", ".join(raised) + "."
+        if raised
+        else "No operational flags raised by keyword rules."
+    )
+    return ClaimRiskSignals(case_id=case_id, risk_summary=summary, **semantic, **flags)
@@ -1,17 +1,40 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+# Seconds between progress summaries of hot loops
+PROGRESS_INTERVAL_S = 10.0
 
-import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+# Background listener that formats records and writes the log file
+_listener: QueueListener | None = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread untouched. The stock prepare()
+    formats the message in the calling thread; here %-interpolation,
+    formatting and file I/O all happen in the listener, so log arguments
+    must not be mutated after the call.
+    """
+
+    def prepare(self, record):
+        return record
 
 
 def setup_logging(log_level: str = "INFO", log_dir: str = "logs") -> None:
     """
     Configure logging to FILE ONLY (no console output).
+
+    Loggers only enqueue records; a QueueListener thread formats them and
+    writes the rotating log file, so logging never blocks the pipeline on
+    disk I/O. The queue is drained at interpreter exit.
     """
+    global _listener
     Path(log_dir).mkdir(parents=True, exist_ok=True)
 
     log_format = (
@@ -29,15 +52,104 @@ def setup_logging(log_level: str = "INFO", log_dir: str = "logs") -> None:
     file_handler.setFormatter(formatter)
 
     # IMPORTANT: clear existing handlers (prevents duplicates)
+    shutdown_logging()
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
 
     root_logger.setLevel(
         getattr(logging, log_level.upper(), logging.INFO)
     )
-    root_logger.addHandler(file_handler)
+    _listener = QueueListener(queue.SimpleQueue(), file_handler)
+    _listener.start()
+    root_logger.addHandler(_DeferredQueueHandler(_listener.queue))
 
     # Optional: reduce noise from third-party libraries
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("openai").setLevel(logging.WARNING)
 
+
+
+def shutdown_logging() -> None:
+    """Stop the listener after it has written every queued record."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().handlers[:] = [
+        h for h in logging.getLogger().handlers if not isinstance(h, _DeferredQueueHandler)
+    ]
+    _listener = None
+
+
+def _log_directly_after_fork() -> None:
+    # A forked worker process has no listener thread: write straight to the
+    # listener's handlers instead of queueing records nobody reads
+    root_logger = logging.getLogger()
+    if _listener is None:
+        return
+    root_logger.handlers[:] = [
+        h for h in root_logger.handlers if not isinstance(h, _DeferredQueueHandler)
+    ] + list(_listener.handlers)
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_directly_after_fork)
+
+
+class ProgressLogger:
+    """
+    Replaces per-row log lines in hot loops: call update() for every item
+    and an INFO summary (done, rate, ETA) is logged at most every
+    ``interval`` seconds, plus once more on close(). Thread-safe.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        label: str,
+        total: int | None = None,
+        interval: float = PROGRESS_INTERVAL_S,
+        clock=time.monotonic,
+    ):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.clock = clock
+        self.done = 0
+        self._started = self._last = clock()
+        self._lock = threading.Lock()
+
+    def update(self, n: int = 1) -> None:
+        with self._lock:
+            self.done += n
+            now = self.clock()
+            if now - self._last < self.interval:
+                return
+            self._last = now
+        self._log(now)
+
+    def close(self) -> None:
+        self._log(self.clock(), final=True)
+
+    def _log(self, now: float, final: bool = False) -> None:
+        elapsed = now - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total is not None and rate > 0:
+            eta = f"{max(self.total - self.done, 0) / rate:.0f}s"
+        else:
+            eta = "unknown"
+        self.logger.info(
+            "%s %s | done=%d/%s | rate=%.1f/s | elapsed=%.0fs | eta=%s",
+            self.label,
+            "finished" if final else "progress",
+            self.done,
+            self.total if self.total is not None else "?",
+            rate,
+            elapsed,
+            "0s" if final else eta,
+            stacklevel=3,
+        )
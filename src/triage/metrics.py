@@ -0,0 +1,196 @@
+import bisect
+import json
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Run metrics: stage spans (time, rows, rows/s), counters and latency
+# histograms. One process-wide registry is filled by the pipeline stages
+# and written to outputs/run_metrics.json (optionally Prometheus text) at
+# the end of run_pipeline.
+METRICS_FILE = "run_metrics.json"
+PROMETHEUS_FILE = "run_metrics.prom"
+PROMETHEUS_PREFIX = "triage"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Observations kept per histogram for percentiles (uniform reservoir sample)
+RESERVOIR_SIZE = 10_000
+
+
+class Span:
+    """Handle yielded by span(); set ``rows`` to report throughput."""
+
+    def __init__(self, name: str, rows: int | None = None):
+        self.name = name
+        self.rows = rows
+
+
+class Histogram:
+    """Bucketed counts (for Prometheus) plus a bounded sample for percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._sample = []
+        self._random = random.Random(0)
+
+    def observe(self, value: float) -> None:
+        # First bucket whose upper bound is >= value; the last slot is +Inf
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if len(self._sample) < RESERVOIR_SIZE:
+            self._sample.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self._sample[slot] = value
+
+    def quantile(self, q: float) -> float | None:
+        if not self._sample:
+            return None
+        ordered = sorted(self._sample)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    def summary(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += n
+            buckets["+Inf" if bound == math.inf else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max if self.count else None,
+            "buckets": buckets,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.perf_counter()
+            self.started_at = datetime.now(timezone.utc)
+            self.stages = {}
+            self.counters = {}
+            self.histograms = {}
+
+    # -----------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str, rows: int | None = None):
+        """Time the enclosed block as stage ``name``; repeated spans accumulate."""
+        handle = Span(name, rows)
+        start = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            self.record_span(name, time.perf_counter() - start, handle.rows)
+
+    def record_span(self, name: str, seconds: float, rows: int | None = None) -> None:
+        """Add a stage span timed by the caller."""
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "rows": 0})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["rows"] += rows or 0
+        logger.debug("Stage span | stage=%s | seconds=%.4f | rows=%s", name, seconds, rows)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS) -> None:
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(buckets)
+            self.histograms[name].observe(value)
+
+    # -----------------------------------------------------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {
+                name: {
+                    **stage,
+                    "seconds": round(stage["seconds"], 6),
+                    "rows_per_s": round(stage["rows"] / stage["seconds"], 1)
+                    if stage["rows"] and stage["seconds"]
+                    else None,
+                }
+                for name, stage in self.stages.items()
+            }
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "wall_seconds": round(time.perf_counter() - self.started, 6),
+                "stages": stages,
+                "counters": dict(self.counters),
+                "histograms": {name: h.summary() for name, h in self.histograms.items()},
+            }
+
+    def write_json(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        logger.info("Run metrics written | path=%s", path)
+        return path
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_stage_seconds_total Time spent in each pipeline stage.",
+            f"# TYPE {p}_stage_seconds_total counter",
+        ]
+        lines += [f'{p}_stage_seconds_total{{stage="{n}"}} {s["seconds"]}' for n, s in snap["stages"].items()]
+        lines += [
+            f"# HELP {p}_stage_rows_total Rows processed by each pipeline stage.",
+            f"# TYPE {p}_stage_rows_total counter",
+        ]
+        lines += [f'{p}_stage_rows_total{{stage="{n}"}} {s["rows"]}' for n, s in snap["stages"].items()]
+
+        for name, value in snap["counters"].items():
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+
+        for name, hist in snap["histograms"].items():
+            lines.append(f"# TYPE {p}_{name} histogram")
+            lines += [f'{p}_{name}_bucket{{le="{le}"}} {n}' for le, n in hist["buckets"].items()]
+            lines += [f"{p}_{name}_sum {hist['sum']}", f"{p}_{name}_count {hist['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_prometheus())
+        logger.info("Prometheus metrics written | path=%s", path)
+        return path
+
+
+# Process-wide registry used by the pipeline stages
+registry = MetricsRegistry()
+span = registry.span
+record_span = registry.record_span
+increment = registry.increment
+observe = registry.observe
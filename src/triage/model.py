@@ -1,41 +1,98 @@
+from __future__ import annotations
+
 import logging
+import re
+import time
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from schema.modeloutput import ClaimRiskSignals
+from schema.modeloutput import (
+    ClaimRiskSignals,
+    ClaimRiskSignalsBatch,
+    ClaimSemanticSignals,
+    ClaimSemanticSignalsBatch,
+)
+from src.triage import metrics
+from src.triage.cache import LLMResponseCache, schema_version
+from src.triage.ratelimit import RateLimitScheduler, estimate_tokens
+from src.triage.usage import TokenBudgetExceeded, TokenLedger
+
+# LangChain (and the chat model backends built on it) is imported when a
+# client is created, so keyword-only runs and the CLI never load it
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Attempts per packed request; each retry only re-sends the claims missing
+# from the previous response
+PACKED_MAX_ATTEMPTS = 3
+
+# Leading case id of a claim block (see triage.ingest.format_claim); left
+# out of cache keys so identical claim content shares one entry
+CASE_ID_PATTERN = re.compile(r"^caseid:([^;]*); ")
+
 
 class GetFromLlm:
-    def __init__(self):
+    def __init__(
+        self,
+        model=None,
+        cache: LLMResponseCache | None = None,
+        semantic_only: bool = False,
+        scheduler: RateLimitScheduler | None = None,
+        backend: str | None = None,
+        usage: TokenLedger | None = None,
+    ):
+        """
+        Args:
+            model: Optional pre-built LangChain chat model. Defaults to
+                the model of ``backend``; tests inject local fakes here.
+            cache: Optional response cache consulted before every call.
+            semantic_only: Ask only for the semantic signals
+                (ClaimSemanticSignals); the operational flags are then
+                filled locally by triage.keywords.
+            scheduler: Optional rate-limit scheduler every request goes
+                through (RPM/TPM buckets, backoff, adaptive concurrency).
+            backend: Model backend used when ``model`` is None: openai,
+                fake or replay (see triage.backends); defaults to
+                $TRIAGE_LLM_BACKEND, then openai.
+            usage: Optional token ledger; every request is accounted in it
+                and refused with TokenBudgetExceeded once its budget is
+                spent.
+        """
         logger.info("Initializing LLM client")
 
+        from langchain_core.output_parsers import PydanticOutputParser
+        from langchain_core.prompts import PromptTemplate
+
+        from src.triage.backends import make_chat_model
+
         try:
-            self.model = ChatOpenAI(model="gpt-4o-mini")
-            logger.info("ChatOpenAI model initialized successfully | model=gpt-4o-mini")
+            if model is None:
+                # The scheduler owns retries; the client must not retry underneath it
+                model = make_chat_model(backend, max_retries=0 if scheduler is not None else None)
+            self.model = model
+            self.model_name = getattr(self.model, "model_name", type(self.model).__name__)
+            logger.info("Chat model initialized successfully | model=%s", self.model_name)
         except Exception as exc:
             logger.critical(
-                "Failed to initialize ChatOpenAI model",
+                "Failed to initialize chat model",
                 exc_info=True,
             )
             raise
 
-    # -----------------------------------------------------
-
-    def generate_details(self, input_data: str) -> ClaimRiskSignals:
-        logger.info("Starting LLM risk signal extraction")
+        self.signals_model = ClaimSemanticSignals if semantic_only else ClaimRiskSignals
+        batch_model = ClaimSemanticSignalsBatch if semantic_only else ClaimRiskSignalsBatch
 
         # Initialize the output parser
-        parser = PydanticOutputParser(pydantic_object=ClaimRiskSignals)
+        self.parser = PydanticOutputParser(pydantic_object=self.signals_model)
         logger.debug("Pydantic output parser initialized")
 
         # Prepare prompt
-        prompt = PromptTemplate(
+        self.prompt = PromptTemplate(
             template=(
                 "You are an insurance claim risk analyst.\n\n"
                 "Analyze the following claim information and extract risk signals.\n\n"
@@ -52,31 +109,336 @@ class GetFromLlm:
             ),
             input_variables=["input_data"],
             partial_variables={
-                "format_instructions": parser.get_format_instructions()
+                "format_instructions": self.parser.get_format_instructions()
             },
         )
 
         logger.debug("Prompt template constructed")
 
-        # Build chain
-        chain = prompt | self.model | parser
+        # Build chain once; it is stateless and shared by sync and async calls.
+        # It stops at the model's message so the token usage can be read
+        # before the parser runs.
+        self.chain = self.prompt | self.model
         logger.debug("LLM execution chain created")
 
+        # Packed prompt: several claims share one instruction block
+        self.batch_parser = PydanticOutputParser(pydantic_object=batch_model)
+        self.batch_prompt = PromptTemplate(
+            template=(
+                "You are an insurance claim risk analyst.\n\n"
+                "Analyze each of the following claims independently and extract its risk signals.\n\n"
+                "Claims:\n"
+                "{claims}\n\n"
+                "Rules:\n"
+                "- Return exactly one entry in `claims` for every claim above\n"
+                "- Copy each claim's caseid into its case_id field unchanged\n"
+                "- Use ONLY the field names exactly as defined in the schema\n"
+                "- Do NOT rename, misspell, or omit any fields\n"
+                "- Every field in the schema MUST be present\n"
+                "- Use only: 'Yes', 'No', or 'No data available'\n"
+                "- Do not assume missing facts\n"
+                "- Provide a brief risk_summary (1–2 sentences) per claim\n\n"
+                "{format_instructions}"
+            ),
+            input_variables=["claims"],
+            partial_variables={
+                "format_instructions": self.batch_parser.get_format_instructions()
+            },
+        )
+        self.batch_chain = self.batch_prompt | self.model
+
+        self.cache = cache
+        self.schema_version = schema_version(self.signals_model)
+        self.scheduler = scheduler
+        self.usage = usage
+        if usage is not None and usage.model_name is None:
+            usage.model_name = self.model_name
+
+    # -----------------------------------------------------
+
+    def _invoke(self, chain, parser, inputs: dict, prompt: PromptTemplate, case_ids=None):
+        def call():
+            start = time.perf_counter()
+            try:
+                return chain.invoke(inputs)
+            finally:
+                metrics.observe("llm_call_seconds", time.perf_counter() - start)
+
+        text, tokens = self._reserve(inputs, prompt, case_ids)
+        try:
+            message = call() if self.scheduler is None else self.scheduler.call(call, tokens)
+        finally:
+            if self.usage is not None:
+                self.usage.release(tokens)
+        return self._parse(parser, message, text, case_ids)
+
+    async def _ainvoke(self, chain, parser, inputs: dict, prompt: PromptTemplate, case_ids=None):
+        async def call():
+            start = time.perf_counter()
+            try:
+                return await chain.ainvoke(inputs)
+            finally:
+                metrics.observe("llm_call_seconds", time.perf_counter() - start)
+
+        text, tokens = self._reserve(inputs, prompt, case_ids)
+        try:
+            if self.scheduler is None:
+                message = await call()
+            else:
+                message = await self.scheduler.acall(call, tokens)
+        finally:
+            if self.usage is not None:
+                self.usage.release(tokens)
+        return self._parse(parser, message, text, case_ids)
+
+    def _reserve(self, inputs: dict, prompt: PromptTemplate, case_ids) -> tuple[str | None, int]:
+        """Estimate the request's tokens and take them from the budget; returns (prompt, tokens)."""
+        if self.scheduler is None and self.usage is None:
+            return None, 0
+        text = prompt.format(**inputs)
+        tokens = estimate_tokens(text, len(case_ids) if case_ids else 1)
+        if self.usage is not None:
+            self.usage.reserve(tokens)
+        return text, tokens
+
+    def _parse(self, parser, message, text: str | None, case_ids):
+        """Parse the model's message, accounting its token usage even if parsing fails."""
+        output = None
+        try:
+            output = parser.invoke(message)
+            return output
+        finally:
+            if self.usage is not None:
+                if not case_ids:
+                    case_ids = [output.case_id] if output is not None else []
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    self.usage.record(case_ids, usage["input_tokens"], usage["output_tokens"])
+                else:
+                    # No usage reported (local fakes): ~4 characters per token
+                    content = getattr(message, "content", message)
+                    self.usage.record(case_ids, len(text) // 4, len(str(content)) // 4, reported=False)
+
+    def estimate_request_tokens(self, inputs: list[str], claims_per_call: int = 1) -> int:
+        """Estimated tokens (prompt and completion) to extract ``inputs`` uncached."""
+        size = max(claims_per_call, 1)
+        total = 0
+        for start in range(0, len(inputs), size):
+            pack = inputs[start:start + size]
+            if size > 1:
+                text = self.batch_prompt.format(claims=self._pack_claims(dict(enumerate(pack))))
+            else:
+                text = self.prompt.format(input_data=pack[0])
+            total += estimate_tokens(text, len(pack))
+        return total
+
+    # -----------------------------------------------------
+
+    def _cache_key(self, input_data: str) -> str | None:
+        """Hash of the prompt for the claim content, without its case id."""
+        if self.cache is None:
+            return None
+        content = CASE_ID_PATTERN.sub("caseid:; ", input_data, count=1)
+        return LLMResponseCache.make_key(
+            self.prompt.format(input_data=content),
+            self.model_name,
+            self.schema_version,
+        )
+
+    def _cache_lookup(self, key: str | None, case_id: str | None) -> ClaimRiskSignals | None:
+        """Cached signals for ``key``, carrying ``case_id`` rather than the one stored."""
+        if key is None:
+            return None
+        payload = self.cache.get(key)
+        if payload is None:
+            metrics.increment("llm_cache_misses")
+            return None
+        metrics.increment("llm_cache_hits")
+        logger.debug("LLM cache hit | key=%s", key[:12])
+        signals = self.signals_model.model_validate_json(payload)
+        if case_id is not None and signals.case_id != case_id:
+            signals = signals.model_copy(update={"case_id": case_id})
+        return signals
+
+    @staticmethod
+    def _case_id(input_data: str) -> str | None:
+        match = CASE_ID_PATTERN.match(input_data)
+        return match.group(1) if match else None
+
+    def _requested(self, input_data: str) -> list[str] | None:
+        """The claim's case id, so usage is accounted to it whatever id the model answers with."""
+        case_id = self._case_id(input_data)
+        return [case_id] if case_id is not None else None
+
+    def _cache_store(self, key: str | None, output: ClaimRiskSignals) -> None:
+        if key is not None:
+            self.cache.put(key, output.model_dump_json(), self.model_name, self.schema_version)
+
+    # -----------------------------------------------------
+
+    def generate_details(self, input_data: str) -> ClaimRiskSignals:
+        logger.debug("Starting LLM risk signal extraction")
+
+        key = self._cache_key(input_data)
+        cached = self._cache_lookup(key, self._case_id(input_data))
+        if cached is not None:
+            return cached
+
         # Invoke chain
         try:
-            logger.info("Invoking LLM chain")
-            output = chain.invoke({"input_data": input_data})
+            logger.debug("Invoking LLM chain")
+            output = self._invoke(
+                self.chain, self.parser, {"input_data": input_data}, self.prompt, self._requested(input_data)
+            )
+            self._cache_store(key, output)
 
-            logger.info(
+            logger.debug(
                 "LLM response parsed successfully | case_id=%s",
                 getattr(output, "case_id", "unknown"),
             )
 
             return output
 
+        except TokenBudgetExceeded:
+            raise
         except Exception as exc:
             logger.error(
                 "LLM invocation or parsing failed",
                 exc_info=True,
             )
             raise
+
+    # -----------------------------------------------------
+
+    async def agenerate_details(self, input_data: str) -> ClaimRiskSignals:
+        """Async counterpart of generate_details for concurrent extraction."""
+        logger.debug("Starting async LLM risk signal extraction")
+
+        key = self._cache_key(input_data)
+        cached = self._cache_lookup(key, self._case_id(input_data))
+        if cached is not None:
+            return cached
+
+        try:
+            output = await self._ainvoke(
+                self.chain, self.parser, {"input_data": input_data}, self.prompt, self._requested(input_data)
+            )
+            self._cache_store(key, output)
+
+            logger.debug(
+                "LLM response parsed successfully | case_id=%s",
+                getattr(output, "case_id", "unknown"),
+            )
+
+            return output
+
+        except TokenBudgetExceeded:
+            raise
+        except Exception as exc:
+            logger.error(
+                "Async LLM invocation or parsing failed",
+                exc_info=True,
+            )
+            raise
+
+    # -----------------------------------------------------
+    # Packed (multi-claim) extraction
+    # -----------------------------------------------------
+
+    @staticmethod
+    def _pack_claims(pending: dict[str, str]) -> str:
+        return "\n\n".join(
+            f"Claim {n}:\n{input_data}"
+            for n, input_data in enumerate(pending.values(), start=1)
+        )
+
+    def _begin_packed(self, claims: list[tuple[str, str]]) -> tuple[dict, dict, dict]:
+        """Split claims into cache hits and the pending set still to be sent."""
+        results, pending, keys = {}, {}, {}
+        for case_id, input_data in claims:
+            keys[case_id] = self._cache_key(input_data)
+            cached = self._cache_lookup(keys[case_id], case_id)
+            if cached is not None:
+                results[case_id] = cached
+            else:
+                pending[case_id] = input_data
+        return results, pending, keys
+
+    def _accept_packed(self, output, pending: dict, results: dict, keys: dict) -> None:
+        """Move claims present in a (possibly partial) response out of pending."""
+        if output is None:
+            return
+        for signals in output.claims:
+            if signals.case_id in pending:
+                pending.pop(signals.case_id)
+                results[signals.case_id] = signals
+                self._cache_store(keys[signals.case_id], signals)
+
+    def generate_details_batch(self, claims: list[tuple[str, str]]) -> dict[str, ClaimRiskSignals]:
+        """
+        Extract signals for several claims in one prompt.
+
+        Args:
+            claims: (case_id, claim information) pairs.
+
+        Returns:
+            case_id -> signals. Claims still missing after PACKED_MAX_ATTEMPTS
+            partial responses are left out.
+        """
+        from langchain_core.exceptions import OutputParserException
+
+        results, pending, keys = self._begin_packed(claims)
+
+        for attempt in range(1, PACKED_MAX_ATTEMPTS + 1):
+            if not pending:
+                break
+            logger.debug("Invoking packed LLM chain | claims=%d | attempt=%d", len(pending), attempt)
+            try:
+                output = self._invoke(
+                    self.batch_chain,
+                    self.batch_parser,
+                    {"claims": self._pack_claims(pending)},
+                    self.batch_prompt,
+                    list(pending),
+                )
+            except TokenBudgetExceeded:
+                # Keep the claims already extracted; the rest stay pending
+                break
+            except OutputParserException:
+                logger.warning("Packed LLM response could not be parsed", exc_info=True)
+                output = None
+            self._accept_packed(output, pending, results, keys)
+
+        if pending:
+            logger.error("Claims missing from packed LLM responses | case_ids=%s", list(pending))
+        return results
+
+    async def agenerate_details_batch(self, claims: list[tuple[str, str]]) -> dict[str, ClaimRiskSignals]:
+        """Async counterpart of generate_details_batch."""
+        from langchain_core.exceptions import OutputParserException
+
+        results, pending, keys = self._begin_packed(claims)
+
+        for attempt in range(1, PACKED_MAX_ATTEMPTS + 1):
+            if not pending:
+                break
+            logger.debug("Invoking packed LLM chain | claims=%d | attempt=%d", len(pending), attempt)
+            try:
+                output = await self._ainvoke(
+                    self.batch_chain,
+                    self.batch_parser,
+                    {"claims": self._pack_claims(pending)},
+                    self.batch_prompt,
+                    list(pending),
+                )
+            except TokenBudgetExceeded:
+                # Keep the claims already extracted; the rest stay pending
+                break
+            except OutputParserException:
+                logger.warning("Packed LLM response could not be parsed", exc_info=True)
+                output = None
+            self._accept_packed(output, pending, results, keys)
+
+        if pending:
+            logger.error("Claims missing from packed LLM responses | case_ids=%s", list(pending))
+        return results
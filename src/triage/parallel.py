@@ -0,0 +1,43 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def split_frame(df: pd.DataFrame, shards: int) -> list[pd.DataFrame]:
+    """Split ``df`` into at most ``shards`` contiguous slices, keeping index labels."""
+    shards = max(1, min(shards, len(df)))
+    bounds = np.linspace(0, len(df), shards + 1).astype(int)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def map_shards(func, df: pd.DataFrame, workers: int = 1, *args) -> list:
+    """
+    Apply ``func(shard, *args)`` to contiguous shards of ``df`` and return the
+    results in shard order. With ``workers`` > 1 the shards run in a process
+    pool (``func`` must be a module-level function); otherwise ``func`` runs
+    once on the whole frame in this process.
+    """
+    if workers <= 1 or len(df) < 2:
+        return [func(df, *args)]
+
+    shards = split_frame(df, workers)
+    logger.debug(
+        "Sharded %s | rows=%d | shards=%d",
+        getattr(func, "__name__", func),
+        len(df),
+        len(shards),
+    )
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [pool.submit(func, shard, *args) for shard in shards]
+        return [f.result() for f in futures]
+
+
+def concat_shards(results: list, ignore_index: bool = False) -> pd.DataFrame | pd.Series:
+    """Concatenate frame/series shard results back in original order."""
+    if len(results) == 1:
+        return results[0]
+    return pd.concat(results, ignore_index=ignore_index)
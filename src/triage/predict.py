@@ -1,5 +1,9 @@
+import hashlib
 import logging
 import json
+import sys
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -8,9 +12,27 @@ from triage.ingest import preprocess_getstructrureddata
 from src.triage.model import GetFromLlm
 from src.triage.features import process_features
 from src.triage.validate import evaluation
+from src.triage.cache import LLMResponseCache
+from src.triage import metrics
+from src.triage.ratelimit import RateLimitScheduler
+from src.triage.storage import DEFAULT_STORAGE_FORMAT
+from src.triage.state import PREDICTION_COLUMNS, STATE_FILE, IncrementalState
+from src.triage.parallel import concat_shards, map_shards
+from src.triage.encoding import (
+    PRIORITY_LEVELS,
+    SIGNAL_LABELS,
+    is_signal_codes,
+    is_value,
+    lookup,
+)
 
 logger = logging.getLogger(__name__)
 
+# Distinct scoring keys remembered by the memoised scorer
+SCORE_CACHE_SIZE = 65536
+# Frames up to this many rows are scored through the memo rather than score_batch
+MEMO_SCORING_MAX_ROWS = 256
+
 
 class BaseRiskPriors:
     """
@@ -68,6 +90,13 @@ class BaseRiskPriors:
         "mentions_fraud_or_arson": 0.12,
     }
 
+    # Lowest risk score of each priority; anything below P2 is P3
+    PRIORITY_THRESHOLDS = {
+        "P0": 0.85,
+        "P1": 0.65,
+        "P2": 0.40,
+    }
+
     UNCERTAINTY_SIGNALS = [
         "conflicting_information",
         "unclear_incident_description",
@@ -100,23 +129,16 @@ class ClaimTriageEvaluator(BaseRiskPriors):
                 score -= 0.03
 
         final_score = round(max(min(score, 1.0), 0.0), 2)
-        logger.debug("Risk score calculated: %s", final_score)
         return final_score
 
     # -----------------------------------------------------
 
     def determine_priority(self, risk_score: float) -> str:
-        if risk_score >= 0.85:
-            priority = "P0"
-        elif risk_score >= 0.65:
-            priority = "P1"
-        elif risk_score >= 0.40:
-            priority = "P2"
-        else:
-            priority = "P3"
+        for priority, threshold in self.PRIORITY_THRESHOLDS.items():
+            if risk_score >= threshold:
+                return priority
 
-        logger.debug("Priority determined: %s", priority)
-        return priority
+        return "P3"
 
     # -----------------------------------------------------
 
@@ -154,7 +176,6 @@ class ClaimTriageEvaluator(BaseRiskPriors):
                 else "Proceed with standard handling"
             )
 
-        logger.debug("Action determined: %s", action)
         return action
 
     # -----------------------------------------------------
@@ -173,13 +194,11 @@ class ClaimTriageEvaluator(BaseRiskPriors):
             confidence -= 15
 
         final_confidence = max(confidence, 30)
-        logger.debug("Confidence calculated: %s", final_confidence)
         return final_confidence
 
     # -----------------------------------------------------
 
     def build_extracted_signals(self, row: dict) -> str:
-        logger.debug("Extracting signals")
         return json.dumps(
             {
                 "jurisdiction": row["jurisdiction"],
@@ -199,67 +218,417 @@ class ClaimTriageEvaluator(BaseRiskPriors):
             }
         )
 
+    # -----------------------------------------------------
+    # Memoised API
+    # -----------------------------------------------------
 
-# =====================================================
-# Pipeline
-# =====================================================
+    @classmethod
+    def scoring_key_columns(cls) -> tuple:
+        """Every column the scoring rules and build_extracted_signals read."""
+        return (
+            "client_segment",
+            "jurisdiction",
+            "service_line",
+            "claim_value_band",
+            "attachments_present",
+            *cls.CORE_SIGNAL_WEIGHTS,
+            *cls.OPERATIONAL_SIGNAL_WEIGHTS,
+            *cls.UNCERTAINTY_SIGNALS,
+        )
 
-def run_pipeline(input_path: str, gold_path: str | None, outdir1= "outputs"):
+    def score_claim(self, row: dict) -> dict:
+        """
+        Priority, risk_score, recommended_action, confidence and
+        extracted_signals of one claim. The outputs are a pure function of
+        the categorical key columns, so repeated keys are a single lookup.
+        """
+        key = tuple(_intern(row.get(col)) for col in self.scoring_key_columns())
+        return dict(zip(_SCORE_FIELDS, _score_key(type(self), key)))
+
+    def score_memoized(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        score_batch plus an extracted_signals column, computed once per
+        distinct scoring key. Cheaper than score_batch for small frames,
+        where the vectorised path is dominated by per-column overhead.
+        """
+        columns = [_key_values(df[col]) for col in self.scoring_key_columns()]
+        cls = type(self)
+        results = [_score_key(cls, key) for key in zip(*columns)]
+        logger.debug("Memoised scoring | rows=%d | %s", len(df), _score_key.cache_info())
+
+        priority, risk_score, action, confidence, signals = (
+            list(field) for field in zip(*results)
+        ) if results else ([] for _ in _SCORE_FIELDS)
+        return pd.DataFrame(
+            {
+                "priority": pd.Categorical(priority, categories=PRIORITY_LEVELS),
+                "risk_score": np.array(risk_score, dtype=np.float64),
+                "recommended_action": pd.Series(action, index=df.index, dtype=object),
+                "confidence": np.array(confidence, dtype=np.int64),
+                "extracted_signals": pd.Series(signals, index=df.index, dtype=object),
+            },
+            index=df.index,
+        )
 
-    print("Executing....\n\n Kindly refer logs to track the progress",end="\n")
+    # -----------------------------------------------------
+    # Batch (vectorised) API
+    # -----------------------------------------------------
 
+    def score_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorised equivalent of calculate_risk_score, determine_priority,
+        determine_action and calculate_confidence over a whole processed table.
 
-    logger.info("Starting triage pipeline")
+        Returns a frame aligned with ``df`` holding the priority, risk_score,
+        recommended_action and confidence columns. Results are identical to
+        calling the per-row methods on every row.
+        """
+        logger.debug("Batch scoring started | rows=%d", len(df))
 
-    preprocess_getstructrureddata(input_path)
-    process_features()
+        score = np.zeros(len(df), dtype=np.float64)
 
-    logger.info("Processed data loaded")
-    processed_df = pd.read_csv("data/processeddata/processeddf.csv")
+        for col, weight in self.CORE_SIGNAL_WEIGHTS.items():
+            score += lookup(df[col], self.YES_NO_MAP, default=0.25) * weight
 
-    evaluator = ClaimTriageEvaluator()
-    results = []
+        for col, weight in self.OPERATIONAL_SIGNAL_WEIGHTS.items():
+            score += lookup(df[col], self.YES_NO_MAP, default=0.25) * weight
 
-    for i, row in processed_df.iterrows():
-        logger.debug("Processing row %s (case_id=%s)", i, row["case_id"])
+        base_jur = lookup(df["jurisdiction"], self.JURISDICTION_RISK)
+        service_mult = lookup(df["service_line"], self.SERVICE_LINE_MULTIPLIER)
+        score += np.minimum(base_jur * service_mult, 0.50)
 
-        row_dict = row.to_dict()
-        risk_score = evaluator.calculate_risk_score(row_dict)
-        priority = evaluator.determine_priority(risk_score)
-        action = evaluator.determine_action(row_dict, risk_score, priority)
-        confidence = evaluator.calculate_confidence(row_dict)
-        extracted_signals = evaluator.build_extracted_signals(row_dict)
+        score += lookup(df["client_segment"], self.CLIENT_SEGMENT_RISK) * 0.15
+        score += lookup(df["claim_value_band"], self.CLAIM_VALUE_RISK) * 0.20
 
-        results.append(
+        for col in self.UNCERTAINTY_SIGNALS:
+            score = np.where(is_value(df[col], "No data available"), score - 0.03, score)
+
+        risk_score = _round2(np.maximum(np.minimum(score, 1.0), 0.0))
+
+        priority = np.select(
+            [risk_score >= threshold for threshold in self.PRIORITY_THRESHOLDS.values()],
+            list(self.PRIORITY_THRESHOLDS),
+            default="P3",
+        )
+
+        invalid = is_value(df["claim_invalid_or_fraudulent"], "Yes")
+        fraud = (
+            is_value(df["potential_fraud"], "Yes")
+            | is_value(df["mentions_fraud_or_arson"], "Yes")
+        )
+        coverage = (
+            is_value(df["policy_interpretation_issues"], "Yes")
+            | is_value(df["coverage_terms_unclear"], "Yes")
+        )
+        p0, p1, p2 = priority == "P0", priority == "P1", priority == "P2"
+
+        action = np.select(
             [
-                row["case_id"],
-                priority,
-                risk_score,
-                action,
-                extracted_signals,
-                confidence,
-                row["risk_summary"],
-            ]
+                p0 & invalid,
+                p0 & fraud,
+                p0,
+                p1 & is_value(df["legal_disputes"], "Yes"),
+                p1 & coverage,
+                p1,
+                p2 & is_value(df["has_missing_documentation"], "Yes"),
+                p2,
+                invalid,
+            ],
+            [
+                "Reject claim",
+                "Escalate for investigation",
+                "Immediate escalation",
+                "Route to legal review",
+                "Escalate for coverage review",
+                "Escalate for investigation",
+                "Request further information",
+                "Proceed with standard handling",
+                "Reject claim",
+            ],
+            default="Proceed with standard handling",
+        )
+
+        confidence = np.full(len(df), 90, dtype=np.int64)
+        for col in self.UNCERTAINTY_SIGNALS:
+            confidence -= 10 * ~is_value(df[col], "No")
+        confidence -= 15 * is_value(df["has_missing_documentation"], "Yes")
+        confidence -= 15 * is_value(df["attachments_present"], "No")
+        confidence = np.maximum(confidence, 30)
+
+        logger.debug("Batch scoring completed | rows=%d", len(df))
+
+        return pd.DataFrame(
+            {
+                "priority": pd.Categorical(priority, categories=PRIORITY_LEVELS),
+                "risk_score": risk_score,
+                "recommended_action": action.astype(object),
+                "confidence": confidence,
+            },
+            index=df.index,
+        )
+
+    # -----------------------------------------------------
+
+    def build_extracted_signals_batch(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorised equivalent of build_extracted_signals. The JSON documents are
+        assembled from pre-encoded literals, so each distinct value is only
+        serialised once.
+        """
+        j = {col: _json_literals(df[col]) for col in (
+            "jurisdiction",
+            "service_line",
+            "claim_value_band",
+            "severe_legal_or_regulatory_risk",
+            "potential_fraud",
+            "legal_disputes",
+            "has_regulator_involvement",
+            "has_cross_border_elements",
+            "has_time_sensitivity",
+            "has_missing_documentation",
+        )}
+
+        signals = (
+            '{"jurisdiction": ' + j["jurisdiction"]
+            + ', "service_line": ' + j["service_line"]
+            + ', "claim_value_band": ' + j["claim_value_band"]
+            + ', "core_risks": {"legal": ' + j["severe_legal_or_regulatory_risk"]
+            + ', "fraud": ' + j["potential_fraud"]
+            + ', "dispute": ' + j["legal_disputes"]
+            + '}, "operational_flags": {"regulator": ' + j["has_regulator_involvement"]
+            + ', "cross_border": ' + j["has_cross_border_elements"]
+            + ', "urgent": ' + j["has_time_sensitivity"]
+            + ', "missing_docs": ' + j["has_missing_documentation"]
+            + "}}"
         )
+        return pd.Series(signals, index=df.index, dtype=object)
 
-    df_out = pd.DataFrame(
-        results,
-        columns=[
-            "case_id",
-            "priority",
-            "risk_score",
-            "recommended_action",
-            "extracted_signals",
-            "confidence",
-            "rationale",
-        ],
+
+# -----------------------------------------------------
+# Memo helpers
+# -----------------------------------------------------
+
+_SCORE_FIELDS = ("priority", "risk_score", "recommended_action", "confidence", "extracted_signals")
+
+
+@lru_cache(maxsize=SCORE_CACHE_SIZE)
+def _score_key(evaluator_cls: type, key: tuple) -> tuple:
+    """Score one interned key through the per-row methods (None marks a missing value)."""
+    evaluator = evaluator_cls()
+    row = {
+        col: np.nan if value is None else value
+        for col, value in zip(evaluator_cls.scoring_key_columns(), key)
+    }
+    risk_score = evaluator.calculate_risk_score(row)
+    priority = evaluator.determine_priority(risk_score)
+    return (
+        priority,
+        risk_score,
+        evaluator.determine_action(row, risk_score, priority),
+        evaluator.calculate_confidence(row),
+        evaluator.build_extracted_signals(row),
+    )
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    return None if pd.isna(value) else value
+
+
+def _key_values(series: pd.Series) -> np.ndarray:
+    """Interned key value per row; each distinct value is interned once."""
+    # Missing (-1) picks the trailing None
+    if is_signal_codes(series):
+        codes, uniques = series.to_numpy(), SIGNAL_LABELS + (None,)
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), (*series.cat.categories, None)
+    else:
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    values = np.empty(len(uniques), dtype=object)
+    values[:] = [_intern(u) for u in uniques]
+    return values[codes]
+
+
+# -----------------------------------------------------
+# Batch helpers
+# -----------------------------------------------------
+
+def priors_fingerprint() -> str:
+    """Short hash of the scoring priors; stored predictions are stale once it changes."""
+    priors = {
+        name: value
+        for name, value in vars(BaseRiskPriors).items()
+        if name.isupper()
+    }
+    return hashlib.sha256(json.dumps(priors, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals with Python's round() semantics. Scores only take a
+    small number of distinct values, so rounding the uniques is cheap.
+    """
+    uniques, inverse = np.unique(values, return_inverse=True)
+    rounded = np.array([round(float(v), 2) for v in uniques], dtype=np.float64)
+    return rounded[inverse.reshape(-1)]
+
+
+def _json_literals(series: pd.Series) -> np.ndarray:
+    """JSON-encode each distinct value once and broadcast back to the rows."""
+    if is_signal_codes(series):
+        # Missing (-1) picks the trailing NaN literal
+        codes, uniques = series.to_numpy(), SIGNAL_LABELS + (np.nan,)
+    else:
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    literals = np.array([json.dumps(u) for u in uniques], dtype=object)
+    return literals[codes]
+
+
+# =====================================================
+# Pipeline
+# =====================================================
+
+def predict_frame(processed_df: pd.DataFrame) -> pd.DataFrame:
+    """Score a processed table into the predictions.csv columns."""
+    evaluator = ClaimTriageEvaluator()
+    if len(processed_df) <= MEMO_SCORING_MAX_ROWS:
+        scores = evaluator.score_memoized(processed_df)
+    else:
+        scores = evaluator.score_batch(processed_df)
+        scores["extracted_signals"] = evaluator.build_extracted_signals_batch(processed_df)
+
+    return pd.DataFrame(
+        {
+            "case_id": processed_df["case_id"],
+            "priority": scores["priority"],
+            "risk_score": scores["risk_score"],
+            "recommended_action": scores["recommended_action"],
+            "extracted_signals": scores["extracted_signals"],
+            "confidence": scores["confidence"],
+            "rationale": processed_df["risk_summary"],
+        }
     )
 
+
+def run_pipeline(
+    input_path: str,
+    gold_path: str | None,
+    outdir1= "outputs",
+    llm_concurrency: int = 1,
+    cache_path: str | None = None,
+    cache_max_entries: int | None = None,
+    cache_max_age_days: float | None = None,
+    resume: bool = False,
+    claims_per_call: int = 1,
+    signal_mode: str = "llm",
+    chunk_rows: int | None = None,
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    persist_intermediates: bool = False,
+    data_dir: str = "data",
+    load_workers: int = 1,
+    workers: int = 1,
+    rpm: float | None = None,
+    tpm: float | None = None,
+    max_retries: int = 5,
+    max_tokens_budget: int | None = None,
+    llm_backend: str | None = None,
+    metrics_prometheus: bool = False,
+    incremental: bool = False,
+    state_path: str | None = None,
+):
+
+    print("Executing....\n\n Kindly refer logs to track the progress",end="\n")
+
+
+    logger.info("Starting triage pipeline")
+    metrics.registry.reset()
+
+    cache = None
+    if cache_path:
+        cache = LLMResponseCache(
+            cache_path,
+            max_entries=cache_max_entries,
+            max_age_days=cache_max_age_days,
+        )
+
+    scheduler = RateLimitScheduler(
+        rpm=rpm,
+        tpm=tpm,
+        max_retries=max_retries,
+        max_concurrency=llm_concurrency,
+    )
+
+    # Incremental runs only process case_ids that are new or changed since
+    # the last run; the others keep their stored predictions
+    state = None
+    if incremental:
+        config = {"signal_mode": signal_mode, "scoring_priors": priors_fingerprint()}
+        if signal_mode != "keywords":
+            from triage.backends import BACKEND_MODELS, resolve_backend
+
+            backend = resolve_backend(llm_backend)
+            config.update(llm_backend=backend, llm_model=BACKEND_MODELS[backend])
+        state = IncrementalState(state_path or Path(data_dir) / STATE_FILE, config=config)
+
+    try:
+        stage_frames = preprocess_getstructrureddata(
+            input_path,
+            llm_concurrency=llm_concurrency,
+            cache=cache,
+            resume=resume,
+            claims_per_call=claims_per_call,
+            signal_mode=signal_mode,
+            chunk_rows=chunk_rows,
+            storage_format=storage_format,
+            persist=persist_intermediates,
+            data_dir=data_dir,
+            report_dir=outdir1,
+            workers=workers,
+            scheduler=scheduler,
+            llm_backend=llm_backend,
+            max_tokens_budget=max_tokens_budget,
+            state=state,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if state is not None and state.changed_rows == 0:
+        logger.info("No new or changed case_ids; reusing stored predictions")
+        df_out = pd.DataFrame(columns=PREDICTION_COLUMNS)
+    else:
+        # Intermediates are chained in memory unless they were persisted, in
+        # which case the feature step reads them back from data_dir
+        records, signals = stage_frames or (None, None)
+        processed_df = process_features(
+            storage_format,
+            records=records,
+            signals=signals,
+            data_dir=data_dir,
+            persist=persist_intermediates,
+            load_workers=load_workers,
+            workers=workers,
+        )
+        logger.info("Processed data loaded")
+
+        logger.info("Scoring processed records | rows=%d | workers=%d", len(processed_df), workers)
+        with metrics.span("score", rows=len(processed_df)):
+            df_out = concat_shards(map_shards(predict_frame, processed_df, workers))
+
+    if state is not None:
+        try:
+            with metrics.span("incremental_merge", rows=state.rows):
+                df_out = state.commit(df_out)
+        finally:
+            state.close()
+
     outdir = Path(outdir1)
     outdir.mkdir(parents=True, exist_ok=True)
 
     output_file = outdir / "predictions.csv"
-    df_out.to_csv(output_file, index=False)
+    with metrics.span("write_predictions", rows=len(df_out)):
+        df_out.to_csv(output_file, index=False)
 
     logger.info("Results written to %s", output_file)
 
@@ -267,5 +636,9 @@ def run_pipeline(input_path: str, gold_path: str | None, outdir1= "outputs"):
 
     if gold_path:
         logger.info("Running evaluation with gold labels: %s", gold_path)
-        evaluation(gold_path, outdir1)
+        evaluation(gold_path, outdir1, pred_df=df_out)
         print(f"Evaluation completed  successfully, Kindly refer the path {outdir1}/eval_report.md for report")
+
+    metrics.registry.write_json(outdir / metrics.METRICS_FILE)
+    if metrics_prometheus:
+        metrics.registry.write_prometheus(outdir / metrics.PROMETHEUS_FILE)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Rough completion size of one claim's JSON signals, used for TPM estimates
+COMPLETION_TOKENS_PER_CLAIM = 300
+
+
+def estimate_tokens(prompt: str, claims: int = 1) -> int:
+    """Prompt tokens (~4 characters per token) plus the expected completion."""
+    return len(prompt) // 4 + COMPLETION_TOKENS_PER_CLAIM * claims
+
+
+def error_status(exc: BaseException) -> int | None:
+    """HTTP status of an API error (openai.APIStatusError and lookalikes), if any."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429/5xx responses and connection-level failures are retried."""
+    if error_status(exc) in RETRYABLE_STATUS:
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    # openai.APIConnectionError / APITimeoutError carry no status code
+    return any(cls.__name__ in ("APIConnectionError", "APITimeoutError") for cls in type(exc).__mro__)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Server-suggested wait from a Retry-After header, if present."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``per_minute`` tokens per minute, holding at
+    most ``capacity`` (default: one minute's worth). reserve() always takes
+    the tokens and returns how long the caller must wait before using them,
+    so concurrent callers queue up behind each other instead of racing.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimitScheduler:
+    """
+    Sits in front of the chat model: every request first takes its share of
+    the request (RPM) and token (TPM) buckets, and retryable failures (429,
+    5xx, connection errors) are retried with exponential backoff and full
+    jitter. Concurrency is adjusted AIMD-style: each throttled response
+    halves the number of requests allowed in flight, each success adds
+    1/limit, up to ``max_concurrency``. The limit covers threads using
+    call() and coroutines using acall() alike.
+    """
+
+    def __init__(
+        self,
+        rpm: float | None = None,
+        tpm: float | None = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_concurrency: int = 1,
+        min_concurrency: int = 1,
+    ):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max(max_concurrency, 1)
+        self.min_concurrency = max(min(min_concurrency, self.max_concurrency), 1)
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._cond = None
+        self._loop = None
+        self._stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0, "waited_s": 0.0}
+
+    # -----------------------------------------------------
+
+    def _admission_delay(self, tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["waited_s"] += delay
+        return delay
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        suggested = retry_after(exc)
+        if suggested is not None:
+            return min(suggested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def _on_failure(self, exc: BaseException, attempt: int) -> bool:
+        """Record a failed attempt; returns True when it should be retried."""
+        retry = is_retryable(exc) and attempt < self.max_retries
+        with self._lock:
+            if error_status(exc) == 429:
+                self._stats["throttled"] += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            if retry:
+                self._stats["retries"] += 1
+            else:
+                self._stats["failed"] += 1
+        if retry:
+            logger.warning(
+                "LLM request failed, retrying | status=%s | attempt=%d | concurrency_limit=%.1f",
+                error_status(exc),
+                attempt + 1,
+                self.limit,
+            )
+        return retry
+
+    # -----------------------------------------------------
+
+    def call(self, func, tokens: int = 0):
+        """Run ``func()`` under the limits, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._admission_delay(tokens))
+            with self._slot_freed:
+                self._slot_freed.wait_for(lambda: self.in_flight < int(self.limit))
+                self.in_flight += 1
+            try:
+                result = func()
+            except Exception as exc:
+                if not self._on_failure(exc, attempt):
+                    raise
+                retry_in = self._backoff(attempt, exc)
+            else:
+                self._on_success()
+                return result
+            finally:
+                self._release_slot()
+            time.sleep(retry_in)
+
+    async def acall(self, func, tokens: int = 0):
+        """Async counterpart of call(); ``func()`` returns an awaitable."""
+        cond = self._condition()
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._admission_delay(tokens))
+            async with cond:
+                await cond.wait_for(self._try_acquire)
+            try:
+                result = await func()
+            except Exception as exc:
+                if not self._on_failure(exc, attempt):
+                    raise
+                retry_in = self._backoff(attempt, exc)
+            else:
+                self._on_success()
+                return result
+            finally:
+                self._release_slot()
+                async with cond:
+                    cond.notify_all()
+            await asyncio.sleep(retry_in)
+
+    def _condition(self) -> asyncio.Condition:
+        # Each asyncio.run() starts a new loop; conditions are loop-bound
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._cond = loop, asyncio.Condition()
+        return self._cond
+
+    def _try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release_slot(self) -> None:
+        # Coroutines waiting in acall() are woken by their own loop's
+        # releases; one scheduler normally serves either threads or a loop
+        with self._slot_freed:
+            self.in_flight -= 1
+            self._slot_freed.notify_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "waited_s": round(self._stats["waited_s"], 3),
+                "concurrency_limit": round(self.limit, 2),
+            }
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from src.schema.modeloutput import ClaimRiskSignals
+from src.triage import metrics
+from src.triage.cache import LLMResponseCache
+from src.triage.features import process_features
+from src.triage.ingest import SIGNAL_MODES, ClaimInput, _clean_chunk, extract_signals_deduplicated
+from src.triage.predict import predict_frame
+from src.triage.ratelimit import RateLimitScheduler
+from src.triage.synth import generate_records
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted (bytes)
+MAX_BODY_BYTES = 10 * 2 ** 20
+
+
+class TriageService:
+    """
+    Warm, thread-safe scorer behind ``triage serve``: the LLM client, its
+    response cache and rate-limit scheduler are built once and shared by
+    every request. Concurrent extraction of all requests runs on one
+    long-lived event loop, so the scheduler's concurrency limit holds
+    across requests. Claims go through the same validation, extraction,
+    feature merge and scoring as ``triage run`` and give the same
+    predictions.csv fields.
+    """
+
+    def __init__(
+        self,
+        signal_mode: str = "llm",
+        llm_backend: str | None = None,
+        llm_concurrency: int = 1,
+        claims_per_call: int = 1,
+        cache: LLMResponseCache | None = None,
+        scheduler: RateLimitScheduler | None = None,
+    ):
+        if signal_mode not in SIGNAL_MODES:
+            raise ValueError(f"Unknown signal_mode {signal_mode!r}; expected one of {SIGNAL_MODES}")
+        self.signal_mode = signal_mode
+        self.llm_concurrency = llm_concurrency
+        self.claims_per_call = claims_per_call
+        self.cache = cache
+
+        self.llm = None
+        if signal_mode != "keywords":
+            from src.triage.model import GetFromLlm
+
+            self.llm = GetFromLlm(
+                cache=cache,
+                semantic_only=signal_mode == "hybrid",
+                scheduler=scheduler,
+                backend=llm_backend,
+            )
+
+        self._loop = None
+        if self.llm is not None and llm_concurrency > 1:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="triage-llm-loop", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the extraction event loop."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    # -----------------------------------------------------
+
+    def warm_up(self) -> None:
+        """Score one synthetic claim so first requests do not pay lazy initialisation."""
+        start = time.perf_counter()
+        claim = generate_records(1, rng=0).iloc[0].to_dict()
+        self.score([claim])
+        logger.info("Service warmed up | seconds=%.3f", time.perf_counter() - start)
+
+    def score(self, claims: list[dict]) -> list[dict]:
+        """
+        Predictions for each claim, in order. A claim that fails validation
+        or signal extraction gets ``{"case_id": ..., "error": ...}`` instead.
+        """
+        raw = pd.DataFrame(claims).reindex(columns=list(ClaimInput.model_fields))
+        case_ids = raw["case_id"].tolist()
+        records, _, anomalies = _clean_chunk(raw)
+        invalid = {a["case_id"]: a["errors"] for a in anomalies}
+
+        predictions, failed = {}, set()
+        if len(records):
+            results, _ = extract_signals_deduplicated(
+                self.llm,
+                records,
+                concurrency=self.llm_concurrency,
+                claims_per_call=self.claims_per_call,
+                signal_mode=self.signal_mode,
+                loop=self._loop,
+            )
+            extracted = pd.Series([r is not None for r in results], index=records.index)
+            failed = set(records.loc[~extracted, "case_id"])
+            records = records[extracted].reset_index(drop=True)
+            metrics.increment("serve_extraction_failures", len(failed))
+            signals = pd.DataFrame(
+                [r.model_dump() for r in results if r is not None],
+                columns=list(ClaimRiskSignals.model_fields),
+            )
+        if len(records):
+            processed = process_features(records=records, signals=signals, persist=False)
+            scored = predict_frame(processed).astype(object)
+            scored = scored.where(scored.notna(), None)
+            predictions = {row["case_id"]: row for row in scored.to_dict("records")}
+
+        out = []
+        for case_id in case_ids:
+            if pd.isna(case_id):
+                out.append({"case_id": None, "error": "missing case_id"})
+            elif case_id in invalid:
+                out.append({"case_id": case_id, "error": "validation failed", "errors": invalid[case_id]})
+            elif case_id in failed:
+                out.append({"case_id": case_id, "error": "extraction failed"})
+            else:
+                out.append(predictions[case_id])
+        return out
+
+
+# -----------------------------------------------------
+# HTTP front end
+# -----------------------------------------------------
+
+class TriageRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /score: JSON lines of raw claim records in, JSON lines of
+    predictions out. GET /metrics: Prometheus text. GET /health.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(HTTPStatus.OK, b'{"status": "ok"}\n', "application/json")
+        elif self.path == "/metrics":
+            payload = metrics.registry.to_prometheus().encode("utf-8")
+            self._reply(HTTPStatus.OK, payload, "text/plain; version=0.0.4")
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"unknown path {self.path}")
+
+    def do_POST(self):
+        if self.path != "/score":
+            self._error(HTTPStatus.NOT_FOUND, f"unknown path {self.path}")
+            return
+
+        start = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body exceeds {MAX_BODY_BYTES} bytes")
+            return
+        body = self.rfile.read(length).decode("utf-8")
+
+        try:
+            claims = [json.loads(line) for line in body.splitlines() if line.strip()]
+            if not all(isinstance(c, dict) for c in claims):
+                raise ValueError("every line must be a JSON object")
+        except ValueError as exc:
+            metrics.increment("serve_bad_requests")
+            self._error(HTTPStatus.BAD_REQUEST, f"invalid JSON lines: {exc}")
+            return
+
+        try:
+            predictions = self.server.service.score(claims) if claims else []
+        except Exception:
+            logger.error("Scoring request failed | claims=%d", len(claims), exc_info=True)
+            metrics.increment("serve_errors")
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "scoring failed")
+            return
+
+        payload = "".join(json.dumps(p) + "\n" for p in predictions).encode("utf-8")
+        self._reply(HTTPStatus.OK, payload, "application/x-ndjson")
+
+        elapsed = time.perf_counter() - start
+        metrics.observe("serve_request_seconds", elapsed)
+        metrics.increment("serve_requests")
+        metrics.increment("serve_claims", len(claims))
+        logger.debug("Scored request | claims=%d | seconds=%.4f", len(claims), elapsed)
+
+    # -----------------------------------------------------
+
+    def _reply(self, status: HTTPStatus, payload: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        self._reply(status, (json.dumps({"error": message}) + "\n").encode("utf-8"), "application/json")
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+
+class _ServiceMixin:
+    daemon_threads = True
+
+    def __init__(self, address, service: TriageService):
+        self.service = service
+        super().__init__(address, TriageRequestHandler)
+
+
+class TriageHTTPServer(_ServiceMixin, ThreadingHTTPServer):
+    """One thread per connection on a TCP address."""
+
+
+class TriageUnixServer(_ServiceMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """One thread per connection on a Unix domain socket."""
+
+
+def serve(
+    service: TriageService,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    unix_socket: str | None = None,
+) -> None:
+    """Serve ``service`` until interrupted, on ``unix_socket`` if given, else on host:port."""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = TriageUnixServer(unix_socket, service)
+        where = unix_socket
+    else:
+        server = TriageHTTPServer((host, port), service)
+        where = "http://%s:%d" % server.server_address[:2]
+
+    logger.info("Triage service listening | address=%s | signal_mode=%s", where, service.signal_mode)
+    print(f"Triage service listening on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Triage service interrupted")
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        logger.info("Triage service stopped")
@@ -0,0 +1,194 @@
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.schema.modeloutput import ClaimRiskSignals
+from src.triage.cache import schema_version
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "triage_state.sqlite"
+
+# predictions.csv columns kept per case_id
+PREDICTION_COLUMNS = [
+    "case_id",
+    "priority",
+    "risk_score",
+    "recommended_action",
+    "extracted_signals",
+    "confidence",
+    "rationale",
+]
+
+
+def fingerprint_records(records: pd.DataFrame) -> np.ndarray:
+    """64-bit content hash of every validated record (all of its fields)."""
+    hashes = pd.util.hash_pandas_object(records, index=False)
+    # SQLite integers are signed
+    return hashes.to_numpy().view(np.int64)
+
+
+class IncrementalState:
+    """
+    SQLite store of the last run's results per case_id: a content
+    fingerprint of the validated record, its signals and its prediction.
+
+    During a run, changed() filters each chunk down to the new or modified
+    records, and the ones whose signals were really extracted are staged
+    with them; commit() stores their predictions and returns predictions
+    for the whole input, unchanged rows coming from the store. Rows whose
+    extraction failed or fell back to keyword signals are not stored, so
+    the next run retries them. Nothing is written before commit(), so an
+    interrupted run leaves the previous state intact. The store is cleared
+    when ``config`` (signal mode, scoring priors, ...) or the signal schema
+    differs from the run that wrote it.
+    """
+
+    def __init__(self, path: str, config: dict | None = None):
+        self.path = str(path)
+        self.config = json.dumps(
+            {**(config or {}), "signals_schema": schema_version(ClaimRiskSignals)},
+            sort_keys=True,
+        )
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS state_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS case_state (
+                case_id TEXT PRIMARY KEY,
+                fingerprint INTEGER NOT NULL,
+                signals TEXT,
+                priority TEXT,
+                risk_score REAL,
+                recommended_action TEXT,
+                extracted_signals TEXT,
+                confidence INTEGER,
+                rationale TEXT,
+                updated_at REAL NOT NULL
+            );
+            """
+        )
+        row = self._conn.execute("SELECT value FROM state_meta WHERE key = 'config'").fetchone()
+        if row is not None and row[0] != self.config:
+            logger.warning(
+                "Incremental state built with another configuration; starting over | "
+                "path=%s | stored=%s | current=%s",
+                self.path,
+                row[0],
+                self.config,
+            )
+            self._conn.execute("DELETE FROM case_state")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state_meta VALUES ('config', ?)", (self.config,)
+        )
+        self._conn.commit()
+
+        self._known = pd.read_sql(
+            "SELECT case_id, fingerprint FROM case_state", self._conn, index_col="case_id"
+        )["fingerprint"]
+        logger.info("Incremental state opened | path=%s | cases=%d", self.path, len(self._known))
+
+        self.input_case_ids = []
+        self.rows = self.changed_rows = 0
+        self._staged_fingerprints = {}
+        self._staged_signals = {}
+
+    # -----------------------------------------------------
+
+    def changed(self, records: pd.DataFrame) -> pd.DataFrame:
+        """Return the new or modified records of a validated chunk, staging their fingerprints."""
+        fingerprints = fingerprint_records(records)
+        known = records["case_id"].isin(self._known.index).to_numpy()
+        stored = self._known.reindex(records["case_id"], fill_value=0).to_numpy()
+        mask = ~known | (stored != fingerprints)
+
+        self.input_case_ids.append(records["case_id"].to_numpy())
+        self.rows += len(records)
+        self.changed_rows += int(mask.sum())
+        self._staged_fingerprints.update(
+            zip(records["case_id"].to_numpy()[mask].tolist(), fingerprints[mask].tolist())
+        )
+        logger.info(
+            "Incremental plan | rows=%d | changed=%d | unchanged=%d",
+            len(records),
+            int(mask.sum()),
+            len(records) - int(mask.sum()),
+        )
+        return records[mask].reset_index(drop=True)
+
+    def stage_signals(self, case_id: str, signals: ClaimRiskSignals | None) -> None:
+        """Mark a changed row as done: its prediction is stored on commit()."""
+        if signals is not None:
+            self._staged_signals[case_id] = signals.model_dump_json()
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows,
+            "changed_rows": self.changed_rows,
+            "unchanged_rows": self.rows - self.changed_rows,
+        }
+
+    # -----------------------------------------------------
+
+    def commit(self, predictions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store the predictions of the staged rows, then return predictions
+        for every case_id of this run's input, in input order: this run's
+        ``predictions`` for the changed rows, the store for the rest.
+        """
+        now = time.time()
+        fresh = predictions[PREDICTION_COLUMNS]
+        staged = fresh[fresh["case_id"].isin(list(self._staged_signals))].astype(object)
+        staged = staged.where(staged.notna(), None)
+        rows = [
+            (
+                case_id,
+                self._staged_fingerprints[case_id],
+                self._staged_signals.get(case_id),
+                priority,
+                risk_score,
+                action,
+                extracted,
+                confidence,
+                rationale,
+                now,
+            )
+            for case_id, priority, risk_score, action, extracted, confidence, rationale
+            in staged.itertuples(index=False, name=None)
+        ]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO case_state VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self._conn.commit()
+        logger.info(
+            "Incremental state updated | path=%s | rows=%d | left_for_retry=%d",
+            self.path,
+            len(rows),
+            len(fresh) - len(rows),
+        )
+
+        stored = pd.read_sql(
+            f"SELECT {', '.join(PREDICTION_COLUMNS)} FROM case_state",
+            self._conn,
+            index_col="case_id",
+        )
+        merged = pd.concat([
+            stored[~stored.index.isin(fresh["case_id"])],
+            fresh.set_index("case_id"),
+        ])
+        order = np.concatenate(self.input_case_ids) if self.input_case_ids else np.array([], dtype=object)
+        return merged.reindex(pd.Index(order, name="case_id")).reset_index()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,269 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Intermediate tables handed between pipeline stages. Parquet keeps dtypes
+# (categoricals included) and writes compressed column chunks; CSV is kept
+# as an export option for inspecting the artefacts by hand
+STORAGE_FORMATS = ("parquet", "csv")
+DEFAULT_STORAGE_FORMAT = "parquet"
+PARQUET_COMPRESSION = "zstd"
+
+# Stage artefacts, relative to the run's data directory (default: data/)
+PREPROCESSED_TABLE = "pre-processeddata/preprocessed_data"
+SIGNALS_DIR = "llmdata"
+PROCESSED_TABLE = "processeddata/processeddf"
+
+# Index of the signal batches written by the extraction step
+MANIFEST_NAME = "manifest.json"
+
+
+class ManifestError(ValueError):
+    """Raised when the batch files on disk disagree with their manifest."""
+    pass
+
+
+def enum_fields(model_cls) -> list[str]:
+    """Names of the fields of a pydantic model whose type is an Enum; stored as categoricals."""
+    return [
+        name
+        for name, field in model_cls.model_fields.items()
+        if isinstance(field.annotation, type) and issubclass(field.annotation, Enum)
+    ]
+
+
+def table_path(stem: str | Path, storage_format: str = DEFAULT_STORAGE_FORMAT) -> Path:
+    """Path of the artefact ``stem`` (given without suffix) in ``storage_format``."""
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(
+            f"Unknown storage_format {storage_format!r}; expected one of {STORAGE_FORMATS}"
+        )
+    return Path(f"{stem}.{storage_format}")
+
+
+def _arrow_schema(df: pd.DataFrame, categorical) -> pa.Schema:
+    """
+    Arrow schema for ``df``: columns listed in ``categorical`` become
+    dictionary-encoded strings and all-null columns are typed as strings,
+    so every chunk appended to the same file gets the same schema.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for name in schema.names:
+        i = schema.get_field_index(name)
+        if name in categorical:
+            schema = schema.set(i, pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        elif pa.types.is_null(schema.field(name).type):
+            schema = schema.set(i, pa.field(name, pa.string()))
+    return schema
+
+
+class TableWriter:
+    """
+    Writes one artefact in chunks: parquet chunks become row groups of a
+    single file, CSV chunks are appended below one header.
+    """
+
+    def __init__(
+        self,
+        stem: str | Path,
+        storage_format: str = DEFAULT_STORAGE_FORMAT,
+        categorical=(),
+    ):
+        self.path = table_path(stem, storage_format)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.storage_format = storage_format
+        self.categorical = set(categorical)
+        self.rows = 0
+        self._schema = None
+        self._parquet = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.storage_format == "csv":
+            df.to_csv(
+                self.path,
+                index=False,
+                mode="w" if self._schema is None else "a",
+                header=self._schema is None,
+            )
+            self._schema = True
+        else:
+            if self._schema is None:
+                self._schema = _arrow_schema(df, self.categorical)
+                self._parquet = pq.ParquetWriter(
+                    self.path, self._schema, compression=PARQUET_COMPRESSION
+                )
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._parquet.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_table(
+    df: pd.DataFrame,
+    stem: str | Path,
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    categorical=(),
+) -> Path:
+    """Write ``df`` as the artefact ``stem``; returns the path written."""
+    with TableWriter(stem, storage_format, categorical) as writer:
+        writer.write(df)
+    logger.debug("Table written | rows=%d | path=%s", len(df), writer.path)
+    return writer.path
+
+
+def read_table(
+    stem: str | Path,
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """Read the artefact ``stem`` back into a DataFrame."""
+    path = table_path(stem, storage_format)
+    return _parse_table(path, storage_format, columns)
+
+
+def _parse_table(source, storage_format: str, columns: list[str] | None = None) -> pd.DataFrame:
+    if storage_format == "csv":
+        return pd.read_csv(source, usecols=columns)
+    # ParquetFile skips the dataset discovery done by pq.read_table
+    return pq.ParquetFile(source).read(columns=columns).to_pandas()
+
+
+# -----------------------------------------------------
+# Batch manifest
+# -----------------------------------------------------
+
+def batch_entry(path: Path, df: pd.DataFrame) -> dict:
+    """Manifest entry for a batch file just written from ``df``."""
+    case_ids = df["case_id"]
+    return {
+        "file": path.name,
+        "rows": len(df),
+        "first_case_id": case_ids.iloc[0] if len(df) else None,
+        "last_case_id": case_ids.iloc[-1] if len(df) else None,
+        "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+    }
+
+
+def write_manifest(directory: str | Path, batches: list[dict], storage_format: str) -> Path:
+    """Atomically (re)write the manifest listing ``batches`` in ``directory``."""
+    path = Path(directory) / MANIFEST_NAME
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"storage_format": storage_format, "batches": batches}, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def read_manifest(directory: str | Path) -> dict | None:
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _read_raw(source, storage_format: str):
+    """A batch as a pyarrow Table (parquet) or DataFrame (csv), before concatenation."""
+    if storage_format == "csv":
+        return pd.read_csv(source)
+    return pq.ParquetFile(source).read()
+
+
+def _read_batch(directory: Path, entry: dict, storage_format: str):
+    """Read one listed batch, checking its checksum and row count."""
+    path = directory / entry["file"]
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        raise ManifestError(f"Batch {path} listed in the manifest is missing") from None
+
+    if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+        raise ManifestError(f"Checksum mismatch for batch {path}")
+
+    buffer = io.BytesIO(data) if storage_format == "csv" else pa.BufferReader(data)
+    batch = _read_raw(buffer, storage_format)
+    if len(batch) != entry["rows"]:
+        raise ManifestError(
+            f"Batch {path} holds {len(batch)} rows, manifest lists {entry['rows']}"
+        )
+    return batch
+
+
+def _legacy_entries(directory: Path, storage_format: str) -> list[dict]:
+    """Batches of runs that predate the manifest, in llm_out{n} order."""
+    pattern = re.compile(rf"llm_out(\d+)\.{storage_format}$")
+    numbered = []
+    for path in directory.glob(f"llm_out*.{storage_format}"):
+        match = pattern.match(path.name)
+        if match:
+            numbered.append((int(match.group(1)), path))
+    return [{"file": path.name} for _, path in sorted(numbered)]
+
+
+def load_batches(
+    directory: str | Path,
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    workers: int = 1,
+) -> pd.DataFrame | None:
+    """
+    Read every batch listed in ``directory``'s manifest, in manifest order,
+    and concatenate them once (parquet batches as Arrow tables, converted to
+    pandas in a single pass). Without a manifest the llm_out{n} files found
+    on disk are used instead. ``workers`` > 1 reads the files from a thread
+    pool. Returns None when there is no batch.
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+
+    if manifest is None:
+        logger.warning("No batch manifest in %s; globbing llm_out files", directory)
+        entries = _legacy_entries(directory, storage_format)
+
+        def read(entry):
+            return _read_raw(directory / entry["file"], storage_format)
+    else:
+        entries = manifest["batches"]
+        storage_format = manifest["storage_format"]
+
+        def read(entry):
+            return _read_batch(directory, entry, storage_format)
+
+    logger.info(
+        "Loading LLM batches | dir=%s | batches=%d | workers=%d",
+        directory,
+        len(entries),
+        workers,
+    )
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(read, entries))
+    else:
+        batches = [read(entry) for entry in entries]
+
+    if not batches:
+        return None
+    if storage_format == "csv":
+        return pd.concat(batches, ignore_index=True)
+    return pa.concat_tables(batches).to_pandas()
@@ -0,0 +1,257 @@
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.triage import metrics
+from src.triage.encoding import PRIORITY_LEVELS, category_codes, decode_signals, is_value, lookup
+from src.triage.predict import BaseRiskPriors, ClaimTriageEvaluator, _round2
+from src.triage.storage import DEFAULT_STORAGE_FORMAT, PROCESSED_TABLE, read_table, table_path
+
+logger = logging.getLogger(__name__)
+
+SWEEP_RESULTS_FILE = "sweep_results.csv"
+SWEEP_REPORT_FILE = "sweep_report.md"
+
+# Configurations scored per batch of matrix operations; intermediates hold
+# gold cases x CONFIG_BLOCK floats
+CONFIG_BLOCK = 4096
+
+METRIC_COLUMNS = ["priority_accuracy", "priority_macro_f1", "action_accuracy"]
+
+
+def sweep_parameters(priors: BaseRiskPriors = BaseRiskPriors) -> dict[str, float]:
+    """Tunable priors and their current values: the signal weights, then the priority thresholds."""
+    return {
+        **priors.CORE_SIGNAL_WEIGHTS,
+        **priors.OPERATIONAL_SIGNAL_WEIGHTS,
+        **priors.PRIORITY_THRESHOLDS,
+    }
+
+
+def default_grid(priors: BaseRiskPriors = BaseRiskPriors) -> dict[str, list[float]]:
+    """Each core signal weight at 0.5x/1x/1.5x, each threshold within +/-0.075 in 0.025 steps."""
+    grid = {
+        name: [round(weight * factor, 4) for factor in (0.5, 1.0, 1.5)]
+        for name, weight in priors.CORE_SIGNAL_WEIGHTS.items()
+    }
+    grid.update({
+        name: [round(threshold + step * 0.025, 3) for step in range(-3, 4)]
+        for name, threshold in priors.PRIORITY_THRESHOLDS.items()
+    })
+    return grid
+
+
+def expand_grid(grid: dict[str, list[float]], priors: BaseRiskPriors = BaseRiskPriors) -> pd.DataFrame:
+    """
+    One row per combination of the ``grid`` values, parameters missing from
+    ``grid`` kept at their current value. Combinations whose thresholds are
+    not strictly decreasing (P0 > P1 > P2) are dropped.
+    """
+    params = sweep_parameters(priors)
+    unknown = set(grid) - set(params)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {sorted(unknown)}; expected some of {list(params)}")
+
+    axes = [np.asarray(grid.get(name, [value]), dtype=np.float64) for name, value in params.items()]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    configs = pd.DataFrame({name: values.ravel() for name, values in zip(params, mesh)})
+
+    p0, p1, p2 = (configs[name] for name in priors.PRIORITY_THRESHOLDS)
+    return configs[(p0 > p1) & (p1 > p2)].reset_index(drop=True)
+
+
+class SweepMatrix:
+    """
+    The gold cases' processed rows encoded once as numbers: their weighted
+    signals as a (cases x signals) matrix, the weight-independent part of
+    the risk score, and the action each priority would give them.
+    evaluate() then scores any number of weight and threshold
+    configurations with batched array operations, in the same order of
+    floating point operations as ClaimTriageEvaluator.score_batch.
+    """
+
+    def __init__(self, processed: pd.DataFrame, gold: pd.DataFrame, priors: BaseRiskPriors = BaseRiskPriors):
+        gold = gold.rename(
+            columns={
+                "expected_priority": "gold_priority",
+                "expected_action": "gold_action",
+            }
+        )
+        eval_df = processed.merge(
+            gold[["case_id", "gold_priority", "gold_action"]],
+            on="case_id",
+            how="inner",
+        )
+        if eval_df.empty:
+            raise ValueError("None of the gold case_ids are in the processed table")
+        self.rows = len(eval_df)
+
+        self.weight_names = [*priors.CORE_SIGNAL_WEIGHTS, *priors.OPERATIONAL_SIGNAL_WEIGHTS]
+        self.threshold_names = list(priors.PRIORITY_THRESHOLDS)
+        self.signals = np.column_stack([
+            lookup(eval_df[col], priors.YES_NO_MAP, default=0.25) for col in self.weight_names
+        ])
+
+        base_jur = lookup(eval_df["jurisdiction"], priors.JURISDICTION_RISK)
+        service_mult = lookup(eval_df["service_line"], priors.SERVICE_LINE_MULTIPLIER)
+        self.base_terms = [
+            np.minimum(base_jur * service_mult, 0.50),
+            lookup(eval_df["client_segment"], priors.CLIENT_SEGMENT_RISK) * 0.15,
+            lookup(eval_df["claim_value_band"], priors.CLAIM_VALUE_RISK) * 0.20,
+        ]
+        self.uncertain = np.column_stack([
+            is_value(eval_df[col], "No data available") for col in priors.UNCERTAINTY_SIGNALS
+        ])
+
+        self.gold_codes = category_codes(eval_df["gold_priority"], PRIORITY_LEVELS)
+        self.gold_counts = np.array([(self.gold_codes == k).sum() for k in range(len(PRIORITY_LEVELS))])
+
+        # Actions only depend on the row and its priority: one column per level
+        evaluator = ClaimTriageEvaluator()
+        rows = decode_signals(eval_df).to_dict("records")
+        actions = np.array(
+            [[evaluator.determine_action(row, None, level) for level in PRIORITY_LEVELS] for row in rows],
+            dtype=object,
+        )
+        self.action_hits = actions == eval_df["gold_action"].to_numpy(dtype=object)[:, None]
+
+        logger.info("Sweep matrix built | gold_cases=%d | weights=%d", self.rows, len(self.weight_names))
+
+    # -----------------------------------------------------
+
+    def evaluate(self, configs: pd.DataFrame) -> pd.DataFrame:
+        """Accuracy, macro-F1 (as validate.evaluation computes them) and action accuracy per configuration."""
+        weights = configs[self.weight_names].to_numpy(dtype=np.float64)
+        thresholds = configs[self.threshold_names].to_numpy(dtype=np.float64)
+
+        blocks = [
+            self._evaluate_block(weights[start:start + CONFIG_BLOCK], thresholds[start:start + CONFIG_BLOCK])
+            for start in range(0, len(configs), CONFIG_BLOCK)
+        ]
+        results = np.concatenate(blocks) if blocks else np.empty((0, len(METRIC_COLUMNS)))
+        return pd.DataFrame(results, columns=METRIC_COLUMNS, index=configs.index)
+
+    def _evaluate_block(self, weights: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+        # Risk scores: (cases x configs)
+        score = np.zeros((self.rows, len(weights)), dtype=np.float64)
+        for j in range(len(self.weight_names)):
+            score += self.signals[:, j, None] * weights[:, j]
+        for term in self.base_terms:
+            score += term[:, None]
+        for u in range(self.uncertain.shape[1]):
+            score = np.where(self.uncertain[:, u, None], score - 0.03, score)
+        risk_score = _round2(np.maximum(np.minimum(score, 1.0), 0.0).ravel()).reshape(score.shape)
+
+        # Priority codes: the highest level whose threshold is met, else P3
+        priority = np.full(score.shape, len(PRIORITY_LEVELS) - 1, dtype=np.int8)
+        for level in reversed(range(thresholds.shape[1])):
+            priority[risk_score >= thresholds[:, level]] = level
+
+        correct = priority == self.gold_codes[:, None]
+        f1 = np.zeros((len(PRIORITY_LEVELS), len(weights)))
+        for k in range(len(PRIORITY_LEVELS)):
+            predicted = priority == k
+            true_positives = (predicted & correct).sum(axis=0)
+            denominator = predicted.sum(axis=0) + self.gold_counts[k]
+            # Labels absent from both gold and predictions score 0, as in sklearn
+            np.divide(2 * true_positives, denominator, out=f1[k], where=denominator > 0)
+
+        action_hits = self.action_hits[np.arange(self.rows)[:, None], priority]
+
+        return np.column_stack([
+            correct.mean(axis=0),
+            f1.mean(axis=0),
+            action_hits.mean(axis=0),
+        ])
+
+
+# =====================================================
+# Command
+# =====================================================
+
+def run_sweep(
+    gold_path: str,
+    data_dir: str = "data",
+    storage_format: str = DEFAULT_STORAGE_FORMAT,
+    grid: dict[str, list[float]] | None = None,
+    outdir: str = "outputs",
+    top: int = 10,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Score every configuration of ``grid`` (default_grid() when None)
+    against the gold labels, using the signals persisted by
+    ``triage run --persist-intermediates``. No LLM calls are made.
+
+    Returns the results sorted best first and the current priors' metrics,
+    and writes sweep_results.csv and sweep_report.md to ``outdir``.
+    """
+    processed_path = table_path(Path(data_dir) / PROCESSED_TABLE, storage_format)
+    if not processed_path.exists():
+        raise FileNotFoundError(
+            f"No processed table at {processed_path}; "
+            "run `triage run --persist-intermediates` with the same --data-dir first"
+        )
+
+    columns = ["case_id", *ClaimTriageEvaluator.scoring_key_columns()]
+    with metrics.span("sweep_load") as span:
+        processed = read_table(Path(data_dir) / PROCESSED_TABLE, storage_format, columns=columns)
+        gold = pd.read_csv(gold_path)
+        matrix = SweepMatrix(processed, gold)
+        span.rows = matrix.rows
+    logger.info("Sweep inputs loaded | processed_rows=%d | gold_cases=%d", len(processed), matrix.rows)
+
+    configs = expand_grid(grid if grid is not None else default_grid())
+    start = time.perf_counter()
+    with metrics.span("sweep", rows=len(configs)):
+        results = pd.concat([configs, matrix.evaluate(configs)], axis=1)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Sweep completed | configurations=%d | seconds=%.3f | per_second=%.0f",
+        len(configs),
+        elapsed,
+        len(configs) / elapsed if elapsed else 0.0,
+    )
+
+    baseline = pd.DataFrame([sweep_parameters()])
+    baseline = pd.concat([baseline, matrix.evaluate(baseline)], axis=1).iloc[0]
+
+    results = results.sort_values(
+        ["priority_macro_f1", "priority_accuracy", "action_accuracy"],
+        ascending=False,
+        kind="stable",
+    ).reset_index(drop=True)
+
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    results.to_csv(outdir / SWEEP_RESULTS_FILE, index=False)
+    _write_report(outdir / SWEEP_REPORT_FILE, results, baseline, matrix.rows, elapsed, top)
+    logger.info("Sweep results written to %s", outdir / SWEEP_RESULTS_FILE)
+
+    return results, baseline
+
+
+def _write_report(path: Path, results: pd.DataFrame, baseline: pd.Series, gold_cases: int, elapsed: float, top: int):
+    with open(path, "w") as f:
+        f.write("# Weight Sweep Report\n\n")
+
+        f.write("## Dataset\n")
+        f.write(f"- Gold cases: {gold_cases}\n")
+        f.write(f"- Configurations: {len(results)}\n")
+        f.write(f"- Sweep seconds: {elapsed:.2f}\n\n")
+
+        f.write("## Current Priors\n")
+        for col in METRIC_COLUMNS:
+            f.write(f"- {col}: {baseline[col]:.3f}\n")
+        f.write("\n")
+
+        f.write(f"## Top {min(top, len(results))} Configurations\n")
+        f.write(summary_table(results, top))
+        f.write("\n")
+
+
+def summary_table(results: pd.DataFrame, top: int = 10) -> str:
+    """Markdown table of the ``top`` configurations."""
+    return results.head(top).to_markdown(index=False, floatfmt=".3f")
@@ -0,0 +1,309 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Synthetic claim records following data/InterviewTask/AI/DataDictionary.md.
+# Distributions, sentence templates, missingness and noise rates were
+# measured on the 20k-row records.csv, so generated files exercise the
+# validation, dedup, keyword and scoring paths the same way at any size.
+
+RECORD_COLUMNS = [
+    "case_id",
+    "received_at",
+    "client_segment",
+    "jurisdiction",
+    "service_line",
+    "claim_value_band",
+    "attachments_present",
+    "free_text_summary",
+    "handler_notes",
+    "historical_outcome",
+]
+
+# value -> probability
+CLIENT_SEGMENTS = {"SMB": 0.556, "Mid-Market": 0.297, "Enterprise": 0.147}
+JURISDICTIONS = {"UK": 0.498, "EU": 0.222, "US": 0.2, "Other": 0.08}
+SERVICE_LINES = {"Insurance": 0.545, "Legal": 0.254, "Advisory": 0.201}
+CLAIM_VALUE_BANDS = {"<50k": 0.377, "50k-250k": 0.319, "250k-1m": 0.168, ">1m": 0.081, "Unknown": 0.055}
+HISTORICAL_OUTCOMES = {"Unknown": 0.459, "Accepted": 0.239, "Rejected": 0.164, "Escalated": 0.082, "Settled": 0.056}
+ATTACHMENTS_RATE = 0.61
+
+# Share of missing values per enum column (~1% in records.csv)
+ENUM_MISSING_RATE = 0.01
+HANDLER_NOTES_MISSING_RATE = 0.353
+
+RECEIVED_FROM = pd.Timestamp("2024-10-01", tz="UTC")
+RECEIVED_TO = pd.Timestamp("2025-01-01", tz="UTC")
+
+# free_text_summary = opener. detail. [keyword.] [documents.] [cross-border.]
+#                     [jurisdiction note.] [conflict.]
+OPENERS = {
+    "Insurance": [
+        "Client reports storm-related damage",
+        "Incident reported at commercial premises",
+        "Business interruption may apply",
+        "Damage reported following heavy rainfall",
+        "Loss event impacting property and contents",
+    ],
+    "Legal": [
+        "Dispute escalated to legal threat",
+        "Employment dispute raised by former contractor",
+        "Potential breach of contract raised",
+        "Formal letter received from counterparty",
+        "IP infringement allegation received",
+    ],
+    "Advisory": [
+        "Operational risk assessment requested",
+        "Client requesting advice on regulatory exposure",
+        "Client seeks decision support on risk controls",
+        "Strategic risk review requested following acquisition",
+        "Request for compliance gap analysis",
+    ],
+}
+DETAILS = {
+    "Insurance": [
+        "Theft of equipment reported",
+        "Roof compromised",
+        "Water ingress noted",
+        "Basement affected",
+        "Fire damage to warehouse",
+    ],
+    "Legal": [
+        "Time-sensitive response required",
+        "Evidence currently limited",
+        "Multiple parties named",
+        "Jurisdiction disputed",
+        "Governing law unclear",
+    ],
+    "Advisory": [
+        "Regulator engagement anticipated",
+        "No immediate dispute",
+        "Scope unclear",
+        "Timeline not specified",
+        "Stakeholders across multiple regions",
+    ],
+}
+KEYWORDS = {
+    "low value": 0.061, "wear and tear": 0.061, "small crack": 0.06,
+    "no supporting documentation": 0.059, "minor": 0.058, "breach of contract": 0.045,
+    "storm damage": 0.044, "flood zone": 0.044, "prior losses": 0.043, "ip infringement": 0.043,
+    "business interruption": 0.041, "flood zone 3": 0.041, "governing law unclear": 0.037,
+    "suspected arson": 0.015, "injunction": 0.015, "regulator visit": 0.015, "fire": 0.014,
+    "major fire": 0.014, "arson": 0.014, "class action": 0.013, "hurricane": 0.012,
+    "data protection incident": 0.012, "subsidence": 0.012,
+}
+KEYWORD_RATE = 0.55
+DOCUMENT_NOTES = [
+    "Supporting documents attached",
+    "Police reference number provided",
+    "No policy documents attached",
+    "Evidence not yet supplied",
+    "Loss adjuster appointed",
+    "No supporting documentation provided",
+    "Policy schedule attached",
+]
+DOCUMENT_RATE = 0.535
+CROSS_BORDER_NOTES = ["Overseas elements present", "Cross-border considerations likely"]
+CROSS_BORDER_RATE = 0.169
+JURISDICTION_NOTE_RATE = 0.081
+CONFLICT_NOTE = "Conflicting information reported by client"
+CONFLICT_RATE = 0.031
+
+# Noise seen in records.csv: misspellings, ".." separators and whole-text case changes
+TYPOS = {
+    "Jurisdiction": ["jurisidction", "jurisdction", "juridiction"],
+    "Governing law": ["govening law", "govering law"],
+    "documentation": ["documentaion", "documenation"],
+}
+TYPO_RATE = 0.03
+DOTTED_RATE = 0.009
+UPPER_RATE = 0.011
+LOWER_RATE = 0.0125
+
+HANDLER_NOTES = [
+    "Potential conflict in dates, needs review.",
+    "Duplicate of earlier report suspected.",
+    "Client requested urgent callback.",
+    "Caller sounded uncertain; follow-up likely required.",
+    "No additional notes.",
+    "Handler flagged missing attachments.",
+]
+HANDLER_SUFFIXES = {
+    "": 0.686,
+    " Check coverage exclusions.": 0.176,
+    " Consider limitation periods.": 0.076,
+    " Clarify scope and deliverables.": 0.062,
+}
+
+# Gold labels: priority mix of gold_cases.csv and the actions seen per priority
+GOLD_PRIORITIES = {"P0": 0.2, "P1": 0.3, "P2": 0.3, "P3": 0.2}
+GOLD_ACTIONS = {
+    "P0": {"Immediate escalation": 0.95, "Escalate for investigation": 0.05},
+    "P1": {
+        "Escalate for investigation": 0.733,
+        "Route to legal review": 0.184,
+        "Escalate for coverage review": 0.083,
+    },
+    "P2": {
+        "Proceed with standard handling": 0.583,
+        "Request further information": 0.4,
+        "Route to advisory intake": 0.017,
+    },
+    "P3": {
+        "Proceed with standard handling": 0.575,
+        "Reject claim": 0.35,
+        "Request further information": 0.075,
+    },
+}
+
+
+def _choice(rng: np.random.Generator, table: dict, size: int) -> np.ndarray:
+    values = np.array(list(table), dtype=object)
+    weights = np.array(list(table.values()), dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _blank(rng: np.random.Generator, values: np.ndarray, rate: float) -> np.ndarray:
+    values = values.copy()
+    values[rng.random(len(values)) < rate] = None
+    return values
+
+
+def _sentences(rng: np.random.Generator, pool: dict[str, list[str]], lines: np.ndarray) -> np.ndarray:
+    """One sentence per row, drawn from the row's service line entry of ``pool``."""
+    out = np.empty(len(lines), dtype=object)
+    for line, sentences in pool.items():
+        rows = np.flatnonzero(lines == line)
+        out[rows] = np.array(sentences, dtype=object)[rng.integers(len(sentences), size=len(rows))]
+    return out
+
+
+def _optional(rng: np.random.Generator, sentences: np.ndarray, rate: float) -> np.ndarray:
+    """``sentences`` where a row draws below ``rate``, None elsewhere."""
+    return np.where(rng.random(len(sentences)) < rate, sentences, None)
+
+
+def _misspell(rng: np.random.Generator, sentence: str) -> str:
+    for word, variants in TYPOS.items():
+        if word in sentence or word.lower() in sentence:
+            typo = variants[rng.integers(len(variants))]
+            return sentence.replace(word, typo).replace(word.lower(), typo)
+    return sentence
+
+
+def _summaries(rng: np.random.Generator, lines: np.ndarray, jurisdictions: np.ndarray) -> np.ndarray:
+    n = len(lines)
+    slots = [
+        _sentences(rng, OPENERS, lines),
+        _sentences(rng, DETAILS, lines),
+        _optional(rng, _choice(rng, KEYWORDS, n), KEYWORD_RATE),
+        _optional(rng, _choice(rng, dict.fromkeys(DOCUMENT_NOTES, 1), n), DOCUMENT_RATE),
+        _optional(rng, _choice(rng, dict.fromkeys(CROSS_BORDER_NOTES, 1), n), CROSS_BORDER_RATE),
+        _optional(
+            rng,
+            "Jurisdiction noted as " + np.where(pd.isna(jurisdictions), "Other", jurisdictions).astype(object),
+            JURISDICTION_NOTE_RATE,
+        ),
+        _optional(rng, np.full(n, CONFLICT_NOTE, dtype=object), CONFLICT_RATE),
+    ]
+
+    misspelt = rng.random(n) < TYPO_RATE
+    dotted = rng.random(n) < DOTTED_RATE
+    case = rng.random(n)
+
+    summaries = np.empty(n, dtype=object)
+    for i, parts in enumerate(zip(*slots)):
+        parts = [p for p in parts if p is not None]
+        if misspelt[i]:
+            parts = [_misspell(rng, p) for p in parts]
+        text = " ..  ".join(parts) + " .. " if dotted[i] else ". ".join(parts) + "."
+        if case[i] < UPPER_RATE:
+            text = text.upper()
+        elif case[i] < UPPER_RATE + LOWER_RATE:
+            text = text.lower()
+        summaries[i] = text
+    return summaries
+
+
+def generate_records(rows: int, rng: np.random.Generator | int = 0, start: int = 1) -> pd.DataFrame:
+    """
+    ``rows`` synthetic claim records with case_ids C-{start}, C-{start + 1}, ...
+    ``rng`` is a numpy Generator or a seed; the same seed gives the same frame.
+    """
+    rng = np.random.default_rng(rng)
+    width = max(5, len(str(start + rows - 1)))
+    ids = np.arange(start, start + rows)
+
+    span = (RECEIVED_TO - RECEIVED_FROM).total_seconds()
+    received = RECEIVED_FROM + pd.to_timedelta(rng.integers(0, int(span), size=rows), unit="s")
+
+    lines = _choice(rng, SERVICE_LINES, rows)
+    jurisdictions = _blank(rng, _choice(rng, JURISDICTIONS, rows), ENUM_MISSING_RATE)
+    notes = _blank(
+        rng,
+        _choice(rng, dict.fromkeys(HANDLER_NOTES, 1), rows) + _choice(rng, HANDLER_SUFFIXES, rows),
+        HANDLER_NOTES_MISSING_RATE,
+    )
+
+    return pd.DataFrame(
+        {
+            "case_id": [f"C-{i:0{width}d}" for i in ids],
+            "received_at": received.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+            "client_segment": _blank(rng, _choice(rng, CLIENT_SEGMENTS, rows), ENUM_MISSING_RATE),
+            "jurisdiction": jurisdictions,
+            # Summaries follow the service line even where it is then blanked
+            "service_line": _blank(rng, lines, ENUM_MISSING_RATE),
+            "claim_value_band": _choice(rng, CLAIM_VALUE_BANDS, rows),
+            "attachments_present": rng.random(rows) < ATTACHMENTS_RATE,
+            "free_text_summary": _summaries(rng, lines, jurisdictions),
+            "handler_notes": notes,
+            "historical_outcome": _choice(rng, HISTORICAL_OUTCOMES, rows),
+        },
+        columns=RECORD_COLUMNS,
+    )
+
+
+def write_records(
+    path: str | Path,
+    rows: int,
+    seed: int = 0,
+    chunk_rows: int = 500_000,
+) -> Path:
+    """Write ``rows`` synthetic records to CSV, ``chunk_rows`` at a time so memory stays bounded."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    for offset in range(0, rows, chunk_rows) or [0]:
+        chunk = generate_records(min(chunk_rows, rows - offset), rng, start=offset + 1)
+        chunk.to_csv(path, index=False, mode="w" if offset == 0 else "a", header=offset == 0)
+
+    logger.info("Synthetic records written | rows=%d | path=%s", rows, path)
+    return path
+
+
+def generate_gold(case_ids, rows: int, rng: np.random.Generator | int = 0) -> pd.DataFrame:
+    """Gold labels (gold_cases.csv layout) for ``rows`` case_ids sampled from ``case_ids``."""
+    rng = np.random.default_rng(rng)
+    case_ids = np.asarray(case_ids, dtype=object)
+    rows = min(rows, len(case_ids))
+    sample = np.sort(rng.choice(len(case_ids), size=rows, replace=False))
+
+    priorities = _choice(rng, GOLD_PRIORITIES, rows)
+    actions = np.empty(rows, dtype=object)
+    for priority, table in GOLD_ACTIONS.items():
+        mask = priorities == priority
+        actions[mask] = _choice(rng, table, int(mask.sum()))
+
+    return pd.DataFrame(
+        {
+            "case_id": case_ids[sample],
+            "expected_priority": priorities,
+            "expected_action": actions,
+            "notes": "synthetic gold",
+        }
+    )
@@ -0,0 +1,239 @@
+import csv
+import json
+import logging
+import threading
+from pathlib import Path
+
+from src.triage import metrics
+
+logger = logging.getLogger(__name__)
+
+# Token accounting for LLM extraction: every request's prompt/completion
+# tokens are accumulated per request, per row, per 500-row batch and per
+# run, optionally against a run budget, and written next to the data report.
+USAGE_FILE = "token_usage.json"
+USAGE_CALLS_FILE = "token_usage_calls.csv"
+USAGE_ROWS_FILE = "token_usage_rows.csv"
+USAGE_BATCHES_FILE = "token_usage_batches.csv"
+
+# Input rows per batch total (as LlmBatchWriter batches the signals)
+USAGE_BATCH_ROWS = 500
+
+# USD per million (prompt, completion) tokens, for the cost estimate
+TOKEN_PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised before a request that would take the run over its token budget."""
+
+
+class TokenLedger:
+    """
+    Thread-safe token accounting for one run.
+
+    Requests reserve their estimated size before they are sent (so
+    concurrent requests cannot jointly overshoot the budget) and record the
+    usage the model reports once they return. Once a reservation is refused
+    the ledger stays exhausted for the rest of the run.
+
+    Only running totals are kept in memory: with an ``output_dir`` the
+    per-request and per-row records are appended to CSVs as they arrive,
+    and batch totals as each batch of ``batch_rows`` input rows is stored.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        model_name: str | None = None,
+        output_dir: str | Path | None = None,
+        batch_rows: int = USAGE_BATCH_ROWS,
+    ):
+        self.max_tokens = max_tokens
+        self.model_name = model_name
+        self.batch_rows = batch_rows
+        self.estimated_tokens = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.reported_calls = 0
+        self.claims = 0
+        self.batches = 0
+        self.exhausted = False
+        self._reserved = 0
+        # Tokens of rows recorded but not yet assigned to a batch (at most a chunk)
+        self._unassigned = {}
+        self._batch = None
+        self._lock = threading.Lock()
+
+        self._files = []
+        self._calls_csv = self._rows_csv = self._batches_csv = None
+        if output_dir is not None:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self._calls_csv = self._open_csv(
+                output_dir / USAGE_CALLS_FILE,
+                ["call", "claims", "prompt_tokens", "completion_tokens", "reported"],
+            )
+            self._rows_csv = self._open_csv(
+                output_dir / USAGE_ROWS_FILE,
+                ["case_id", "call", "prompt_tokens", "completion_tokens"],
+            )
+            self._batches_csv = self._open_csv(
+                output_dir / USAGE_BATCHES_FILE,
+                ["batch", "rows", "prompt_tokens", "completion_tokens", "total_tokens"],
+            )
+
+    def _open_csv(self, path: Path, header: list[str]):
+        f = open(path, "w", newline="")
+        self._files.append(f)
+        writer = csv.writer(f)
+        writer.writerow(header)
+        return writer
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    # -----------------------------------------------------
+
+    def reserve(self, tokens: int) -> None:
+        """Claim ``tokens`` of the budget for a request about to be sent."""
+        with self._lock:
+            if self.max_tokens is not None:
+                if self.exhausted or self.total_tokens + self._reserved + tokens > self.max_tokens:
+                    if not self.exhausted:
+                        logger.warning(
+                            "Token budget reached; stopping LLM extraction | used=%d | "
+                            "in_flight=%d | next_request=%d | budget=%d",
+                            self.total_tokens,
+                            self._reserved,
+                            tokens,
+                            self.max_tokens,
+                        )
+                    self.exhausted = True
+                    raise TokenBudgetExceeded(
+                        f"token budget of {self.max_tokens} reached ({self.total_tokens} used)"
+                    )
+            self._reserved += tokens
+
+    def release(self, tokens: int) -> None:
+        with self._lock:
+            self._reserved -= tokens
+
+    def record(
+        self,
+        case_ids: list[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        reported: bool = True,
+    ) -> None:
+        """
+        Add one request's usage. Packed requests split their tokens evenly
+        over the claims they carried; ``reported`` is False when the model
+        returned no usage metadata and the counts are estimates.
+        """
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.reported_calls += reported
+            self.claims += len(case_ids)
+            if self._calls_csv is not None:
+                self._calls_csv.writerow(
+                    [self.calls, len(case_ids), prompt_tokens, completion_tokens, reported]
+                )
+            share = len(case_ids) or 1
+            row_prompt, row_completion = prompt_tokens / share, completion_tokens / share
+            for case_id in case_ids:
+                if self._rows_csv is not None:
+                    self._rows_csv.writerow(
+                        [case_id, self.calls, round(row_prompt, 1), round(row_completion, 1)]
+                    )
+                tokens = self._unassigned.setdefault(case_id, [0.0, 0.0])
+                tokens[0] += row_prompt
+                tokens[1] += row_completion
+        metrics.increment("llm_prompt_tokens", prompt_tokens)
+        metrics.increment("llm_completion_tokens", completion_tokens)
+
+    def assign_row(self, position: int, case_id: str) -> None:
+        """
+        Count the tokens spent on ``case_id`` (0 for resumed, duplicate or
+        keyword-only rows) towards the batch of the input row at global
+        ``position``. Rows are assigned in order; a batch's totals are
+        written once the next batch starts, the last one on close().
+        """
+        with self._lock:
+            batch = position // self.batch_rows + 1
+            if self._batch is not None and self._batch[0] != batch:
+                self._close_batch()
+            if self._batch is None:
+                self._batch = [batch, 0, 0.0, 0.0]
+            prompt_tokens, completion_tokens = self._unassigned.pop(case_id, (0.0, 0.0))
+            self._batch[1] += 1
+            self._batch[2] += prompt_tokens
+            self._batch[3] += completion_tokens
+
+    def _close_batch(self) -> None:
+        batch, rows, prompt_tokens, completion_tokens = self._batch
+        self.batches += 1
+        if self._batches_csv is not None:
+            self._batches_csv.writerow([
+                batch,
+                rows,
+                round(prompt_tokens, 1),
+                round(completion_tokens, 1),
+                round(prompt_tokens + completion_tokens, 1),
+            ])
+        self._batch = None
+
+    def close(self) -> None:
+        """Write the last batch's totals and close the CSVs."""
+        with self._lock:
+            if self._batch is not None:
+                self._close_batch()
+            for f in self._files:
+                f.close()
+            self._files = []
+            self._calls_csv = self._rows_csv = self._batches_csv = None
+
+    # -----------------------------------------------------
+
+    def cost_usd(self) -> float | None:
+        prices = TOKEN_PRICES_PER_MILLION.get(self.model_name)
+        if prices is None:
+            return None
+        return round((self.prompt_tokens * prices[0] + self.completion_tokens * prices[1]) / 1e6, 6)
+
+    def summary(self) -> dict:
+        with self._lock:
+            calls = self.calls
+            return {
+                "model": self.model_name,
+                "calls": calls,
+                "calls_with_reported_usage": self.reported_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.total_tokens,
+                "tokens_per_call": round(self.total_tokens / calls, 1) if calls else None,
+                "claims_accounted": self.claims,
+                "batches": self.batches,
+                "estimated_tokens": self.estimated_tokens,
+                "max_tokens_budget": self.max_tokens,
+                "budget_exhausted": self.exhausted,
+                "cost_usd": self.cost_usd(),
+            }
+
+    def write(self, output_dir: str | Path = "outputs") -> Path:
+        """Close the streamed CSVs and write the run summary to ``output_dir``."""
+        self.close()
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        path = output_dir / USAGE_FILE
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+        logger.info("Token usage written | path=%s", path)
+        return path
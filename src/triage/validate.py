@@ -1,22 +1,34 @@
 import logging
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from sklearn.metrics import f1_score, confusion_matrix
+
+from src.triage import metrics
+from src.triage.encoding import PRIORITY_LEVELS, category_codes
 
 logger = logging.getLogger(__name__)
 
 
-def evaluation(goldpath: str, output_file: str) -> None:
+def evaluation(goldpath: str, output_file: str, pred_df: pd.DataFrame | None = None) -> None:
+    with metrics.span("evaluate") as span:
+        _evaluation(goldpath, output_file, pred_df, span)
+
+
+def _evaluation(goldpath: str, output_file: str, pred_df: pd.DataFrame | None, span) -> None:
+    # Deferred: sklearn takes about a second to import and only this step needs it
+    from sklearn.metrics import f1_score
+
     logger.info("Starting evaluation step")
     logger.info("Gold file: %s", goldpath)
     logger.info("Prediction output directory: %s", output_file)
 
     # ------------------------------------------------------------------
-    # Load predictions and gold data
+    # Load predictions (unless handed over in memory) and gold data
     # ------------------------------------------------------------------
-    pred_path = Path(output_file) / "predictions.csv"
-    pred_df = pd.read_csv(pred_path)
+    if pred_df is None:
+        pred_path = Path(output_file) / "predictions.csv"
+        pred_df = pd.read_csv(pred_path)
     gold_df = pd.read_csv(goldpath)
 
     logger.info(
@@ -53,6 +65,7 @@ def evaluation(goldpath: str, output_file: str) -> None:
         "Merged prediction & gold datasets | rows=%d",
         len(eval_df),
     )
+    span.rows = len(eval_df)
 
     # ------------------------------------------------------------------
     # Priority metrics
@@ -77,11 +90,15 @@ def evaluation(goldpath: str, output_file: str) -> None:
     # ------------------------------------------------------------------
     # Confusion matrix
     # ------------------------------------------------------------------
-    conf_matrix = confusion_matrix(
-        eval_df["gold_priority"],
-        eval_df["priority"],
-        labels=["P0", "P1", "P2", "P3"],
-    )
+    # Counted on fixed-order priority codes; labels outside P0-P3 are ignored
+    n = len(PRIORITY_LEVELS)
+    actual = category_codes(eval_df["gold_priority"], PRIORITY_LEVELS)
+    predicted = category_codes(eval_df["priority"], PRIORITY_LEVELS)
+    known = (actual >= 0) & (predicted >= 0)
+    conf_matrix = np.bincount(
+        actual[known] * n + predicted[known],
+        minlength=n * n,
+    ).reshape(n, n)
 
     conf_df = pd.DataFrame(
         conf_matrix,
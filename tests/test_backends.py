@@ -0,0 +1,142 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from triage.backends import (
+    BackendError,
+    KeywordFakeChatModel,
+    ReplayChatModel,
+    ReplayMissError,
+    make_chat_model,
+    parse_claims,
+    rule_signals,
+)
+from triage.ingest import extract_signals
+from triage.model import GetFromLlm
+from triage.ratelimit import RateLimitScheduler
+
+
+def claim(case_id, summary="Water damage to stock", notes="none"):
+    return (
+        f"caseid:{case_id}; Summary: {summary}; handler_notes: {notes}; "
+        f"historical outcome: Unknown; has attachment: Yes"
+    )
+
+
+def test_parse_claims_reads_single_and_packed_prompts():
+    packed = "Claims:\n" + "\n\n".join(
+        f"Claim {n}:\n{claim(f'C-{n}', summary='Fire; smoke damage')}" for n in (1, 2)
+    )
+
+    parsed = parse_claims(packed)
+
+    assert [c["case_id"] for c in parsed] == ["C-1", "C-2"]
+    assert parsed[0]["summary"] == "Fire; smoke damage"
+
+
+def test_rule_signals_follow_keywords():
+    signals = rule_signals(parse_claims(claim("C-1", "Suspected arson, urgent", "cross-border"))[0])
+
+    assert signals["potential_fraud"] == "Yes"
+    assert signals["mentions_fraud_or_arson"] == "Yes"
+    assert signals["has_time_sensitivity"] == "Yes"
+    assert signals["jurisdictional_complexity"] == "Yes"
+    assert signals["legal_disputes"] == "No"
+
+    blank = rule_signals(parse_claims(claim("C-2", "nan", "nan"))[0])
+    assert blank["legal_disputes"] == "No data available"
+
+
+def test_fake_backend_is_deterministic_offline():
+    inputs = [claim(f"C-{i}", "Ransomware outage, suspected fraud") for i in range(4)]
+
+    first = extract_signals(GetFromLlm(backend="fake"), inputs, concurrency=2, claims_per_call=2,
+                            case_ids=[f"C-{i}" for i in range(4)])
+    second = extract_signals(GetFromLlm(backend="fake"), inputs, concurrency=1)
+
+    assert [r.model_dump() for r in first] == [r.model_dump() for r in second]
+    assert first[0].business_critical_impact.value == "Yes"
+
+
+def test_fake_backend_failure_injection_is_retried():
+    model = KeywordFakeChatModel(failure_rate=0.5, seed=3)
+    scheduler = RateLimitScheduler(max_retries=10, base_delay=0.0, max_delay=0.0)
+    llm = GetFromLlm(model=model, scheduler=scheduler)
+
+    results = extract_signals(llm, [claim(f"C-{i}") for i in range(20)])
+
+    assert all(r is not None for r in results)
+    assert scheduler.stats()["retries"] > 0
+    assert model.calls == 20 + scheduler.stats()["retries"]
+
+
+def test_fake_backend_attempt_memory_is_bounded(monkeypatch):
+    import triage.backends
+
+    monkeypatch.setattr(triage.backends, "ATTEMPT_MEMORY_ENTRIES", 3)
+    model = KeywordFakeChatModel()
+    llm = GetFromLlm(model=model)
+    for i in range(5):
+        llm.generate_details(claim(f"C-{i}"))
+
+    assert model.calls == 5
+    assert len(model._attempts) == 3
+    assert all(len(key) == 16 for key in model._attempts)
+
+
+def test_fake_backend_fails_listed_cases():
+    model = KeywordFakeChatModel(fail_case_ids=frozenset({"C-1"}), failure_status=400)
+
+    with pytest.raises(BackendError) as exc:
+        GetFromLlm(model=model).generate_details(claim("C-1"))
+    assert exc.value.status_code == 400
+
+
+def test_fake_backend_latency_overlaps_under_concurrency():
+    model = KeywordFakeChatModel(latency=0.05)
+    llm = GetFromLlm(model=model)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(llm.agenerate_details(claim(f"C-{i}")) for i in range(8)))
+        return loop.time() - start
+
+    assert asyncio.run(timed()) < 0.3
+
+
+def test_replay_backend_serves_recordings(tmp_path):
+    pd.DataFrame([
+        {
+            "case_id": "C-1",
+            "legal_disputes": "Yes",
+            "no_legal_or_fraud_concerns": "No",
+            "risk_summary": "Recorded summary.",
+        }
+    ]).to_csv(tmp_path / "llm_out1.0.csv", index=False)
+
+    model = ReplayChatModel(archive_dir=str(tmp_path), fallback=False)
+    llm = GetFromLlm(model=model)
+
+    recorded = llm.generate_details(claim("C-1", "urgent"))
+    assert recorded.legal_disputes.value == "Yes"
+    assert recorded.risk_summary == "Recorded summary."
+    # Missing from the recording: filled by the keyword rules
+    assert recorded.has_time_sensitivity.value == "Yes"
+
+    with pytest.raises(ReplayMissError):
+        llm.generate_details(claim("C-2"))
+    assert model.misses == 1
+
+
+def test_make_chat_model_reads_env(monkeypatch):
+    monkeypatch.setenv("TRIAGE_LLM_BACKEND", "fake")
+    monkeypatch.setenv("TRIAGE_FAKE_LATENCY", "0.01")
+
+    model = make_chat_model()
+
+    assert isinstance(model, KeywordFakeChatModel)
+    assert model.latency == 0.01
+    with pytest.raises(ValueError):
+        make_chat_model("nope")
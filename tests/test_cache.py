@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+from triage.cache import LLMResponseCache
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    key = LLMResponseCache.make_key("prompt", "gpt-4o-mini", "v1")
+
+    assert cache.get(key) is None
+    cache.put(key, '{"case_id": "C-1"}', "gpt-4o-mini", "v1")
+    assert cache.get(key) == '{"case_id": "C-1"}'
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_key_depends_on_model_and_schema():
+    base = LLMResponseCache.make_key("prompt", "gpt-4o-mini", "v1")
+
+    assert base != LLMResponseCache.make_key("prompt", "gpt-4o", "v1")
+    assert base != LLMResponseCache.make_key("prompt", "gpt-4o-mini", "v2")
+
+
+def test_eviction_by_size_keeps_most_recent(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite", max_entries=2)
+    for i in range(4):
+        cache.put(f"k{i}", "{}", "m", "v1")
+        time.sleep(0.01)
+
+    assert cache.evict() == 2
+    assert cache.get("k0") is None
+    assert cache.get("k3") == "{}"
+
+
+def test_eviction_by_age(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.sqlite", max_age_days=0)
+    cache.put("old", "{}", "m", "v1")
+
+    assert cache.evict() == 1
+    assert len(cache) == 0
+
+
+def test_writes_are_committed_in_batches(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = LLMResponseCache(path, flush_rows=4)
+    reader = sqlite3.connect(path)
+
+    def committed():
+        return {key: (created, accessed) for key, created, accessed in reader.execute(
+            "SELECT key, created_at, accessed_at FROM llm_cache"
+        )}
+
+    cache.put("k0", "{}", "m", "v1")
+    cache.put("k1", "{}", "m", "v1")
+    time.sleep(0.01)
+    cache.get("k0")
+    assert committed() == {}
+
+    # The fourth write commits the entries and the hit's access time together
+    cache.get("k1")
+    rows = committed()
+    assert set(rows) == {"k0", "k1"}
+    assert rows["k0"][1] > rows["k0"][0]
+
+    cache.put("k2", "{}", "m", "v1")
+    cache.close()
+    assert set(committed()) == {"k0", "k1", "k2"}
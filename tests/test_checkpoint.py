@@ -0,0 +1,88 @@
+import pandas as pd
+
+import triage.ingest as ingest
+from schema.modeloutput import ClaimRiskSignals
+from triage.checkpoint import ExtractionJournal
+from triage.storage import read_table
+
+
+def make_signals(case_id):
+    fields = {f: "No" for f in ClaimRiskSignals.model_fields if f not in {"case_id", "risk_summary"}}
+    return ClaimRiskSignals(case_id=case_id, risk_summary="Routine claim.", **fields)
+
+
+def test_journal_skips_truncated_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ExtractionJournal(path)
+    journal.append(make_signals("C-1"))
+    journal.append(make_signals("C-2"))
+    journal.close()
+
+    with open(path, "a") as f:
+        f.write('{"case_id": "C-3", "severe_le')
+
+    assert set(ExtractionJournal(path, resume=True).load()) == {"C-1", "C-2"}
+
+
+def test_resume_appends_after_a_truncated_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ExtractionJournal(path)
+    journal.append(make_signals("C-1"))
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"case_id": "C-2", "severe_le')
+
+    journal = ExtractionJournal(path, resume=True)
+    journal.append(make_signals("C-3"))
+    journal.close()
+
+    assert set(ExtractionJournal(path, resume=True).load()) == {"C-1", "C-3"}
+
+
+def test_resume_only_extracts_missing_case_ids(tmp_path, monkeypatch):
+    input_csv = tmp_path / "records.csv"
+    pd.DataFrame(
+        [
+            {
+                "case_id": f"C-{i}",
+                "client_segment": "SMB",
+                "jurisdiction": "UK",
+                "service_line": "Insurance",
+                "claim_value_band": "<50k",
+                "attachments_present": True,
+                "free_text_summary": f"Claim number {i}",
+                "handler_notes": "",
+                "historical_outcome": "Unknown",
+            }
+            for i in range(4)
+        ]
+    ).to_csv(input_csv, index=False)
+    monkeypatch.chdir(tmp_path)
+
+    requested = []
+
+    class RecordingLlm:
+        def __init__(self, **kwargs):
+            pass
+
+        def generate_details(self, input_data):
+            case_id = input_data.split(";")[0].removeprefix("caseid:")
+            requested.append(case_id)
+            return make_signals(case_id)
+
+        def estimate_request_tokens(self, inputs, claims_per_call=1):
+            return 0
+
+    monkeypatch.setattr(ingest, "GetFromLlm", RecordingLlm)
+
+    journal = ExtractionJournal("data/llmdata/extraction_journal.jsonl")
+    journal.append(make_signals("C-0"))
+    journal.append(make_signals("C-2"))
+    journal.close()
+
+    ingest.preprocess_getstructrureddata(input_csv, resume=True)
+
+    assert requested == ["C-1", "C-3"]
+    batch = read_table("data/llmdata/llm_out1")
+    assert batch["case_id"].tolist() == ["C-0", "C-1", "C-2", "C-3"]
+    assert len(ExtractionJournal("data/llmdata/extraction_journal.jsonl", resume=True).load()) == 4
@@ -11,3 +11,41 @@ def test_cli_help():
 
     assert result.returncode == 0
     assert "Insurance Claim Triage System" in result.stdout
+
+
+def test_cli_startup_imports_stay_light():
+    # The subcommands import the pipeline lazily: loading the CLI must not
+    # pull in pandas, LangChain or sklearn, and a keyword-only pipeline
+    # must not load LangChain or sklearn either. (Startup time itself is
+    # timed by `triage bench`, not asserted on here.)
+    probe = (
+        "import sys\n"
+        "import triage.cli\n"
+        "heavy = ('pandas', 'langchain_core', 'langchain_openai', 'sklearn', 'dotenv')\n"
+        "print([m for m in heavy if m in sys.modules])\n"
+        "import triage.predict\n"
+        "print([m for m in heavy[1:4] if m in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    cli_modules, pipeline_modules = result.stdout.splitlines()
+    assert cli_modules == "[]"
+    assert pipeline_modules == "[]"
+
+
+def test_cache_path_defaults_under_data_dir(tmp_path, monkeypatch):
+    import triage.predict
+    from triage.cli import main
+
+    calls = []
+    monkeypatch.setattr(triage.predict, "run_pipeline", lambda **kwargs: calls.append(kwargs))
+    argv = ["triage", "run", "--input", "records.csv", "--logdir", str(tmp_path / "logs")]
+
+    monkeypatch.setattr(sys, "argv", [*argv, "--data-dir", str(tmp_path / "job1")])
+    main()
+    monkeypatch.setattr(sys, "argv", [*argv, "--cache-path", str(tmp_path / "shared.sqlite")])
+    main()
+
+    assert calls[0]["cache_path"] == str(tmp_path / "job1" / "llmdata" / "llm_cache.sqlite")
+    assert calls[1]["cache_path"] == str(tmp_path / "shared.sqlite")
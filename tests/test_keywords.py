@@ -0,0 +1,59 @@
+import pandas as pd
+
+import triage.ingest as ingest
+from triage.keywords import extract_operational_flags
+from triage.storage import read_table
+
+
+def test_flags_from_trigger_phrases():
+    flags = extract_operational_flags(
+        "Suspected arson at warehouse. Overseas elements present. "
+        "Evidence not yet supplied. Client requested urgent callback."
+    )
+
+    assert flags == {
+        "has_regulator_involvement": "No",
+        "has_cross_border_elements": "Yes",
+        "has_time_sensitivity": "Yes",
+        "has_missing_documentation": "Yes",
+        "mentions_fraud_or_arson": "Yes",
+    }
+
+
+def test_acronyms_are_case_sensitive_and_word_bounded():
+    assert extract_operational_flags("FCA letter received")["has_regulator_involvement"] == "Yes"
+    assert extract_operational_flags("second section of the fca form")["has_regulator_involvement"] == "No"
+    assert extract_operational_flags("theftuous")["mentions_fraud_or_arson"] == "No"
+
+
+def test_keyword_mode_makes_no_llm_calls(tmp_path, monkeypatch):
+    input_csv = tmp_path / "records.csv"
+    pd.DataFrame(
+        [
+            {
+                "case_id": "C-1",
+                "client_segment": "SMB",
+                "jurisdiction": "UK",
+                "service_line": "Insurance",
+                "claim_value_band": "<50k",
+                "attachments_present": True,
+                "free_text_summary": "Regulator visit scheduled. Governing law unclear.",
+                "handler_notes": "",
+                "historical_outcome": "Unknown",
+            }
+        ]
+    ).to_csv(input_csv, index=False)
+    monkeypatch.chdir(tmp_path)
+
+    def no_llm(**kwargs):
+        raise AssertionError("LLM must not be initialised in keywords mode")
+
+    monkeypatch.setattr(ingest, "GetFromLlm", no_llm)
+
+    ingest.preprocess_getstructrureddata(input_csv, signal_mode="keywords")
+
+    out = read_table("data/llmdata/llm_out1").iloc[0]
+    assert out["has_regulator_involvement"] == "Yes"
+    assert out["has_cross_border_elements"] == "Yes"
+    assert out["mentions_fraud_or_arson"] == "No"
+    assert out["legal_disputes"] == "No data available"
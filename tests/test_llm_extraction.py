@@ -0,0 +1,243 @@
+import asyncio
+import json
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from schema.modeloutput import ClaimRiskSignals
+from triage.ingest import aextract_signals, extract_signals
+from triage.model import GetFromLlm
+
+
+SIGNAL_FIELDS = [f for f in ClaimRiskSignals.model_fields if f not in {"case_id", "risk_summary"}]
+
+
+class SlowEchoChatModel(BaseChatModel):
+    """Local fake that echoes the case id back after a fixed delay."""
+
+    latency: float = 0.05
+    fail_case_ids: tuple = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-echo"
+
+    def _respond(self, messages) -> ChatResult:
+        case_id = re.search(r"caseid:([^;]+);", messages[-1].content).group(1)
+        if case_id in self.fail_case_ids:
+            raise RuntimeError(f"injected failure for {case_id}")
+        payload = {field: "No" for field in SIGNAL_FIELDS}
+        payload.update(case_id=case_id, risk_summary="Routine claim.")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps(payload)))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+def claim_inputs(n):
+    return [
+        f"caseid:C-{i:03d}; Summary: Water damage; handler_notes: none; "
+        f"historical outcome: Unknown; has attachment: Yes"
+        for i in range(n)
+    ]
+
+
+def test_async_extraction_preserves_order_and_isolates_failures():
+    llm = GetFromLlm(model=SlowEchoChatModel(latency=0.01, fail_case_ids=("C-003",)))
+
+    results = asyncio.run(aextract_signals(llm, claim_inputs(8), concurrency=4))
+
+    assert [r.case_id if r else None for r in results] == [
+        "C-000", "C-001", "C-002", None, "C-004", "C-005", "C-006", "C-007",
+    ]
+
+
+def test_concurrent_extraction_scales_with_concurrency():
+    llm = GetFromLlm(model=SlowEchoChatModel(latency=0.1))
+
+    start = time.perf_counter()
+    results = extract_signals(llm, claim_inputs(20), concurrency=10)
+    elapsed = time.perf_counter() - start
+
+    # 20 calls x 100ms sequentially would take ~2s; 10 in flight takes ~0.2s
+    assert len(results) == 20 and all(results)
+    assert elapsed < 1.0
+
+
+def test_cached_rerun_makes_no_llm_calls(tmp_path):
+    from triage.cache import LLMResponseCache
+
+    class CountingChatModel(SlowEchoChatModel):
+        calls: int = 0
+
+        def _respond(self, messages):
+            self.calls += 1
+            return super()._respond(messages)
+
+    model = CountingChatModel(latency=0)
+    inputs = claim_inputs(5)
+
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    first = extract_signals(GetFromLlm(model=model, cache=cache), inputs)
+    cache.close()
+
+    cache = LLMResponseCache(tmp_path / "cache.sqlite")
+    second = extract_signals(GetFromLlm(model=model, cache=cache), inputs)
+
+    # The five claims only differ by case_id: one call, then cache hits
+    # carrying each claim's own case_id
+    assert model.calls == 1
+    assert cache.stats()["hits"] == 5 and cache.stats()["misses"] == 0
+    assert [r.case_id for r in first] == [f"C-{i:03d}" for i in range(5)]
+    assert [r.model_dump() for r in first] == [r.model_dump() for r in second]
+
+
+def test_duplicate_claims_call_llm_once_per_group():
+    import pandas as pd
+
+    from triage.ingest import extract_signals_deduplicated
+
+    class CountingChatModel(SlowEchoChatModel):
+        calls: int = 0
+
+        def _respond(self, messages):
+            self.calls += 1
+            return super()._respond(messages)
+
+    records = pd.DataFrame(
+        {
+            "case_id": ["C-1", "C-2", "C-3", "C-4"],
+            "free_text_summary": ["Water damage.", "water  damage. ", "Fire damage.", "Water damage."],
+            "handler_notes": ["None", "none", "None", "None"],
+            "historical_outcome": ["Unknown"] * 4,
+            "attachments_present": ["Yes", "Yes", "Yes", "No"],
+        }
+    )
+    model = CountingChatModel(latency=0)
+
+    results, stats = extract_signals_deduplicated(GetFromLlm(model=model), records)
+
+    assert model.calls == 3
+    assert [r.case_id for r in results] == ["C-1", "C-2", "C-3", "C-4"]
+    assert stats["unique_prompts"] == 3 and stats["calls_saved_pct"] == 0.25
+
+
+class PackedEchoChatModel(SlowEchoChatModel):
+    """Answers packed prompts, dropping the listed case ids from the first response."""
+
+    drop_once: tuple = ()
+    requests: list = []
+
+    def _respond(self, messages):
+        case_ids = re.findall(r"caseid:([^;]+);", messages[-1].content)
+        self.requests.append(case_ids)
+        keep = [c for c in case_ids if len(self.requests) > 1 or c not in self.drop_once]
+        claims = [
+            {**{field: "No" for field in SIGNAL_FIELDS}, "case_id": c, "risk_summary": "Routine claim."}
+            for c in keep
+        ]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps({"claims": claims})))])
+
+
+def test_packed_extraction_resends_only_missing_claims():
+    model = PackedEchoChatModel(latency=0, drop_once=("C-001", "C-004"), requests=[])
+    inputs = claim_inputs(6)
+    case_ids = [f"C-{i:03d}" for i in range(6)]
+
+    results = extract_signals(GetFromLlm(model=model), inputs, claims_per_call=6, case_ids=case_ids)
+
+    assert [r.case_id for r in results] == case_ids
+    assert model.requests == [case_ids, ["C-001", "C-004"]]
+
+
+def test_packed_async_extraction_splits_into_packs():
+    model = PackedEchoChatModel(latency=0.01, requests=[])
+    case_ids = [f"C-{i:03d}" for i in range(10)]
+
+    results = extract_signals(
+        GetFromLlm(model=model), claim_inputs(10), concurrency=3, claims_per_call=4, case_ids=case_ids
+    )
+
+    assert [r.case_id for r in results] == case_ids
+    assert sorted(len(r) for r in model.requests) == [2, 4, 4]
+
+
+def test_hybrid_mode_requests_semantic_schema_and_fills_flags_locally():
+    import pandas as pd
+
+    from triage.ingest import extract_signals_deduplicated
+
+    class CapturingChatModel(SlowEchoChatModel):
+        prompts: list = []
+
+        def _respond(self, messages):
+            self.prompts.append(messages[-1].content)
+            return super()._respond(messages)
+
+    model = CapturingChatModel(latency=0, prompts=[])
+    records = pd.DataFrame(
+        {
+            "case_id": ["C-1"],
+            "free_text_summary": ["Suspected arson at warehouse."],
+            "handler_notes": ["Client requested urgent callback."],
+            "historical_outcome": ["Unknown"],
+            "attachments_present": ["Yes"],
+        }
+    )
+
+    results, _ = extract_signals_deduplicated(
+        GetFromLlm(model=model, semantic_only=True), records, signal_mode="hybrid"
+    )
+
+    assert "has_time_sensitivity" not in model.prompts[0]
+    assert results[0].mentions_fraud_or_arson == "Yes"
+    assert results[0].has_time_sensitivity == "Yes"
+    assert results[0].has_regulator_involvement == "No"
+
+
+def test_memo_shares_duplicates_across_chunks():
+    import pandas as pd
+
+    from triage.ingest import DedupMemo, extract_signals_deduplicated
+
+    class CountingChatModel(SlowEchoChatModel):
+        calls: int = 0
+
+        def _respond(self, messages):
+            self.calls += 1
+            return super()._respond(messages)
+
+    def chunk(case_ids, summaries):
+        return pd.DataFrame(
+            {
+                "case_id": case_ids,
+                "free_text_summary": summaries,
+                "handler_notes": ["None"] * len(case_ids),
+                "historical_outcome": ["Unknown"] * len(case_ids),
+                "attachments_present": ["Yes"] * len(case_ids),
+            }
+        )
+
+    model = CountingChatModel(latency=0)
+    llm, memo = GetFromLlm(model=model), DedupMemo(max_entries=2)
+
+    extract_signals_deduplicated(llm, chunk(["C-1", "C-2"], ["Water damage.", "Fire damage."]), memo=memo)
+    results, stats = extract_signals_deduplicated(
+        llm, chunk(["C-3", "C-4"], ["water damage.", "Theft."]), memo=memo
+    )
+
+    assert model.calls == 3
+    assert [r.case_id for r in results] == ["C-3", "C-4"]
+    assert stats["unique_prompts"] == 1 and stats["memo_groups"] == 1
+    # Bounded: the least recently used claim ("fire damage.") was evicted
+    assert len(memo) == 2
+    extract_signals_deduplicated(llm, chunk(["C-5"], ["Fire damage."]), memo=memo)
+    assert model.calls == 4
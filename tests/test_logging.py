@@ -0,0 +1,50 @@
+import logging
+from logging.handlers import QueueHandler
+
+from triage.logging_config import ProgressLogger, setup_logging, shutdown_logging
+
+
+def test_logging_is_queued_to_a_background_writer(tmp_path):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        setup_logging("INFO", tmp_path)
+        assert len(root.handlers) == 1 and isinstance(root.handlers[0], QueueHandler)
+
+        logging.getLogger("triage.test").info("queued %s | rows=%d", "record", 3)
+        shutdown_logging()
+
+        lines = (tmp_path / "triage.log").read_text().splitlines()
+        assert len(lines) == 1
+        assert "| INFO | triage.test |" in lines[0]
+        assert lines[0].endswith("| queued record | rows=3")
+    finally:
+        shutdown_logging()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_progress_logger_summarises_at_intervals(caplog):
+    clock = FakeClock()
+    progress = ProgressLogger(logging.getLogger("triage.test"), "Scoring", total=100, interval=5, clock=clock)
+
+    with caplog.at_level(logging.INFO, logger="triage.test"):
+        for _ in range(40):
+            clock.now += 0.25
+            progress.update()
+        progress.close()
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == [
+        "Scoring progress | done=20/100 | rate=4.0/s | elapsed=5s | eta=20s",
+        "Scoring progress | done=40/100 | rate=4.0/s | elapsed=10s | eta=15s",
+        "Scoring finished | done=40/100 | rate=4.0/s | elapsed=10s | eta=0s",
+    ]
@@ -0,0 +1,72 @@
+import json
+
+import pandas as pd
+
+from src.triage import metrics
+from triage.metrics import Histogram, MetricsRegistry
+from triage.predict import run_pipeline
+
+
+def test_histogram_percentiles_and_buckets():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for ms in range(1, 101):
+        hist.observe(ms / 100)
+
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["p50"] == 0.5
+    assert summary["p95"] == 0.95
+    assert summary["p99"] == 0.99
+    assert summary["buckets"] == {"0.1": 10, "1.0": 100, "+Inf": 100}
+
+
+def test_spans_accumulate_and_export_prometheus():
+    registry = MetricsRegistry()
+    for rows in (10, 30):
+        with registry.span("validate") as span:
+            span.rows = rows
+    registry.increment("llm_cache_hits", 2)
+    registry.observe("llm_call_seconds", 0.2)
+
+    snapshot = registry.snapshot()
+    assert snapshot["stages"]["validate"]["calls"] == 2
+    assert snapshot["stages"]["validate"]["rows"] == 40
+    assert snapshot["counters"] == {"llm_cache_hits": 2}
+
+    text = registry.to_prometheus()
+    assert 'triage_stage_rows_total{stage="validate"} 40' in text
+    assert "triage_llm_cache_hits_total 2" in text
+    assert 'triage_llm_call_seconds_bucket{le="0.25"} 1' in text
+    assert "triage_llm_call_seconds_count 1" in text
+
+
+def test_run_pipeline_writes_run_metrics(tmp_path, monkeypatch):
+    input_csv = tmp_path / "records.csv"
+    pd.DataFrame([
+        {
+            "case_id": f"C-{i}",
+            "client_segment": "SMB",
+            "jurisdiction": "UK",
+            "service_line": "Insurance",
+            "claim_value_band": "<50k",
+            "attachments_present": True,
+            "free_text_summary": f"Suspected fraud at site {i % 2}",
+            "handler_notes": "",
+            "historical_outcome": "Unknown",
+        }
+        for i in range(4)
+    ]).to_csv(input_csv, index=False)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TRIAGE_LLM_BACKEND", "fake")
+
+    run_pipeline(input_csv, None, outdir1="out", cache_path=None, metrics_prometheus=True)
+
+    report = json.loads((tmp_path / "out" / "run_metrics.json").read_text())
+    for stage in ("load_csv", "validate", "extract", "features", "score", "write_predictions"):
+        assert stage in report["stages"]
+    assert report["stages"]["validate"]["rows"] == 4
+    assert report["histograms"]["llm_call_seconds"]["count"] == 2
+    assert report["counters"]["unique_prompts"] == 2
+    assert report["counters"]["llm_requests"] == 2
+    assert (tmp_path / "out" / "run_metrics.prom").exists()
+    assert metrics.registry.snapshot()["stages"]["score"]["rows"] == 4
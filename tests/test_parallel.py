@@ -0,0 +1,27 @@
+import pandas as pd
+
+from triage.parallel import concat_shards, map_shards, split_frame
+
+
+def double(df, factor):
+    return df.assign(value=df["value"] * factor)
+
+
+def test_split_frame_keeps_order_and_labels():
+    df = pd.DataFrame({"value": range(10)}, index=range(100, 110))
+
+    shards = split_frame(df, 3)
+
+    assert [len(s) for s in shards] == [3, 3, 4]
+    assert pd.concat(shards).equals(df)
+    assert len(split_frame(df.head(2), 8)) == 2
+
+
+def test_map_shards_in_processes_matches_single_process():
+    df = pd.DataFrame({"value": range(25)})
+
+    single = concat_shards(map_shards(double, df, 1, 3))
+    sharded = concat_shards(map_shards(double, df, 4, 3))
+
+    assert sharded.equals(single)
+    assert sharded["value"].tolist() == [v * 3 for v in range(25)]
@@ -2,6 +2,8 @@ import pandas as pd
 from pathlib import Path
 
 from triage.ingest import preprocess_getstructrureddata
+from triage.predict import run_pipeline
+from triage.storage import read_table
 
 
 def test_preprocess_creates_output(tmp_path, monkeypatch):
@@ -24,13 +26,83 @@ def test_preprocess_creates_output(tmp_path, monkeypatch):
 
     df.to_csv(input_csv, index=False)
 
-    # Patch output directory
+    # Patch output directory; extract offline with the keyword-rule fake
     monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TRIAGE_LLM_BACKEND", "fake")
 
     preprocess_getstructrureddata(input_csv)
 
-    output_file = Path("data/pre-processeddata/preprocessed_data.csv")
+    output_file = Path("data/pre-processeddata/preprocessed_data.parquet")
     assert output_file.exists()
 
-    out_df = pd.read_csv(output_file)
+    out_df = read_table("data/pre-processeddata/preprocessed_data")
     assert out_df.loc[0, "service_line"] == "No data Available"
+
+
+def test_preprocess_streams_chunks(tmp_path, monkeypatch):
+    input_csv = tmp_path / "records.csv"
+    pd.DataFrame([
+        {
+            "case_id": f"C-{i}",
+            "client_segment": "SMB",
+            "jurisdiction": "UK",
+            "service_line": "Insurance",
+            "claim_value_band": "<50k",
+            "attachments_present": True,
+            "free_text_summary": f"Theft of equipment reported at site {i}",
+            "handler_notes": "",
+            "historical_outcome": "Unknown",
+        }
+        for i in range(5)
+    ]).to_csv(input_csv, index=False)
+    monkeypatch.chdir(tmp_path)
+
+    preprocess_getstructrureddata(input_csv, signal_mode="keywords", chunk_rows=2)
+
+    out_df = read_table("data/pre-processeddata/preprocessed_data")
+    assert out_df["case_id"].tolist() == [f"C-{i}" for i in range(5)]
+
+    signals = read_table("data/llmdata/llm_out1")
+    assert signals["case_id"].tolist() == [f"C-{i}" for i in range(5)]
+    assert (signals["mentions_fraud_or_arson"] == "Yes").all()
+
+
+def test_run_pipeline_in_memory_matches_persisted(tmp_path, monkeypatch):
+    input_csv = tmp_path / "records.csv"
+    pd.DataFrame([
+        {
+            "case_id": f"C-{i}",
+            "client_segment": "Enterprise",
+            "jurisdiction": "US",
+            "service_line": "Legal",
+            "claim_value_band": ">1m",
+            "attachments_present": i % 2 == 0,
+            "free_text_summary": "Regulator visit scheduled" if i % 2 else "Routine water damage",
+            "handler_notes": "",
+            "historical_outcome": "Unknown",
+        }
+        for i in range(4)
+    ]).to_csv(input_csv, index=False)
+    monkeypatch.chdir(tmp_path)
+
+    run_pipeline(input_csv, None, outdir1="mem", signal_mode="keywords", data_dir="mem_data")
+    assert not Path("mem_data/processeddata").exists()
+    assert not Path("mem_data/pre-processeddata").exists()
+
+    run_pipeline(
+        input_csv,
+        None,
+        outdir1="disk",
+        signal_mode="keywords",
+        data_dir="disk_data",
+        persist_intermediates=True,
+    )
+    assert Path("disk_data/processeddata/processeddf.parquet").exists()
+
+    run_pipeline(input_csv, None, outdir1="sharded", signal_mode="keywords", workers=2)
+
+    in_memory = pd.read_csv("mem/predictions.csv")
+    persisted = pd.read_csv("disk/predictions.csv")
+    pd.testing.assert_frame_equal(in_memory, persisted)
+    assert Path("sharded/predictions.csv").read_bytes() == Path("mem/predictions.csv").read_bytes()
+    assert Path("mem/data_report.json").exists()
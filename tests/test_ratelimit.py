@@ -0,0 +1,155 @@
+import asyncio
+import json
+import re
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from schema.modeloutput import ClaimRiskSignals
+from triage.ingest import extract_signals
+from triage.model import GetFromLlm
+from triage.ratelimit import RateLimitScheduler, TokenBucket, is_retryable
+
+
+SIGNAL_FIELDS = [f for f in ClaimRiskSignals.model_fields if f not in {"case_id", "risk_summary"}]
+
+
+class ApiError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ThrottlingChatModel(BaseChatModel):
+    """
+    Local fake of a rate-limited endpoint: answers 429 while more than
+    ``max_in_flight`` requests are open, and for the first
+    ``fail_first`` calls.
+    """
+
+    max_in_flight: int = 2
+    fail_first: int = 0
+    latency: float = 0.02
+    calls: int = 0
+    in_flight: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "throttling"
+
+    def _respond(self, messages) -> ChatResult:
+        case_id = re.search(r"caseid:([^;]+);", messages[-1].content).group(1)
+        payload = {field: "No" for field in SIGNAL_FIELDS}
+        payload.update(case_id=case_id, risk_summary="Routine claim.")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps(payload)))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise ApiError(429)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        self.in_flight += 1
+        try:
+            if self.in_flight > self.max_in_flight:
+                raise ApiError(429)
+            await asyncio.sleep(self.latency)
+            return self._respond(messages)
+        finally:
+            self.in_flight -= 1
+
+
+def claim_inputs(n):
+    return [
+        f"caseid:C-{i:03d}; Summary: Water damage; handler_notes: none; "
+        f"historical outcome: Unknown; has attachment: Yes"
+        for i in range(n)
+    ]
+
+
+def test_token_bucket_spaces_reservations_at_the_refill_rate():
+    now = [0.0]
+    bucket = TokenBucket(per_minute=60, capacity=2, clock=lambda: now[0])
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+
+    now[0] = 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_sync_retries_429_with_backoff():
+    scheduler = RateLimitScheduler(max_retries=3, base_delay=0.001)
+    llm = GetFromLlm(model=ThrottlingChatModel(fail_first=2), scheduler=scheduler)
+
+    result = llm.generate_details(claim_inputs(1)[0])
+
+    assert result.case_id == "C-000"
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["throttled"] == 2
+
+
+def test_non_retryable_errors_are_not_retried():
+    scheduler = RateLimitScheduler(max_retries=3, base_delay=0.001)
+
+    def bad_request():
+        raise ApiError(400)
+
+    with pytest.raises(ApiError):
+        scheduler.call(bad_request)
+    assert scheduler.stats()["retries"] == 0
+    assert not is_retryable(ApiError(400)) and is_retryable(ApiError(503))
+
+
+def test_adaptive_concurrency_backs_off_to_the_server_limit():
+    model = ThrottlingChatModel(max_in_flight=2)
+    scheduler = RateLimitScheduler(max_retries=10, base_delay=0.001, max_concurrency=8)
+    llm = GetFromLlm(model=model, scheduler=scheduler)
+
+    results = extract_signals(llm, claim_inputs(40), concurrency=8)
+
+    assert [r.case_id for r in results] == [f"C-{i:03d}" for i in range(40)]
+    stats = scheduler.stats()
+    assert stats["throttled"] > 0 and stats["failed"] == 0
+    # The limit was cut from 8 on throttling; failed attempts are a small
+    # fraction of the successful calls
+    assert stats["concurrency_limit"] < 8
+    assert stats["throttled"] < 40
+
+
+def test_sync_calls_from_threads_respect_the_adaptive_limit():
+    import threading
+    import time
+
+    scheduler = RateLimitScheduler(max_retries=3, base_delay=0.001, max_concurrency=4)
+    lock = threading.Lock()
+    active, peaks, calls = [0], [], [0]
+
+    def request():
+        with lock:
+            active[0] += 1
+            calls[0] += 1
+            peaks.append(active[0])
+            throttle = calls[0] == 1
+        try:
+            time.sleep(0.02)
+            if throttle:
+                raise ApiError(429)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.call, args=(request,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peaks) <= 4
+    assert scheduler.in_flight == 0
+    stats = scheduler.stats()
+    assert stats["throttled"] == 1 and stats["failed"] == 0
+    assert stats["requests"] == 9
@@ -52,3 +52,98 @@ def test_action_immediate_escalation():
         "Immediate escalation",
         "Escalate for investigation",
     }
+
+
+def grid_frame(evaluator):
+    import itertools
+    import random
+
+    import pandas as pd
+
+    rng = random.Random(7)
+    tri_state = ["Yes", "No", "No data available", float("nan")]
+    signal_cols = [c for c in sample_row() if c not in {
+        "case_id", "client_segment", "jurisdiction", "service_line",
+        "claim_value_band", "attachments_present",
+    }]
+
+    rows = []
+    for i, (seg, jur, line, band) in enumerate(itertools.product(
+        evaluator.CLIENT_SEGMENT_RISK,
+        evaluator.JURISDICTION_RISK,
+        evaluator.SERVICE_LINE_MULTIPLIER,
+        evaluator.CLAIM_VALUE_RISK,
+    )):
+        for _ in range(5):
+            row = {
+                "case_id": f"C-{i}",
+                "client_segment": seg,
+                "jurisdiction": jur,
+                "service_line": line,
+                "claim_value_band": band,
+                "attachments_present": rng.choice(["Yes", "No"]),
+            }
+            row.update({col: rng.choice(tri_state) for col in signal_cols})
+            rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def test_score_batch_matches_per_row():
+    evaluator = ClaimTriageEvaluator()
+    df = grid_frame(evaluator)
+    batch = evaluator.score_batch(df)
+    signals = evaluator.build_extracted_signals_batch(df)
+
+    for i, row in df.iterrows():
+        row_dict = row.to_dict()
+        score = evaluator.calculate_risk_score(row_dict)
+        priority = evaluator.determine_priority(score)
+
+        assert batch.at[i, "risk_score"] == score
+        assert batch.at[i, "priority"] == priority
+        assert batch.at[i, "recommended_action"] == evaluator.determine_action(row_dict, score, priority)
+        assert batch.at[i, "confidence"] == evaluator.calculate_confidence(row_dict)
+        assert signals[i] == evaluator.build_extracted_signals(row_dict)
+
+
+def test_score_batch_on_encoded_table():
+    import numpy as np
+    import pandas as pd
+
+    from triage.encoding import decode_signals, encode_claims
+
+    evaluator = ClaimTriageEvaluator()
+    df = grid_frame(evaluator)
+    encoded = encode_claims(df)
+
+    assert encoded["jurisdiction"].dtype == "category"
+    assert encoded["potential_fraud"].dtype == np.int8
+    assert decode_signals(encoded)["potential_fraud"].equals(df["potential_fraud"])
+
+    pd.testing.assert_frame_equal(
+        evaluator.score_batch(encoded),
+        evaluator.score_batch(df),
+    )
+    assert evaluator.build_extracted_signals_batch(encoded).equals(
+        evaluator.build_extracted_signals_batch(df)
+    )
+
+
+def test_memoized_scoring_matches_batch():
+    import pandas as pd
+
+    from triage.encoding import encode_claims
+    from triage.predict import _score_key
+
+    evaluator = ClaimTriageEvaluator()
+    df = grid_frame(evaluator)
+    expected = evaluator.score_batch(df)
+    expected["extracted_signals"] = evaluator.build_extracted_signals_batch(df)
+
+    pd.testing.assert_frame_equal(evaluator.score_memoized(df), expected)
+    pd.testing.assert_frame_equal(evaluator.score_memoized(encode_claims(df)), expected)
+
+    hits = _score_key.cache_info().hits
+    assert evaluator.score_claim(df.iloc[7].to_dict()) == expected.iloc[7].to_dict()
+    assert _score_key.cache_info().hits == hits + 1
@@ -0,0 +1,136 @@
+import http.client
+import json
+import socket
+import threading
+
+import pandas as pd
+
+from triage.predict import run_pipeline
+from triage.ratelimit import RateLimitScheduler
+from triage.serve import TriageHTTPServer, TriageService, TriageUnixServer
+from triage.synth import generate_records
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def start(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def post(conn, claims):
+    body = "".join(json.dumps(c) + "\n" for c in claims)
+    conn.request("POST", "/score", body=body)
+    response = conn.getresponse()
+    return response.status, [json.loads(line) for line in response.read().decode().splitlines()]
+
+
+def test_serve_scores_like_the_batch_pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = generate_records(20, rng=7)
+    records.to_csv("records.csv", index=False)
+    run_pipeline("records.csv", None, outdir1="out", signal_mode="keywords")
+    expected = pd.read_csv("out/predictions.csv").to_dict("records")
+
+    claims = json.loads(records.to_json(orient="records"))
+    claims.append({"case_id": "C-BAD", "client_segment": "Galactic"})
+    server = start(TriageHTTPServer(("127.0.0.1", 0), TriageService(signal_mode="keywords")))
+    try:
+        conn = http.client.HTTPConnection(*server.server_address)
+        status, predictions = post(conn, claims)
+        assert status == 200
+
+        assert pd.DataFrame(predictions[:-1]).to_dict("records") == expected
+        assert predictions[-1]["case_id"] == "C-BAD"
+        assert predictions[-1]["error"] == "validation failed"
+
+        # Same keep-alive connection: metrics carry the request latency
+        conn.request("GET", "/metrics")
+        text = conn.getresponse().read().decode()
+        assert "triage_serve_request_seconds_count 1" in text
+        assert "triage_serve_claims_total 21" in text
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serve_on_unix_socket_rejects_bad_json(tmp_path):
+    path = str(tmp_path / "triage.sock")
+    server = start(TriageUnixServer(path, TriageService(signal_mode="keywords")))
+    try:
+        conn = UnixHTTPConnection(path)
+        conn.request("POST", "/score", body="{not json}\n")
+        response = conn.getresponse()
+        assert response.status == 400
+        assert "invalid JSON lines" in json.loads(response.read())["error"]
+
+        status, predictions = post(UnixHTTPConnection(path), [{"case_id": "C-1"}])
+        assert status == 200 and predictions[0]["case_id"] == "C-1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class PeakScheduler(RateLimitScheduler):
+    peak = 0
+
+    def _on_success(self):
+        self.peak = max(self.peak, self.in_flight)
+        super()._on_success()
+
+
+def test_concurrent_requests_share_the_concurrency_limit(monkeypatch):
+    monkeypatch.setenv("TRIAGE_FAKE_LATENCY", "0.02")
+    scheduler = PeakScheduler(max_concurrency=2)
+    service = TriageService(signal_mode="llm", llm_backend="fake", llm_concurrency=2, scheduler=scheduler)
+    try:
+        claims = [json.loads(generate_records(6, rng=seed, start=seed * 10).to_json(orient="records")) for seed in range(4)]
+        threads = [threading.Thread(target=service.score, args=(batch,)) for batch in claims]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        service.close()
+
+    assert scheduler.peak == 2
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["requests"] == 24
+
+
+def test_failed_extractions_are_reported_as_errors(monkeypatch):
+    monkeypatch.setenv("TRIAGE_FAKE_FAILURE_RATE", "1.0")
+    service = TriageService(
+        signal_mode="llm",
+        llm_backend="fake",
+        scheduler=RateLimitScheduler(max_retries=0),
+    )
+    claims = json.loads(generate_records(2, rng=1).to_json(orient="records"))
+    assert service.score(claims) == [
+        {"case_id": c["case_id"], "error": "extraction failed"} for c in claims
+    ]
+
+
+def test_concurrent_requests_are_not_serialised_by_default(monkeypatch):
+    # As `triage serve` builds it by default: --llm-concurrency 1, --max-in-flight 16
+    monkeypatch.setenv("TRIAGE_FAKE_LATENCY", "0.2")
+    scheduler = PeakScheduler(max_concurrency=16)
+    service = TriageService(signal_mode="llm", llm_backend="fake", scheduler=scheduler)
+    claims = [json.loads(generate_records(1, rng=seed, start=seed).to_json(orient="records")) for seed in range(2)]
+    threads = [threading.Thread(target=service.score, args=(batch,)) for batch in claims]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert scheduler.peak == 2
+    assert scheduler.stats()["requests"] == 2
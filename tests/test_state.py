@@ -0,0 +1,92 @@
+import json
+
+import pandas as pd
+
+from triage.keywords import extract_operational_flags, keyword_only_signals
+from triage.predict import run_pipeline
+from triage.state import IncrementalState
+
+
+def records(n, changed=None):
+    rows = [
+        {
+            "case_id": f"C-{i}",
+            "client_segment": "Enterprise",
+            "jurisdiction": "US",
+            "service_line": "Legal",
+            "claim_value_band": ">1m",
+            "attachments_present": i % 2 == 0,
+            "free_text_summary": "Regulator visit scheduled" if i % 3 else "Routine water damage",
+            "handler_notes": "",
+            "historical_outcome": "Unknown",
+        }
+        for i in range(n)
+    ]
+    if changed is not None:
+        rows[changed]["free_text_summary"] = "Suspected arson, urgent"
+    return pd.DataFrame(rows)
+
+
+def test_incremental_run_only_processes_the_delta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records(6).to_csv("day1.csv", index=False)
+    records(9, changed=1).to_csv("day2.csv", index=False)
+
+    run_pipeline("day1.csv", None, outdir1="inc", signal_mode="keywords", incremental=True)
+    run_pipeline("day2.csv", None, outdir1="inc", signal_mode="keywords", incremental=True)
+    run_pipeline("day2.csv", None, outdir1="full", signal_mode="keywords")
+
+    report = json.loads((tmp_path / "inc" / "data_report.json").read_text())
+    assert report["incremental"] == {"rows": 9, "changed_rows": 4, "unchanged_rows": 5}
+    assert report["llm_dedup"]["rows"] == 4
+
+    incremental = (tmp_path / "inc" / "predictions.csv").read_text()
+    assert incremental == (tmp_path / "full" / "predictions.csv").read_text()
+
+    # Nothing changed: every prediction comes from the state store
+    run_pipeline("day2.csv", None, outdir1="again", signal_mode="keywords", incremental=True)
+    assert (tmp_path / "again" / "predictions.csv").read_text() == incremental
+
+
+def test_state_is_cleared_when_configuration_changes(tmp_path):
+    path = tmp_path / "state.sqlite"
+    first = IncrementalState(path, config={"signal_mode": "keywords"})
+    chunk = records(3).astype(str)
+    assert len(first.changed(chunk)) == 3
+    for case_id in ("C-0", "C-1", "C-2"):
+        first.stage_signals(case_id, keyword_only_signals(case_id, extract_operational_flags("")))
+    first.commit(pd.DataFrame({
+        "case_id": ["C-0", "C-1", "C-2"],
+        "priority": "P2",
+        "risk_score": 0.5,
+        "recommended_action": "Proceed with standard handling",
+        "extracted_signals": "{}",
+        "confidence": 60,
+        "rationale": None,
+    }))
+    first.close()
+
+    assert len(IncrementalState(path, config={"signal_mode": "keywords"}).changed(chunk)) == 0
+    assert len(IncrementalState(path, config={"signal_mode": "llm"}).changed(chunk)) == 3
+
+
+def test_failed_extractions_are_retried_on_the_next_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TRIAGE_LLM_BACKEND", "fake")
+    records(5).to_csv("records.csv", index=False)
+
+    monkeypatch.setenv("TRIAGE_FAKE_FAILURE_RATE", "1.0")
+    run_pipeline("records.csv", None, outdir1="out", incremental=True, max_retries=0)
+    assert pd.read_csv("out/predictions.csv")["rationale"].isna().all()
+
+    monkeypatch.setenv("TRIAGE_FAKE_FAILURE_RATE", "0.0")
+    run_pipeline("records.csv", None, outdir1="out", incremental=True, max_retries=0)
+    report = json.loads((tmp_path / "out" / "data_report.json").read_text())
+    assert report["incremental"]["changed_rows"] == 5
+    assert pd.read_csv("out/predictions.csv")["rationale"].notna().all()
+
+    # Switching backend invalidates the stored predictions
+    monkeypatch.setenv("TRIAGE_LLM_BACKEND", "replay")
+    run_pipeline("records.csv", None, outdir1="out", incremental=True, max_retries=0)
+    report = json.loads((tmp_path / "out" / "data_report.json").read_text())
+    assert report["incremental"]["changed_rows"] == 5
@@ -0,0 +1,85 @@
+import pandas as pd
+
+from triage.storage import TableWriter, read_table, write_table
+
+
+def test_parquet_round_trip_keeps_categoricals(tmp_path):
+    df = pd.DataFrame(
+        {
+            "case_id": ["C-1", "C-2", "C-3"],
+            "jurisdiction": ["UK", "US", "UK"],
+            "handler_notes": ["", None, "Awaiting documents"],
+        }
+    )
+
+    path = write_table(df, tmp_path / "records", categorical=["jurisdiction"])
+    out = read_table(tmp_path / "records")
+
+    assert path.suffix == ".parquet"
+    assert isinstance(out["jurisdiction"].dtype, pd.CategoricalDtype)
+    assert out["jurisdiction"].tolist() == ["UK", "US", "UK"]
+    assert out["handler_notes"].tolist() == ["", None, "Awaiting documents"]
+
+
+def test_chunked_writes_append_in_both_formats(tmp_path):
+    first = pd.DataFrame({"case_id": ["C-1"], "received_at": [None]})
+    second = pd.DataFrame({"case_id": ["C-2"], "received_at": ["2024-01-01"]})
+
+    for storage_format in ("parquet", "csv"):
+        with TableWriter(tmp_path / "chunks", storage_format) as writer:
+            writer.write(first)
+            writer.write(second)
+
+        out = read_table(tmp_path / "chunks", storage_format)
+        assert out["case_id"].tolist() == ["C-1", "C-2"]
+        assert out["received_at"].iloc[1] == "2024-01-01"
+
+
+def write_batches(directory, storage_format="parquet"):
+    from triage.storage import batch_entry, write_manifest
+
+    entries = []
+    for n in range(1, 4):
+        df = pd.DataFrame({"case_id": [f"C-{n}a", f"C-{n}b"], "potential_fraud": ["No", "Yes"]})
+        entries.append(batch_entry(write_table(df, directory / f"llm_out{n}", storage_format), df))
+    write_manifest(directory, entries, storage_format)
+    return entries
+
+
+def test_load_batches_follows_manifest(tmp_path):
+    from triage.storage import load_batches
+
+    entries = write_batches(tmp_path)
+    # A stale batch from an earlier run is not listed and must be ignored
+    write_table(pd.DataFrame({"case_id": ["OLD"]}), tmp_path / "llm_out9")
+
+    for workers in (1, 4):
+        case_ids = load_batches(tmp_path, workers=workers)["case_id"].tolist()
+        assert case_ids == ["C-1a", "C-1b", "C-2a", "C-2b", "C-3a", "C-3b"]
+
+    assert entries[1]["first_case_id"] == "C-2a"
+    assert entries[1]["last_case_id"] == "C-2b"
+
+
+def test_load_batches_rejects_missing_or_changed_files(tmp_path):
+    import pytest
+
+    from triage.storage import ManifestError, load_batches
+
+    write_batches(tmp_path, "csv")
+    (tmp_path / "llm_out2.csv").write_text("case_id,potential_fraud\nC-2a,No\n")
+    with pytest.raises(ManifestError, match="Checksum"):
+        load_batches(tmp_path, "csv")
+
+    (tmp_path / "llm_out2.csv").unlink()
+    with pytest.raises(ManifestError, match="missing"):
+        load_batches(tmp_path, "csv")
+
+
+def test_load_batches_without_manifest_globs_in_numeric_order(tmp_path):
+    from triage.storage import load_batches
+
+    for n in (10, 2, 1):
+        write_table(pd.DataFrame({"case_id": [f"C-{n}"]}), tmp_path / f"llm_out{n}", "csv")
+
+    assert load_batches(tmp_path, "csv")["case_id"].tolist() == ["C-1", "C-2", "C-10"]
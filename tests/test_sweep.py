@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from sklearn.metrics import f1_score
+
+from triage.predict import ClaimTriageEvaluator, run_pipeline
+from triage.storage import PROCESSED_TABLE, read_table
+from triage.sweep import SweepMatrix, expand_grid, run_sweep
+from triage.synth import generate_gold, generate_records
+
+
+def metrics_of(scored, gold):
+    eval_df = scored.merge(gold, on="case_id")
+    return {
+        "priority_accuracy": (eval_df["priority"] == eval_df["expected_priority"]).mean(),
+        "priority_macro_f1": f1_score(
+            eval_df["expected_priority"],
+            eval_df["priority"],
+            labels=["P0", "P1", "P2", "P3"],
+            average="macro",
+        ),
+        "action_accuracy": (eval_df["recommended_action"] == eval_df["expected_action"]).mean(),
+    }
+
+
+class TunedEvaluator(ClaimTriageEvaluator):
+    CORE_SIGNAL_WEIGHTS = {**ClaimTriageEvaluator.CORE_SIGNAL_WEIGHTS, "potential_fraud": 0.3}
+    PRIORITY_THRESHOLDS = {"P0": 0.8, "P1": 0.6, "P2": 0.45}
+
+
+def test_sweep_matches_rescoring_with_each_configuration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = generate_records(400, rng=3)
+    records.to_csv("records.csv", index=False)
+    gold = generate_gold(records["case_id"], 120, rng=3)
+    gold.to_csv("gold.csv", index=False)
+    run_pipeline("records.csv", None, outdir1="out", signal_mode="keywords", persist_intermediates=True)
+
+    grid = {"potential_fraud": [0.18, 0.3], "P0": [0.8, 0.85], "P1": [0.6, 0.65], "P2": [0.4, 0.45]}
+    results, baseline = run_sweep("gold.csv", grid=grid, outdir="out")
+    assert len(results) == 16
+    assert (tmp_path / "out" / "sweep_report.md").exists()
+
+    predictions = pd.read_csv("out/predictions.csv")
+    for col, value in metrics_of(predictions, gold).items():
+        assert baseline[col] == pytest.approx(value)
+
+    processed = read_table(tmp_path / "data" / PROCESSED_TABLE)
+    evaluator = TunedEvaluator()
+    rescored = pd.concat([processed["case_id"], evaluator.score_batch(processed)], axis=1)
+    tuned = results[
+        (results["potential_fraud"] == 0.3)
+        & (results["P0"] == 0.8)
+        & (results["P1"] == 0.6)
+        & (results["P2"] == 0.45)
+    ].iloc[0]
+    for col, value in metrics_of(rescored, gold).items():
+        assert tuned[col] == pytest.approx(value)
+
+    # Best first
+    assert results["priority_macro_f1"].is_monotonic_decreasing
+
+
+def test_expand_grid_drops_unordered_thresholds_and_unknown_parameters():
+    configs = expand_grid({"P0": [0.6, 0.9], "P1": [0.7]})
+    assert configs["P0"].tolist() == [0.9]
+    assert configs["potential_fraud"].tolist() == [0.18]
+
+    with pytest.raises(ValueError, match="Unknown sweep parameters"):
+        expand_grid({"P4": [0.1]})
+
+    with pytest.raises(ValueError, match="None of the gold case_ids"):
+        SweepMatrix(pd.DataFrame({"case_id": ["C-1"]}), pd.DataFrame({
+            "case_id": ["C-2"], "expected_priority": ["P0"], "expected_action": ["Reject claim"],
+        }))
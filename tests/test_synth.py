@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+
+from triage.bench import run_benchmark, summary_table
+from triage.ingest import validate_and_report
+from triage.synth import generate_gold, generate_records, write_records
+
+
+def test_generate_records_is_deterministic_and_follows_dictionary():
+    df = generate_records(5000, 7)
+
+    assert df.equals(generate_records(5000, 7))
+    assert df["case_id"].is_unique
+    assert set(df["service_line"].dropna()) == {"Insurance", "Legal", "Advisory"}
+    assert set(df["claim_value_band"]) <= {"<50k", "50k-250k", "250k-1m", ">1m", "Unknown"}
+    assert 0.3 < df["handler_notes"].isna().mean() < 0.4
+    assert 0.0 < df["jurisdiction"].isna().mean() < 0.03
+    assert 0.5 < (df["service_line"] == "Insurance").mean() < 0.6
+
+
+def test_write_records_in_chunks_validates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = write_records(tmp_path / "records.csv", 1200, seed=3, chunk_rows=500)
+
+    clean, report = validate_and_report(path)
+
+    assert report["rows_loaded"] == 1200
+    assert report["invalid_rows"] == 0
+    assert len(clean) == 1200
+    assert pd.read_csv(path)["case_id"].iloc[-1] == "C-01200"
+
+
+def test_generate_gold_samples_known_cases():
+    records = generate_records(1000, 1)
+    gold = generate_gold(records["case_id"], 200, 1)
+
+    assert len(gold) == 200
+    assert gold["case_id"].isin(records["case_id"]).all()
+    assert set(gold["expected_priority"]) == {"P0", "P1", "P2", "P3"}
+
+
+def test_run_benchmark_writes_results(tmp_path):
+    output = tmp_path / "bench.json"
+
+    results = run_benchmark([500], output, workdir=tmp_path / "work")
+
+    saved = json.loads(output.read_text())
+    assert saved == results
+    stages = [s["stage"] for s in saved["runs"][0]["stages"]]
+    assert stages == ["generate", "validate", "extract", "features", "score", "evaluate"]
+    assert all(s["seconds"] >= 0 for s in saved["runs"][0]["stages"])
+    # Heap peaks are traced per stage by default
+    assert all(s["peak_traced_mb"] is not None for s in saved["runs"][0]["stages"])
+    assert "vs_baseline" in summary_table(results, baseline=saved)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from schema.modeloutput import ClaimRiskSignals
+from triage.ingest import estimate_extraction_tokens, extract_signals, preprocess_getstructrureddata
+from triage.model import GetFromLlm
+from triage.storage import read_table
+from triage.usage import TokenBudgetExceeded, TokenLedger
+
+
+def claim(case_id, summary="Water damage to stock"):
+    return (
+        f"caseid:{case_id}; Summary: {summary}; handler_notes: none; "
+        f"historical outcome: Unknown; has attachment: Yes"
+    )
+
+
+def write_records(path, n):
+    pd.DataFrame([
+        {
+            "case_id": f"C-{i}",
+            "client_segment": "SMB",
+            "jurisdiction": "UK",
+            "service_line": "Insurance",
+            "claim_value_band": "<50k",
+            "attachments_present": True,
+            "free_text_summary": f"Water damage to stock at warehouse {i}",
+            "handler_notes": "",
+            "historical_outcome": "Unknown",
+        }
+        for i in range(n)
+    ]).to_csv(path, index=False)
+
+
+def test_usage_is_accounted_per_call_and_row(tmp_path):
+    usage = TokenLedger(output_dir=tmp_path)
+    llm = GetFromLlm(backend="fake", usage=usage)
+    case_ids = [f"C-{i}" for i in range(4)]
+
+    extract_signals(llm, [claim(c) for c in case_ids], claims_per_call=2, case_ids=case_ids)
+    extract_signals(llm, [claim("C-9")])
+    usage.write(tmp_path)
+
+    summary = usage.summary()
+    assert summary["calls"] == summary["calls_with_reported_usage"] == 3
+    assert summary["prompt_tokens"] > 0 and summary["completion_tokens"] > 0
+    assert summary["claims_accounted"] == 5
+    calls = pd.read_csv(tmp_path / "token_usage_calls.csv")
+    rows = pd.read_csv(tmp_path / "token_usage_rows.csv")
+    assert calls["prompt_tokens"].sum() == summary["prompt_tokens"]
+    assert set(rows["case_id"]) == {*case_ids, "C-9"}
+    packed = calls[calls["call"] == rows.loc[rows["case_id"] == "C-0", "call"].item()].iloc[0]
+    assert rows.loc[rows["case_id"] == "C-0", "prompt_tokens"].item() == pytest.approx(
+        packed["prompt_tokens"] / 2, abs=0.05
+    )
+
+
+def test_usage_is_accounted_to_the_requested_case_id(tmp_path):
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    fields = {f: "No" for f in ClaimRiskSignals.model_fields if f not in {"case_id", "risk_summary"}}
+    answer = json.dumps({"case_id": "C-WRONG", "risk_summary": "Routine claim.", **fields})
+    usage = TokenLedger(output_dir=tmp_path, batch_rows=1)
+    llm = GetFromLlm(model=FakeListChatModel(responses=[answer]), usage=usage)
+
+    llm.generate_details(claim("C-1"))
+    asyncio.run(llm.agenerate_details(claim("C-2")))
+    for position, case_id in enumerate(["C-1", "C-2"]):
+        usage.assign_row(position, case_id)
+    usage.close()
+
+    # The model answered with another case_id; the tokens still land on the rows asked for
+    batches = pd.read_csv(tmp_path / "token_usage_batches.csv")
+    assert (batches["total_tokens"] > 0).all()
+    assert set(pd.read_csv(tmp_path / "token_usage_rows.csv")["case_id"]) == {"C-1", "C-2"}
+
+
+def test_usage_is_totalled_per_batch_of_rows(tmp_path):
+    usage = TokenLedger(output_dir=tmp_path, batch_rows=2)
+    usage.record(["C-0", "C-1"], 100, 20)
+    usage.record(["C-3"], 60, 10)
+    # C-2 was resumed or deduplicated: no tokens of its own
+    for position, case_id in enumerate(["C-0", "C-1", "C-2", "C-3", "C-4"]):
+        usage.assign_row(position, case_id)
+    usage.write(tmp_path)
+
+    batches = pd.read_csv(tmp_path / "token_usage_batches.csv")
+    assert batches["batch"].tolist() == [1, 2, 3]
+    assert batches["rows"].tolist() == [2, 2, 1]
+    assert batches["total_tokens"].tolist() == [120, 70, 0]
+    assert usage.summary()["batches"] == 3
+
+
+def test_budget_refuses_requests_once_spent():
+    usage = TokenLedger(max_tokens=1000)
+    usage.reserve(600)
+    usage.release(600)
+    usage.record(["C-1"], 500, 200)
+
+    with pytest.raises(TokenBudgetExceeded):
+        usage.reserve(400)
+    # Exhaustion is sticky: later, smaller requests are refused too
+    with pytest.raises(TokenBudgetExceeded):
+        usage.reserve(1)
+    assert usage.summary()["budget_exhausted"]
+
+
+def test_budget_stops_extraction_and_resume_finishes(tmp_path, monkeypatch):
+    input_csv = tmp_path / "records.csv"
+    write_records(input_csv, 6)
+    monkeypatch.chdir(tmp_path)
+
+    per_call = GetFromLlm(backend="fake").estimate_request_tokens([claim("C-0")])
+    estimate = estimate_extraction_tokens(GetFromLlm(backend="fake"), input_csv)
+    assert estimate["calls"] == 6 and estimate["estimated_tokens"] > 5 * per_call
+
+    preprocess_getstructrureddata(input_csv, llm_backend="fake", max_tokens_budget=2 * per_call)
+
+    report = json.loads((tmp_path / "outputs" / "token_usage.json").read_text())
+    assert report["budget_exhausted"]
+    assert report["estimated_tokens"] == estimate["estimated_tokens"]
+    assert 0 < report["total_tokens"] <= 2 * per_call
+
+    # Every row still gets signals; only LLM-extracted rows are checkpointed
+    signals = read_table("data/llmdata/llm_out1")
+    assert len(signals) == 6
+    journal = (tmp_path / "data" / "llmdata" / "extraction_journal.jsonl").read_text().splitlines()
+    assert 0 < len(journal) < 6
+
+    preprocess_getstructrureddata(input_csv, llm_backend="fake", resume=True)
+
+    journal = (tmp_path / "data" / "llmdata" / "extraction_journal.jsonl").read_text().splitlines()
+    assert len(journal) == 6
+    # Without a budget the input is not read again for the estimate
+    report = json.loads((tmp_path / "outputs" / "token_usage.json").read_text())
+    assert report["estimated_tokens"] is None
+    batches = pd.read_csv(tmp_path / "outputs" / "token_usage_batches.csv")
+    assert batches["rows"].sum() == 6
+    assert batches["total_tokens"].sum() == pytest.approx(report["total_tokens"], abs=0.5)
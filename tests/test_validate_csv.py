@@ -59,3 +59,77 @@ def test_invalid_enum_fails(tmp_path):
 
     with pytest.raises(EmptyDatasetError):
         validate_and_clean_csv(csv_path)
+
+
+def test_columnar_validation_reports_pydantic_errors(tmp_path, monkeypatch):
+    import json
+
+    from pydantic import ValidationError
+
+    from triage.ingest import ClaimInput
+
+    base = {
+        "case_id": "C-010",
+        "client_segment": "SMB",
+        "jurisdiction": "UK",
+        "service_line": "Insurance",
+        "claim_value_band": "<50k",
+        "attachments_present": True,
+        "free_text_summary": "Test",
+        "handler_notes": "",
+        "historical_outcome": "Accepted",
+    }
+    bad = {**base, "case_id": "C-011", "jurisdiction": "Mars", "claim_value_band": "huge"}
+    csv_path = tmp_path / "mixed.csv"
+    pd.DataFrame([base, bad]).to_csv(csv_path, index=False)
+    monkeypatch.chdir(tmp_path)
+
+    clean_df = validate_and_clean_csv(csv_path)
+
+    assert clean_df["case_id"].tolist() == ["C-010"]
+
+    report = json.loads(Path("outputs/data_report.json").read_text())
+    anomaly = report["anomalies"][0]
+    assert anomaly["row_index"] == 1 and anomaly["case_id"] == "C-011"
+
+    with pytest.raises(ValidationError) as exc:
+        ClaimInput(**{**bad, "attachments_present": "Yes", "handler_notes": "No data Available"})
+    assert anomaly["errors"] == json.loads(json.dumps(exc.value.errors()))
+
+
+def test_chunked_validation_matches_whole_file(tmp_path, monkeypatch):
+    from triage.ingest import iter_validated_chunks, new_data_report, validate_and_report
+
+    rows = []
+    for i in range(7):
+        rows.append({
+            "case_id": f"C-{i:03d}" if i != 2 else None,
+            "received_at": "2024-01-01T10:00:00",
+            "client_segment": "INVALID" if i == 5 else "SMB",
+            "jurisdiction": None if i % 3 == 0 else "UK",
+            "service_line": "Insurance",
+            "claim_value_band": "<50k",
+            "attachments_present": True,
+            "free_text_summary": "Test",
+            "handler_notes": None if i % 2 else "note",
+            "historical_outcome": "Accepted",
+        })
+    csv_path = tmp_path / "records.csv"
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+    monkeypatch.chdir(tmp_path)
+
+    whole_df, whole_report = validate_and_report(csv_path)
+
+    chunked_report = new_data_report(csv_path)
+    chunks = list(iter_validated_chunks(csv_path, chunked_report, chunk_rows=3))
+
+    assert len(chunks) == 3
+    assert pd.concat(chunks, ignore_index=True).equals(whole_df)
+    assert chunked_report == whole_report
+
+    sharded_report = new_data_report(csv_path)
+    sharded = list(iter_validated_chunks(csv_path, sharded_report, workers=3))
+
+    assert len(sharded) == 1
+    assert sharded[0].equals(whole_df)
+    assert sharded_report == whole_report